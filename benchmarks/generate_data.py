@@ -0,0 +1,139 @@
+# ===================================================
+# generate_data.py
+# Gerador sintético de barras 1m estilo MNQ (reprodutível por semente)
+# ===================================================
+import os
+import re
+import argparse
+
+import numpy as np
+import pandas as pd
+
+
+# Tamanhos aceitos: N + unidade (1w, 3mo, 1y, 5y ...)
+SIZE_UNITS = {"d": 1, "w": 7, "mo": 30, "y": 365}
+
+TICK = 0.25
+START = "2024-01-07 18:00"     # domingo, abertura da sessão
+PRICE = 17000.0
+MINUTE_VOL = 0.00035           # desvio do retorno log por minuto (~20% a.a.)
+
+
+def parse_size(size):
+    """'1w', '6mo', '5y' -> número de dias corridos"""
+    match = re.fullmatch(r"(\d+)\s*(d|w|mo|y)", str(size).strip().lower())
+    if not match:
+        raise ValueError(f"Tamanho inválido: {size} (ex: 1w, 3mo, 1y, 5y)")
+    return int(match.group(1)) * SIZE_UNITS[match.group(2)]
+
+
+def session_mask(minutes):
+    """
+    Minutos com pregão no horário do CME (Globex): domingo 18:00 até
+    sexta 17:00, com pausa diária 17:00-18:00.
+    """
+    weekday = minutes.dayofweek
+    hour = minutes.hour
+    closed = (
+        (hour == 17)
+        | (weekday == 5)                       # sábado
+        | ((weekday == 4) & (hour >= 17))      # sexta depois do fechamento
+        | ((weekday == 6) & (hour < 18))       # domingo antes da abertura
+    )
+    return ~np.asarray(closed)
+
+
+def generate_bars(size="1mo", seed=42, start=START, price=PRICE):
+    """
+    Barras 1m sintéticas: passeio aleatório no log do preço, volatilidade
+    variando por dia, saltos na abertura da sessão e preços na grade de
+    0.25. Mesma semente -> mesmas barras.
+
+    Returns:
+        DataFrame com timestamp (fim da barra), open, high, low, close, volume
+    """
+    rng = np.random.default_rng(seed)
+
+    minutes = pd.date_range(start, periods=parse_size(size) * 1440, freq="min")
+    open_minutes = minutes[session_mask(minutes)]
+    n = len(open_minutes)
+
+    # Volatilidade por dia (lognormal) e salto na primeira barra da sessão
+    day = (open_minutes.normalize() - open_minutes[0].normalize()).days.to_numpy()
+    day_vol = np.exp(rng.normal(0.0, 0.35, day.max() + 1))[day]
+    gap = np.ones(n)
+    gap[1:][np.diff(open_minutes.asi8) > 60 * 10 ** 9] = 8.0
+
+    returns = rng.normal(0.0, MINUTE_VOL, n) * day_vol * gap
+    close = np.round(price * np.exp(np.cumsum(returns)) / TICK).astype(np.int64)
+    opens = np.empty_like(close)
+    opens[0] = round(price / TICK)
+    opens[1:] = close[:-1]
+
+    # Pavios em ticks (geométricos) e volume com mais negócios no horário de NY
+    wick = np.maximum(1, np.round(8 * day_vol)).astype(np.int64)
+    high = np.maximum(opens, close) + rng.geometric(1.0 / (1 + wick)) - 1
+    low = np.minimum(opens, close) - rng.geometric(1.0 / (1 + wick)) + 1
+    rth = (open_minutes.hour >= 9) & (open_minutes.hour < 16)
+    volume = rng.poisson(np.where(rth, 250, 60) * day_vol) + 1
+
+    return pd.DataFrame({
+        "timestamp": open_minutes + pd.Timedelta(minutes=1),
+        "open": opens,
+        "high": high,
+        "low": low,
+        "close": close,
+        "volume": volume,
+    })
+
+
+def _format_ticks(ticks):
+    """Ticks inteiros -> texto com 2 casas (grade de 0.25, sem float)"""
+    ticks = pd.Series(ticks)
+    fraction = np.array([".00", ".25", ".50", ".75"])[ticks.to_numpy() % 4]
+    return (ticks // 4).astype(str) + fraction
+
+
+def write_datafile(path, bars):
+    """Grava no formato do repositório: YYYYMMDD HHMMSS;open;high;low;close;volume"""
+    lines = bars["timestamp"].dt.strftime("%Y%m%d %H%M%S")
+    for col in ("open", "high", "low", "close"):
+        lines = lines + ";" + _format_ticks(bars[col]).to_numpy()
+    lines = lines + ";" + bars["volume"].astype(str).to_numpy()
+
+    folder = os.path.dirname(os.path.abspath(path))
+    os.makedirs(folder, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8", newline="\n") as f:
+        f.write("\n".join(lines))
+        f.write("\n")
+    os.replace(tmp, path)
+    return path
+
+
+def generate(path, size="1mo", seed=42):
+    """Gera e grava o arquivo; devolve o número de barras"""
+    bars = generate_bars(size, seed)
+    write_datafile(path, bars)
+    return len(bars)
+
+
+def default_path(size, seed):
+    """benchmarks/data/mnq_<size>_s<seed>.txt"""
+    folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+    return os.path.join(folder, f"mnq_{size}_s{seed}.txt")
+
+
+# ===================================================
+# CLI
+# ===================================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera barras 1m sintéticas (MNQ)")
+    parser.add_argument("--size", default="1mo", help="1w, 3mo, 1y, 5y ... (padrão 1mo)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="arquivo de saída (padrão benchmarks/data/)")
+    args = parser.parse_args()
+
+    output = args.output or default_path(args.size, args.seed)
+    count = generate(output, args.size, args.seed)
+    print(f"✅ {count:,} barras em {output}")
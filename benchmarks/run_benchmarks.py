@@ -0,0 +1,391 @@
+# ===================================================
+# run_benchmarks.py
+# Suite de benchmarks (cenários padrão, saída JSON, comparação com baseline)
+# ===================================================
+import time
+
+_T0 = time.perf_counter()    # antes dos imports pesados (tempo de startup)
+
+import os
+import sys
+import json
+import argparse
+import platform
+import subprocess
+import tempfile
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.generate_data import default_path, generate
+
+
+# Parâmetros da SMATest usados nos cenários de execução única
+SMA_PARAMS = {"sma_period": 20, "stop_points": 20, "target_rr": 2.0}
+
+# Grid de 100 combinações (10 x 5 x 2)
+GRID_100 = {
+    "sma_period": [5, 10, 15, 20, 25, 30, 40, 50, 75, 100],
+    "stop_points": [5, 10, 20, 30, 40],
+    "target_rr": [1.0, 2.0],
+}
+GRID_TIMEFRAME = 5
+
+# Muitos trades: SMA curta, stop de 1 ponto, alvo 1R
+TRADE_HEAVY_PARAMS = {"sma_period": 2, "stop_points": 1, "target_rr": 1.0}
+
+# Métricas comparadas com o baseline: True = maior é melhor
+COMPARED = {
+    "bars_per_sec": True,
+    "combos_per_sec": True,
+    "peak_rss_mb": False,
+    "startup_s": False,
+}
+
+# Diferenças abaixo disso são ruído (não contam como regressão)
+MIN_DELTA = {"peak_rss_mb": 5.0, "startup_s": 0.05}
+
+# Escala de memória (--memory): tamanhos crescentes x perfis
+MEMORY_SIZES = "1mo,3mo,1y"
+MEMORY_PROFILES = "lean,lowmem"
+
+
+# ==========================================================
+# CENÁRIOS (rodam no processo filho)
+# ==========================================================
+def _single(datafile, profile, timeframe, params=SMA_PARAMS, save_trades=False):
+    from engine.backtest_engine import BacktestEngine
+    from strategies.sma_test.strategy import SMATest
+
+    engine = BacktestEngine(
+        SMATest,
+        datafile,
+        timeframe_minutes=timeframe,
+        strategy_params=params,
+        feed="store",
+        profile=profile,
+    )
+
+    def run():
+        result = engine.run(verbose=False, save_trades=save_trades)
+        return {
+            "bars": result["bars"],
+            "combos": 1,
+            "trades": result["metrics"].get("trades", 0),
+        }
+
+    return run
+
+
+def _grid(datafile, profile, workers, chunk_size):
+    from engine.bar_store import BarStore
+    from engine.batch_runner import BatchRunner
+    from strategies.sma_test.strategy import SMATest
+
+    runner = BatchRunner(
+        SMATest,
+        datafile,
+        workers=workers,
+        cache=False,
+        profile=profile,
+        chunk_size=chunk_size,
+    )
+    bars = len(BarStore(datafile).resampled(GRID_TIMEFRAME)["close"])
+
+    def run():
+        df = runner.run({"timeframe": GRID_TIMEFRAME}, GRID_100, verbose=False)
+        return {"bars": bars * len(df), "combos": len(df)}
+
+    return run
+
+
+def _parse(datafile, feed):
+    """
+    Só a carga das barras 1m pelo feed (parse + preload, sem estratégia):
+    feed="csv" é o GenericCSVData linha a linha, feed="array" o parse em
+    bloco para arrays NumPy (engine/bar_store.read_bars)
+    """
+    import backtrader as bt
+    from engine.backtest_engine import BacktestEngine
+
+    engine = BacktestEngine(bt.Strategy, datafile, timeframe_minutes=1, feed=feed)
+
+    def run():
+        data = engine._make_base_feed()
+        bt.Cerebro().adddata(data)  # ambiente do feed (calendário, fuso)
+        data._start()
+        data.preload()
+        return {"bars": data.buflen(), "combos": 1}
+
+    return run
+
+
+SCENARIOS = {
+    "single_1m": lambda args: _single(args.data, args.profile, 1),
+    "resample_5m": lambda args: _single(args.data, args.profile, 5),
+    "resample_15m": lambda args: _single(args.data, args.profile, 15),
+    "grid_100": lambda args: _grid(args.data, args.profile, args.workers, args.chunk),
+    "trade_log_heavy": lambda args: _single(args.data, args.profile, 1,
+                                            TRADE_HEAVY_PARAMS, save_trades=True),
+    "parse_csv": lambda args: _parse(args.data, "csv"),
+    "parse_array": lambda args: _parse(args.data, "array"),
+}
+
+
+def run_child(args):
+    """
+    Executa UM cenário e imprime o resultado (JSON) na última linha.
+    Startup = imports + abertura dos dados (índice e cache binário).
+    """
+    from engine.backtest_engine import peak_rss_mb
+    from engine.bar_store import BarStore
+    from engine.data_index import DataIndex
+
+    DataIndex(args.data).ensure()
+    BarStore(args.data).ensure()
+    run = SCENARIOS[args.child](args)
+    startup = time.perf_counter() - _T0
+
+    # trades_*.csv do cenário com log de trades vai para uma pasta temporária
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        t0 = time.perf_counter()
+        stats = run()
+        seconds = time.perf_counter() - t0
+        os.chdir(ROOT)
+
+    stats.update({
+        "seconds": seconds,
+        "bars_per_sec": stats["bars"] / seconds,
+        "combos_per_sec": stats["combos"] / seconds,
+        "startup_s": startup,
+        "peak_rss_mb": peak_rss_mb(),
+    })
+    print(json.dumps(stats))
+
+
+# ==========================================================
+# ORQUESTRAÇÃO (processo principal)
+# ==========================================================
+def run_scenario(name, args):
+    """Roda o cenário num processo novo (RSS e startup isolados)"""
+    cmd = [
+        sys.executable, "-m", "benchmarks.run_benchmarks",
+        "--child", name,
+        "--data", args.data,
+        "--profile", args.profile,
+        "--workers", str(args.workers),
+        "--chunk", str(args.chunk),
+    ]
+    proc = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Cenário {name} falhou:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def prepare_data(args):
+    """Gera o arquivo sintético (se preciso) e aquece os caches"""
+    from engine.bar_store import BarStore
+    from engine.data_index import DataIndex
+
+    if args.data is None:
+        args.data = default_path(args.size, args.seed)
+        if not os.path.exists(args.data):
+            print(f"🧪 Gerando dados sintéticos ({args.size}, seed {args.seed})...")
+            generate(args.data, args.size, args.seed)
+
+    DataIndex(args.data).ensure()
+    store = BarStore(args.data).ensure()
+    for timeframe in (5, 15):
+        store.resampled(timeframe)
+    return DataIndex(args.data).ensure()
+
+
+def run_suite(args):
+    index = prepare_data(args)
+    names = args.scenarios.split(",") if args.scenarios else list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        raise ValueError(f"Cenários desconhecidos: {unknown} ({', '.join(SCENARIOS)})")
+
+    import backtrader as bt
+
+    report = {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "backtrader": bt.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "data": os.path.basename(args.data),
+            "rows": index.rows,
+            "size": args.size,
+            "seed": args.seed,
+            "profile": args.profile,
+            "workers": args.workers,
+            "chunk": args.chunk,
+            "repeat": args.repeat,
+        },
+        "scenarios": {},
+    }
+
+    for name in names:
+        # Melhor de N execuções (menor tempo)
+        runs = [run_scenario(name, args) for _ in range(args.repeat)]
+        best = min(runs, key=lambda r: r["seconds"])
+        report["scenarios"][name] = best
+        print(f"⏱️ {name:<16} {best['bars_per_sec']:>12,.0f} barras/s"
+              f" {best['combos_per_sec']:>8,.2f} comb/s"
+              f" {best['peak_rss_mb']:>8,.1f} MB"
+              f" startup {best['startup_s']:.2f}s")
+
+    return report
+
+
+def run_memory(args):
+    """
+    Escala de memória: o mesmo cenário em arquivos cada vez maiores
+    (--memory 1mo,3mo,1y) em cada perfil. No lowmem o pico de RSS deve
+    ficar ~constante; nos outros cresce com o número de barras.
+
+    Cenários do relatório: "<cenário>@<tamanho>/<perfil>" (comparáveis
+    com um baseline gerado do mesmo jeito)
+    """
+    sizes = args.memory.split(",")
+    profiles = args.memory_profiles.split(",")
+    name = args.scenarios or "single_1m"
+    if name not in SCENARIOS:
+        raise ValueError(f"Cenário desconhecido: {name} ({', '.join(SCENARIOS)})")
+
+    import backtrader as bt
+
+    report = {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "backtrader": bt.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "memory": sizes,
+            "profiles": profiles,
+            "scenario": name,
+            "seed": args.seed,
+            "rows": {},
+        },
+        "scenarios": {},
+    }
+
+    peaks = {profile: [] for profile in profiles}
+    for size in sizes:
+        size_args = argparse.Namespace(**{**vars(args), "size": size, "data": None})
+        rows = prepare_data(size_args).rows
+        report["meta"]["rows"][size] = rows
+
+        for profile in profiles:
+            size_args.profile = profile
+            runs = [run_scenario(name, size_args) for _ in range(args.repeat)]
+            best = min(runs, key=lambda r: r["peak_rss_mb"])
+            report["scenarios"][f"{name}@{size}/{profile}"] = best
+            peaks[profile].append(best["peak_rss_mb"])
+            print(f"🧠 {size:<5} {rows:>10,} barras  {profile:<7}"
+                  f" {best['peak_rss_mb']:>8,.1f} MB"
+                  f" {best['bars_per_sec']:>12,.0f} barras/s")
+
+    # Crescimento do menor para o maior arquivo
+    rows = [report["meta"]["rows"][size] for size in sizes]
+    print()
+    for profile, values in peaks.items():
+        growth = values[-1] - values[0]
+        per_100k = growth / max(rows[-1] - rows[0], 1) * 100_000
+        print(f"📈 {profile:<7} {values[0]:,.1f} -> {values[-1]:,.1f} MB"
+              f" ({growth:+,.1f} MB, {per_100k:+,.2f} MB / 100k barras)")
+
+    return report
+
+
+def compare(report, baseline, tolerance):
+    """
+    Compara com o baseline. Regressão = pior que o baseline por mais de
+    `tolerance` (fração) e acima do ruído mínimo (MIN_DELTA).
+
+    Returns:
+        lista de regressões (cenário, métrica, baseline, atual)
+    """
+    regressions = []
+    print(f"\n{'='*70}")
+    print(f"  📊 COMPARAÇÃO COM O BASELINE ({baseline['meta'].get('date', '?')})")
+    print(f"{'='*70}")
+
+    for name, current in report["scenarios"].items():
+        base = baseline["scenarios"].get(name)
+        if base is None:
+            print(f"{name}: sem baseline")
+            continue
+
+        for metric, higher_is_better in COMPARED.items():
+            old, new = base.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            regressed = worse > tolerance and abs(new - old) > MIN_DELTA.get(metric, 0)
+            flag = "❌" if regressed else "✅"
+            print(f"{flag} {name:<16} {metric:<15} {old:>12,.2f} -> {new:>12,.2f} ({change:+.1%})")
+            if regressed:
+                regressions.append((name, metric, old, new))
+
+    return regressions
+
+
+# ===================================================
+# CLI
+# ===================================================
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks do BacktestEngine / BatchRunner")
+    parser.add_argument("--size", default="1mo", help="tamanho dos dados sintéticos (1w .. 5y)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data", help="arquivo de dados próprio (em vez do sintético)")
+    parser.add_argument("--scenarios", help=f"lista separada por vírgula ({', '.join(SCENARIOS)})")
+    parser.add_argument("--profile", default="lean", help="perfil do Cerebro (lean, full, lowmem)")
+    parser.add_argument("--workers", type=int, default=1, help="processos no grid_100")
+    parser.add_argument("--chunk", type=int, default=1, help="combinações por Cerebro no grid_100")
+    parser.add_argument("--repeat", type=int, default=1, help="execuções por cenário (fica a melhor)")
+    parser.add_argument("--output", help="grava o relatório JSON neste arquivo")
+    parser.add_argument("--baseline", help="relatório JSON anterior para comparar")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="piora tolerada antes de acusar regressão (padrão 0.10)")
+    parser.add_argument("--memory", nargs="?", const=MEMORY_SIZES,
+                        help=f"escala de memória nos tamanhos (padrão {MEMORY_SIZES})"
+                             " com o cenário de --scenarios (padrão single_1m)")
+    parser.add_argument("--memory-profiles", default=MEMORY_PROFILES,
+                        help=f"perfis comparados no --memory (padrão {MEMORY_PROFILES})")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    if args.child:
+        run_child(args)
+        sys.exit(0)
+
+    report = run_memory(args) if args.memory else run_suite(args)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Relatório: {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.tolerance):
+            print("\n❌ Regressão em relação ao baseline")
+            sys.exit(1)
+        print("\n✅ Sem regressões")
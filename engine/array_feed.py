@@ -0,0 +1,224 @@
+# ===================================================
+# array_feed.py
+# Data feed do Backtrader servido a partir de arrays NumPy
+# ===================================================
+import mmap
+from datetime import datetime, timedelta
+
+import numpy as np
+import backtrader as bt
+from backtrader.utils import date2num
+
+
+# Colunas de um conjunto de barras (todas do mesmo tamanho)
+#   timestamp : int64, segundos desde 1970-01-01 (horário "ingênuo" do arquivo)
+#   datetime  : float64, data numérica do Backtrader (bt.date2num)
+#   open/high/low/close/volume : float64
+BAR_COLUMNS = ("timestamp", "datetime", "open", "high", "low", "close", "volume")
+
+# Época dos timestamps e seu ordinal (datetime.toordinal)
+EPOCH = datetime(1970, 1, 1)
+EPOCH_ORDINAL = EPOCH.toordinal()
+
+# Faixa de ordinais com o mesmo expoente em float64 (2^19 .. 2^20):
+# cobre os anos ~1436 a ~2871. Dentro dela a parte fracionária
+# de date2num depende apenas do horário
+_ORDINAL_MIN = 2 ** 19
+_ORDINAL_MAX = 2 ** 20
+_REF_ORDINAL = datetime(2000, 1, 1).toordinal()
+
+
+def timestamps_to_num(timestamps):
+    """
+    Converte timestamps (segundos desde 1970, int64) para a data numérica
+    do Backtrader, com resultado IDÊNTICO ao de bt.date2num (que usa fsum).
+
+    A parte fracionária é calculada uma vez por horário distinto (no máximo
+    86400) com o próprio date2num e depois somada ao ordinal do dia.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    days, seconds = np.divmod(timestamps, 86400)
+    ordinals = days + EPOCH_ORDINAL
+
+    if len(ordinals) and (ordinals.min() < _ORDINAL_MIN or ordinals.max() >= _ORDINAL_MAX):
+        # Fora da faixa: conversão escalar (lenta, mas exata)
+        return np.array(
+            [date2num(EPOCH + timedelta(seconds=int(ts))) for ts in timestamps],
+            dtype=np.float64,
+        )
+
+    unique_seconds, inverse = np.unique(seconds, return_inverse=True)
+    base = datetime.fromordinal(_REF_ORDINAL)
+    fractions = np.array([
+        date2num(base.replace(hour=int(s) // 3600,
+                              minute=int(s) % 3600 // 60,
+                              second=int(s) % 60)) - _REF_ORDINAL
+        for s in unique_seconds
+    ], dtype=np.float64)
+
+    return ordinals.astype(np.float64) + fractions[inverse]
+
+
+# ==========================================================
+# FEED
+# ==========================================================
+class ArrayData(bt.feed.DataBase):
+    """
+    Feed que entrega barras já carregadas em arrays NumPy
+    (inclusive arrays memory-mapped do BarStore).
+
+    Params:
+        bars: dict com as colunas de BAR_COLUMNS
+              (no mínimo datetime, open, high, low, close, volume)
+        start/end: fatia [start, end) dos arrays a servir (índices)
+        block: None (serve direto dos arrays) ou N barras por bloco:
+              copia N barras de cada vez e devolve ao sistema as páginas
+              já lidas dos arrays memory-mapped (madvise). A memória
+              residente fica limitada ao bloco, não ao tamanho do arquivo
+              (perfil lowmem)
+        stale_last: a última barra é a que o Resampler.last() entrega no
+              fim dos dados (resample_cache.flushed_last). Nela o broker
+              vê os tick_* da barra anterior, como no cerebro.resampledata
+
+    Os valores entregues são os mesmos do GenericCSVData para o mesmo
+    arquivo (openinterest fica NaN, como no CSV com openinterest=-1).
+    """
+
+    params = (
+        ("bars", None),
+        ("start", 0),
+        ("end", None),
+        ("block", None),
+        ("stale_last", False),
+    )
+
+    def start(self):
+        super().start()
+
+        self._idx = self.p.start
+        self._end = len(self.p.bars["datetime"]) if self.p.end is None else self.p.end
+
+        if self.p.block:
+            # Primeiro bloco carregado no primeiro _load
+            self._maps = _mapped_buffers(self.p.bars)
+            self._block_start = self._block_end = self._idx
+        else:
+            self._set_columns(self.p.bars)
+            self._block_start, self._block_end = 0, self._end
+
+        # Ticks da penúltima barra, vistos pelo broker na última
+        self._stale_ticks = None
+        if self.p.stale_last and self._end - self.p.start >= 2:
+            k = self._end - 2
+            bars = self.p.bars
+            self._stale_ticks = {col: float(bars[col][k])
+                                 for col in ("open", "high", "low", "close", "volume")}
+            self._stale_ticks["openinterest"] = float("NaN")
+
+    def _set_columns(self, bars):
+        self._dt = bars["datetime"]
+        self._open = bars["open"]
+        self._high = bars["high"]
+        self._low = bars["low"]
+        self._close = bars["close"]
+        self._volume = bars["volume"]
+
+    def _next_block(self, i):
+        """Copia as barras [i, i + block) e libera as páginas mapeadas"""
+        j = min(i + self.p.block, self._end)
+        self._set_columns({col: np.array(values[i:j])
+                           for col, values in self.p.bars.items() if col != "timestamp"})
+        self._block_start, self._block_end = i, j
+        for buffer in self._maps:
+            buffer.madvise(mmap.MADV_DONTNEED)
+
+    def preload(self):
+        """
+        Pré-carga em bloco: copia as fatias dos arrays direto para os
+        buffers das linhas (mesmo estado final do preload barra a barra).
+        Com filtros, fuso, fromdate/todate ou leitura em blocos cai no
+        preload do Backtrader.
+        """
+        if not self._bulk_preload():
+            return super().preload()
+        self._last()
+        self.home()
+
+    def _bulk_preload(self):
+        lines = self.lines
+        if (self.p.block or self._tzinput or self._filters or self._ffilters
+                or self._barstack or self._barstash
+                or self.fromdate != float("-inf") or self.todate != float("inf")
+                or any(line.bindings or len(line.array) for line in lines)):
+            return False
+
+        i, j = self._idx, self._end
+        columns = {
+            "datetime": self._dt, "open": self._open, "high": self._high,
+            "low": self._low, "close": self._close, "volume": self._volume,
+        }
+        for name, values in columns.items():
+            getattr(lines, name).array.frombytes(
+                np.ascontiguousarray(values[i:j], dtype=np.float64).tobytes())
+        lines.openinterest.array.frombytes(np.full(max(j - i, 0), np.nan).tobytes())
+        self._idx = max(i, j)
+        return True
+
+    # ------------------------------------------------------
+    # Ticks da última barra (stale_last). O broker lê data.tick_*: o
+    # Cerebro os preenche no advance() (runonce) e no _tick_fill(force)
+    # do next(); na barra do Resampler.last() nenhum dos dois acontece
+    # e ficam os da barra anterior
+    def _at_stale_bar(self):
+        return (self._stale_ticks is not None and self._idx >= self._end
+                and len(self) >= self.buflen())
+
+    def _set_stale_ticks(self):
+        for alias, value in self._stale_ticks.items():
+            setattr(self, "tick_" + alias, value)
+        self.tick_last = self._stale_ticks["close"]
+
+    def _tick_fill(self, force=False):
+        super()._tick_fill(force)
+        if self._at_stale_bar():
+            self._set_stale_ticks()
+
+    def advance(self, size=1, datamaster=None, ticks=True):
+        super().advance(size, datamaster, ticks)
+        if ticks and self._at_stale_bar():
+            self._set_stale_ticks()
+
+    def _load(self):
+        i = self._idx
+        if i >= self._end:
+            return False
+        if i >= self._block_end:
+            self._next_block(i)
+
+        self._idx = i + 1
+        k = i - self._block_start
+
+        lines = self.lines
+        lines.datetime[0] = self._dt.item(k)
+        lines.open[0] = self._open.item(k)
+        lines.high[0] = self._high.item(k)
+        lines.low[0] = self._low.item(k)
+        lines.close[0] = self._close.item(k)
+        lines.volume[0] = self._volume.item(k)
+        lines.openinterest[0] = float("NaN")
+
+        return True
+
+
+def _mapped_buffers(bars):
+    """mmap de cada coluna memory-mapped (vazio sem madvise, ex: Windows)"""
+    if not hasattr(mmap, "MADV_DONTNEED"):
+        return []
+    buffers = []
+    for values in bars.values():
+        base = values
+        while base is not None and not isinstance(base, mmap.mmap):
+            base = getattr(base, "base", None)
+        if base is not None and all(base is not b for b in buffers):
+            buffers.append(base)
+    return buffers
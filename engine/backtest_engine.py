@@ -3,13 +3,29 @@
 # Engine de backtest com análise de performance
 # ===================================================
 import os
+import sys
+import time
 from datetime import datetime
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
 import backtrader as bt
 import pandas as pd
 
-from engine.custom_analyzer import PerformanceAnalyzer
-from engine.trade_log_analyzer import TradeLogAnalyzer
+from engine.array_feed import ArrayData
+from engine.bar_store import BarStore, read_bars, read_resampled, slice_bounds
+from engine.custom_analyzer import EquityCurveAnalyzer, ResultAnalyzer
+from engine.data_index import DataIndex
+from engine.indicator_bank import IndicatorBank, IndicatorBankAnalyzer
+from engine.kill_rules import KillSwitch, normalize_kill_rules
+from engine.profiling import AnalyzerTimer, PhaseTimer, profiled
+from engine.resample_cache import flushed_last
+from engine.shared_cerebro import SharedCerebro
+from engine.tail_follow import TAIL_POLL, TailMonitor, TailReader
+from engine.trade_recorder import TRADE_FORMATS, trade_format
 
 
 # ==========================================================
@@ -24,6 +40,49 @@ class FuturesCommission(bt.CommInfoBase):
     )
 
 
+# ==========================================================
+# PERFIS DE EXECUÇÃO
+# ==========================================================
+# full   -> Cerebro padrão + todos os analyzers (diagnóstico de um run)
+# lean   -> sem observers (stdstats), preload + runonce e só os
+#           analyzers que o batch lê (padrão do BatchRunner)
+# lowmem -> memória limitada, ~constante no tamanho dos dados:
+#           - exactbars=1: cada linha (dados, resample, indicadores) é um
+#             buffer circular do tamanho do maior período que a usa
+#           - feed="store" lido em blocos de FEED_BLOCK barras (ArrayData)
+#           - métricas e drawdown como acumulados correntes e histórico de
+#             ordens/trades do Backtrader descartado (ResultAnalyzer bounded)
+#           O Backtrader desliga preload/runonce nesse modo (mais lento),
+#           então só compensa para arquivos grandes (anos de 1m)
+PROFILES = {
+    "full": {},
+    "lean": {"stdstats": False, "preload": True, "runonce": True},
+    "lowmem": {"stdstats": False, "exactbars": 1},
+}
+
+# Barras por bloco do feed memory-mapped no perfil lowmem
+FEED_BLOCK = 1 << 14
+
+
+def peak_rss_mb():
+    """Pico de memória residente do processo (MB) ou None se indisponível"""
+    # Linux: VmHWM é do processo atual. O ru_maxrss sobrevive ao
+    # fork + exec e herdaria o pico do processo pai (ex: quem gerou os dados)
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB, macOS em bytes
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
 # ==========================================================
 # BACKTEST ENGINE
 # ==========================================================
@@ -37,7 +96,56 @@ class BacktestEngine:
         initial_cash=100000,
         commission=1.24,
         strategy_params=None, 
+        feed="csv",
+        data_index=None,
+        kill_rules=None,
+        profile="full",
+        start=None,
+        end=None,
+        equity_curve=False,
+        indicator_bank=None,
+        timings=False,
     ):
+        """
+        feed: origem das barras
+            "csv"   -> bt.feeds.GenericCSVData lendo o texto (padrão)
+            "store" -> cache binário memory-mapped (engine/bar_store.py)
+            "array" -> texto parseado em bloco para arrays NumPy na memória
+                       do processo, sem cache em disco (bar_store.read_bars)
+
+        data_index: DataIndex já carregado (engine/data_index.py).
+            Se None, o índice é lido/validado do disco no run().
+
+        kill_rules: regras de parada antecipada (engine/kill_rules.py),
+            ex: {"max_dd_pct": 10, "timeout": 30}. Se alguma for violada o
+            Cerebro para e o resultado traz "pruned" com o motivo.
+
+        profile: "full" (padrão), "lean" ou "lowmem" (ver PROFILES)
+
+        start/end: fatia de datas [start, end) do arquivo (date, datetime
+            ou texto "2024-10-01"). Nos feeds "store"/"array" a fatia é um
+            recorte dos arrays já carregados (busca binária, sem reler o arquivo).
+
+        equity_curve: True -> resultado traz "equity_curve" (pd.Series com
+            o valor da conta ao fim de cada barra; cresce com os dados,
+            mesmo no perfil lowmem)
+
+        indicator_bank: indicadores pré-calculados em lote (engine/indicator_bank.py).
+            None desliga; True calcula sob demanda; dict {"sma": [10, 20, 50]}
+            (bank_requests) calcula o grid inteiro no primeiro uso e serve
+            as próximas execuções do processo. Só nos perfis full/lean
+
+        timings: True -> cronometra cada chamada dos analyzers e cada carga
+            de barra (fases "analyzers" e "feed" separadas do loop, com custo
+            por barra). False (padrão) mede só por fase: analyzers e carga
+            barra a barra (sem preload) contam em "strategy"
+        """
+        if profile not in PROFILES:
+            raise ValueError(f"Perfil inválido: {profile}")
+
+        if feed not in ("csv", "store", "array"):
+            raise ValueError(f"Feed inválido: {feed}")
+
         self.strategy = strategy
         self.datafile = datafile
         self.timeframe_minutes = timeframe_minutes
@@ -45,9 +153,20 @@ class BacktestEngine:
         self.commission = commission
 
         self.strategy_params = strategy_params or {} 
-        
+        self.feed = feed
+        self.data_index = data_index
+        self.kill_rules = normalize_kill_rules(kill_rules)
+        self.profile = profile
+        self.start = None if start is None else pd.Timestamp(start)
+        self.end = None if end is None else pd.Timestamp(end)
+        self.equity_curve = equity_curve
+        self.indicator_bank = indicator_bank
+        self.timings = timings
+
         self.cerebro = None
+        self.timer = PhaseTimer()
         self.data_info = {}
+        self._tail = None  # TailReader do run_tail()
 
     # ------------------------------------------------------
     def _print_header(self, title):
@@ -58,38 +177,26 @@ class BacktestEngine:
     # ------------------------------------------------------
     def _load_data_metadata(self):
         """
-        Leitura enxuta APENAS para:
+        Metadados via índice (engine/data_index.py), sem reler o arquivo:
         - data inicial
         - data final
         - timeframe real do arquivo (se necessário)
         """
+        if self.data_index is None:
+            self.data_index = DataIndex(self.datafile).ensure()
 
-        df = pd.read_csv(
-            self.datafile,
-            sep=";",
-            header=None,
-            usecols=[0],
-            names=["datetime"],
-        )
-
-        df["datetime"] = pd.to_datetime(
-            df["datetime"],
-            format="%Y%m%d %H%M%S",
-        )
+        start = self.data_index.start
+        end = self.data_index.end
 
-        start = df.iloc[0, 0]
-        end = df.iloc[-1, 0]
+        # Fatia de datas: período efetivo (limitado aos dados do arquivo)
+        if self.start is not None:
+            start = max(start, self.start)
+        if self.end is not None:
+            end = min(end, self.end - pd.Timedelta(minutes=1))
 
         # Auto-detecta TF SOMENTE se não vier da CLI
         if self.timeframe_minutes is None:
-            tf_seconds = int(
-                df["datetime"]
-                .diff()
-                .dropna()
-                .dt.total_seconds()
-                .mode()[0]
-            )
-            self.timeframe_minutes = tf_seconds // 60
+            self.timeframe_minutes = self.data_index.timeframe_minutes()
 
         self.data_info = {
             "inicio": start,
@@ -99,51 +206,172 @@ class BacktestEngine:
         }
 
     # ------------------------------------------------------
-    def _setup_cerebro(self):
+    def _make_base_feed(self):
+        """Feed 1m conforme a origem escolhida em `feed`"""
+        if self._tail is not None:
+            return self._csv_feed(self._tail)
+        if self.feed == "store":
+            return self._array_feed(BarStore(self.datafile).load(), 1)
+        if self.feed == "array":
+            return self._array_feed(read_bars(self.datafile), 1)
+        return self._csv_feed(self.datafile)
+
+    def _csv_feed(self, dataname):
+        """GenericCSVData do arquivo (ou de um objeto com readline(), ex: TailReader)"""
+        # Fatia de datas: todate do Backtrader é inclusivo
+        dates = {}
+        if self.start is not None:
+            dates["fromdate"] = self.start.to_pydatetime()
+        if self.end is not None:
+            dates["todate"] = (self.end - pd.Timedelta(seconds=1)).to_pydatetime()
+
+        # Sem caminho (stream) o Backtrader não deduz o nome do feed
+        name = "tail" if hasattr(dataname, "readline") else ""
+
+        return bt.feeds.GenericCSVData(
+            dataname=dataname,
+            name=name,
+            dtformat="%Y%m%d %H%M%S",
+            separator=";",
+            datetime=0,
+            open=1,
+            high=2,
+            low=3,
+            close=4,
+            volume=5,
+            openinterest=-1,
+            timeframe=bt.TimeFrame.Minutes,
+            compression=1,
+            headers=False,
+            **dates,
+        )
+
+    def _array_feed(self, bars, compression, stale_last=False):
+        """ArrayData sobre os arrays, recortado em [start, end) pelo timestamp"""
+        i0, i1 = slice_bounds(bars["timestamp"], self.start, self.end)
+        return ArrayData(
+            bars=bars,
+            start=i0,
+            end=i1,
+            block=self._feed_block(),
+            stale_last=stale_last,
+            timeframe=bt.TimeFrame.Minutes,
+            compression=compression,
+        )
+
+    def _feed_block(self):
+        """Leitura em blocos (páginas devolvidas) só no perfil lowmem"""
+        return FEED_BLOCK if self.profile == "lowmem" and self.feed == "store" else None
+
+    # ------------------------------------------------------
+    def _make_resampled_feed(self):
+        """
+        Feed já resampleado a partir do cache (feed="store") ou dos
+        arrays em memória (feed="array").
+        None -> usar cerebro.resampledata sobre o feed 1m.
+        """
+        if self._tail is not None:
+            return None
+
+        # Última barra entregue pelo Resampler.last(): ticks da anterior
+        tf = self.timeframe_minutes
+
+        if self.feed == "array":
+            timestamps = read_bars(self.datafile)["timestamp"]
+            if self.start is None and self.end is None:
+                bounds = (0, None)
+            else:
+                bounds = slice_bounds(timestamps, self.start, self.end)
+            bars = read_resampled(self.datafile, tf, *bounds)
+            if bars is None:
+                return None
+            return ArrayData(bars=bars, stale_last=flushed_last(timestamps[slice(*bounds)], tf),
+                             timeframe=bt.TimeFrame.Minutes, compression=tf)
+
+        if self.feed != "store":
+            return None
+
+        store = BarStore(self.datafile)
+        timestamps = store.load()["timestamp"]
+        if self.start is None and self.end is None:
+            bars = store.resampled(tf)
+            if bars is None:
+                return None
+            return self._array_feed(bars, tf, stale_last=flushed_last(timestamps, tf))
+
+        # Fatia de datas: resample das barras 1m do período
+        i0, i1 = slice_bounds(timestamps, self.start, self.end)
+        bars = store.resampled_slice(tf, i0, i1)
+        if bars is None:
+            return None
+        return ArrayData(
+            bars=bars,
+            block=self._feed_block(),
+            stale_last=flushed_last(timestamps[i0:i1], tf),
+            timeframe=bt.TimeFrame.Minutes,
+            compression=tf,
+        )
+
+    # ------------------------------------------------------
+    def _setup_cerebro(self, save_trades=False, param_sets=None):
         # ==========================================================
         # SETUP_CEREBRO
         # Configura o Cerebro com estratégia, dados e analyzers
+        # param_sets: várias combinações num Cerebro só (run_many)
         # ==========================================================
-        self.cerebro = bt.Cerebro()
+        profile = PROFILES[self.profile]
+        if self._tail is not None:
+            # Modo incremental: barra a barra, o feed só termina quando o
+            # arquivo para de crescer
+            profile = {**profile, "preload": False, "runonce": False}
+
+        if param_sets is None:
+            self.cerebro = bt.Cerebro(**profile)
+        else:
+            self.cerebro = SharedCerebro(**profile)
 
         # ----------------------------------------------------------
         # Estratégia
         # ----------------------------------------------------------
-        self.cerebro.addstrategy(self.strategy, **self.strategy_params)
+        if param_sets is None:
+            self.cerebro.addstrategy(self.strategy, **self.strategy_params)
+        else:
+            self.cerebro.addstrategies(
+                self.strategy,
+                [{**self.strategy_params, **params} for params in param_sets],
+            )
 
 
         # ----------------------------------------------------------
         # DATA FEED
         # CSV SEMPRE É 1m → resample se necessário
         # ----------------------------------------------------------
-        base_data = bt.feeds.GenericCSVData(
-            dataname=self.datafile,
-            dtformat="%Y%m%d %H%M%S",
-            separator=";",
-            datetime=0,
-            open=1,
-            high=2,
-            low=3,
-            close=4,
-            volume=5,
-            openinterest=-1,
-            timeframe=bt.TimeFrame.Minutes,
-            compression=1,
-            header=False,
-        )
 
         # 👉 CASO 1: TIMEFRAME 1m
         if self.timeframe_minutes == 1:
-            self.cerebro.adddata(base_data, name="1m")
+            self.cerebro.adddata(self._make_base_feed(), name="1m")
 
         # 👉 CASO 2: TIMEFRAME > 1m (USAR APENAS O RESAMPLED)
         else:
-            resampled = self.cerebro.resampledata(
-                base_data,
-                timeframe=bt.TimeFrame.Minutes,
-                compression=self.timeframe_minutes,
-                name=f"{self.timeframe_minutes}m",
-            )
+            with self.timer.phase("resample"):
+                resampled = self._make_resampled_feed()
+
+            if resampled is not None:
+                self.cerebro.adddata(resampled, name=f"{self.timeframe_minutes}m")
+            else:
+                resampled = self.cerebro.resampledata(
+                    self._make_base_feed(),
+                    timeframe=bt.TimeFrame.Minutes,
+                    compression=self.timeframe_minutes,
+                    name=f"{self.timeframe_minutes}m",
+                )
+
+        # Carga das barras cronometrada como fase "feed" (o preload é uma
+        # chamada só; o load barra a barra só com timings)
+        for data in self.cerebro.datas:
+            data.preload = self.timer.wrap("feed", data.preload)
+            if self.timings:
+                data.load = self.timer.wrap("feed", data.load)
 
         # ----------------------------------------------------------
         # Broker
@@ -157,16 +385,152 @@ class BacktestEngine:
         # --------------------------------------------------
         # Analyzers
         # --------------------------------------------------
-        self.cerebro.addanalyzer(PerformanceAnalyzer, _name="perf")
-        self.cerebro.addanalyzer(TradeLogAnalyzer, _name="tradelog")
-        self.cerebro.addanalyzer(bt.analyzers.DrawDown, _name="dd")
+        # Primeiro: cronometra os demais (fase "analyzers"), só com timings
+        if self.timings:
+            self.cerebro.addanalyzer(AnalyzerTimer, _name="timer", timer=self.timer)
+        # Métricas, drawdown e log de trades num analyzer só (custom_analyzer.py)
+        self.cerebro.addanalyzer(ResultAnalyzer, _name="result",
+                                 trade_log=self.profile == "full" or bool(save_trades),
+                                 bounded=self.profile == "lowmem" or self._tail is not None)
+        if self.kill_rules:
+            self.cerebro.addanalyzer(KillSwitch, _name="kill", **self.kill_rules)
+        if self.equity_curve:
+            self.cerebro.addanalyzer(EquityCurveAnalyzer, _name="equity")
+        if self.indicator_bank not in (None, False):
+            self.cerebro.addanalyzer(IndicatorBankAnalyzer, _name="bank",
+                                     bank=self._indicator_bank())
         #self.cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name="trades")
 
 
     # ------------------------------------------------------
-    def run(self, verbose=True, save_trades=False):
+    def _indicator_bank(self):
+        """Banco da origem das barras (arquivo + versão, timeframe e fatia)"""
+        st = os.stat(self.datafile)
+        source = (os.path.abspath(self.datafile), st.st_size, st.st_mtime_ns,
+                  self.timeframe_minutes, self.start, self.end)
+        requests = self.indicator_bank if isinstance(self.indicator_bank, dict) else None
+        return IndicatorBank(source, requests)
+
+    # ------------------------------------------------------
+    def run_many(self, param_sets, profiling=None, trade_log=False):
+        """
+        Roda várias combinações num Cerebro só (engine/shared_cerebro.py):
+        dados e resample carregados uma vez, indicadores iguais calculados
+        uma vez. Cada combinação tem broker próprio; as métricas são as
+        mesmas de um run() isolado.
+
+        Args:
+            param_sets: lista de dicts de params (somados a strategy_params),
+                todos no timeframe deste engine
+
+            profiling: como em run() (perfila o chunk inteiro)
+
+            trade_log: True -> "trades" de cada combinação com o log
+                (TradeRecorder); sem gravar nada
+
+        Returns:
+            lista de dicts no formato de run(), na ordem de param_sets.
+            Fases comuns (metadata, setup, feed...) entram nos tempos da
+            primeira combinação; a soma das linhas é o tempo real do chunk.
+        """
+        if profiling:
+            with profiled(**profiling, header=self._profile_header(param_sets)):
+                return self._run_many(param_sets, trade_log)
+        return self._run_many(param_sets, trade_log)
+
+    def _run_many(self, param_sets, trade_log=False):
+        start_exec = datetime.now()
+        self.timer = timer = PhaseTimer()
+        t0 = time.perf_counter()
+
+        with timer.phase("metadata"):
+            self._load_data_metadata()
+        with timer.phase("setup"):
+            self._setup_cerebro(save_trades=trade_log, param_sets=param_sets)
+
+        equity_start = self.cerebro.broker.getvalue()
+        results = []
+        last = dict.fromkeys(timer.timings, 0.0)
+        last_t = t0
+
+        def on_result(strat, seconds):
+            nonlocal last, last_t
+            result = self._collect(strat, equity_start, seconds, start_exec)
+
+            # Tempos desde a combinação anterior
+            now, current = time.perf_counter(), timer.flush()
+            result["timings"] = {k: current[k] - last[k] for k in current}
+            result["timings"]["total"] = now - last_t
+            last, last_t = current, now
+            results.append(result)
+
+        self.cerebro.on_result = on_result
+        with timer.phase("strategy"):
+            self.cerebro.run()
+        return results
+
+    def _profile_header(self, param_sets=None):
+        """Cabeçalho do resumo de profiling (o que foi perfilado)"""
+        header = (f"{self.strategy.__name__} | {os.path.basename(self.datafile)}"
+                  f" | timeframe {self.timeframe_minutes} | perfil {self.profile}")
+        if param_sets is None:
+            return f"{header}\nparams: {self.strategy_params}"
+        return header + "".join(f"\nparams: {{**{self.strategy_params}, **{p}}}"
+                                for p in param_sets)
+
+    def _collect(self, strat, equity_start, seconds, start_exec):
+        """Dict de resultados de uma estratégia recém-executada"""
+        analysis = strat.analyzers.result.get_analysis()
+
+        bars = len(strat.data)
+        pruned = None
+        if self.kill_rules:
+            pruned = strat.analyzers.kill.get_analysis()["reason"]
+
+        result = {
+            "equity_start": equity_start,
+            "equity_end": self.cerebro.broker.getvalue(),
+            "metrics": analysis["metrics"],
+            "data_info": self.data_info,
+            "trades": analysis["trades"],
+            "max_dd_pct": analysis["max_dd_pct"],
+            "max_dd_cash": analysis["max_dd_cash"],
+            "pruned": pruned,
+            "bars": bars,
+            "bars_per_sec": bars / seconds if seconds > 0 else float("inf"),
+            "exec_time": datetime.now() - start_exec,
+        }
+        if self.equity_curve:
+            result["equity_curve"] = strat.analyzers.equity.get_analysis()
+        return result
+
+    # ------------------------------------------------------
+    def run(self, verbose=True, save_trades=False, profiling=None, trade_log=False):
+        """
+        Roda o backtest.
+
+        save_trades: False, True (CSV) ou formato do log de trades
+            ("csv", "parquet", "feather", "npz") -> results/trades_<ts>.<ext>
+            (engine/trade_recorder.py)
+
+        trade_log: True -> "trades" do resultado com o log mesmo sem gravar
+            (quem chamou decide onde exportar)
 
+        profiling: None ou dict para profiled() (engine/profiling.py), ex:
+            {"path": "results/prof/run1", "cprofile": True, "trace_memory": True}
+            -> grava run1.prof / run1.mem / run1.txt
+        """
+        if profiling:
+            with profiled(**profiling, header=self._profile_header()):
+                return self._run(verbose, save_trades, trade_log)
+        return self._run(verbose, save_trades, trade_log)
+
+    def _run(self, verbose, save_trades, trade_log=False):
+
+        fmt = trade_format(save_trades)
         start_exec = datetime.now()
+        self.timer = timer = PhaseTimer()
+        t0 = time.perf_counter()
 
         if verbose:
             os.system("cls" if os.name == "nt" else "clear")
@@ -174,7 +538,8 @@ class BacktestEngine:
             print(f"Início: {start_exec.strftime('%Y-%m-%d %H:%M:%S')}\n")
 
         # Metadata
-        self._load_data_metadata()
+        with timer.phase("metadata"):
+            self._load_data_metadata()
 
         if verbose:
             self._print_header("Dados")
@@ -185,23 +550,35 @@ class BacktestEngine:
             print(f"Duração     : {self.data_info['dias']} dias")
 
         # Setup Cerebro
-        self._setup_cerebro()
+        with timer.phase("setup"):
+            self._setup_cerebro(save_trades=save_trades or trade_log)
 
         if verbose:
             self._print_header("Rodando Estratégia")
 
         equity_start = self.cerebro.broker.getvalue()
-        results = self.cerebro.run()
+        t_run = time.perf_counter()
+        with timer.phase("strategy"):
+            results = self.cerebro.run()
+        run_seconds = time.perf_counter() - t_run
         equity_end = self.cerebro.broker.getvalue()
 
         strat = results[0]
-        perf = strat.analyzers.perf.get_analysis()
+        analysis = strat.analyzers.result.get_analysis()
+        perf = analysis["metrics"]
 
         # Drawdown
-        dd = strat.analyzers.dd.get_analysis()
-        max_dd_pct = dd.max.drawdown
-        max_dd_cash = dd.max.moneydown
+        max_dd_pct = analysis["max_dd_pct"]
+        max_dd_cash = analysis["max_dd_cash"]
 
+        # Throughput: barras processadas por segundo de cerebro.run()
+        bars = len(strat.data)
+        bars_per_sec = bars / run_seconds if run_seconds > 0 else float("inf")
+
+        # Parada antecipada
+        pruned = None
+        if self.kill_rules:
+            pruned = strat.analyzers.kill.get_analysis()["reason"]
 
         # --------------------------------------------------
         # RESULTADOS    
@@ -217,23 +594,27 @@ class BacktestEngine:
             print(f"Trades perdidos: {perf.get('losses', 0)}")
             print(f"Max Drawdown % : {max_dd_pct:.2f}%")
             print(f"Max Drawdown $ : {max_dd_cash:,.2f}")
+            if pruned:
+                print(f"⛔ Interrompido  : {pruned}")
+            print(f"Barras/seg     : {bars_per_sec:,.0f} ({self.profile})")
         # ===================================================
 
         # --------------------------------------------------
         # TRADES (OPCIONAL)
         # --------------------------------------------------
-        trade_log = []
-
-        if save_trades:
-            trade_log = strat.analyzers.tradelog.get_analysis()
+        trade_log = analysis["trades"]
 
-            os.makedirs("results", exist_ok=True)
-            ts = start_exec.strftime("%Y%m%d_%H%M%S")
+        if fmt:
+            with timer.phase("output"):
+                ts = start_exec.strftime("%Y%m%d_%H%M%S")
+                trade_log.export(f"results/trades_{ts}{TRADE_FORMATS[fmt]}", fmt)
 
-            df_trades = pd.DataFrame(trade_log)
-            df_trades.to_csv(f"results/trades_{ts}.csv", index=False)
+        timings = {**timer.timings, "total": time.perf_counter() - t0}
+        if verbose:
+            print("Tempos (s)     : " + " | ".join(
+                f"{phase} {seconds:.3f}" for phase, seconds in timings.items()))
 
-        return {
+        result = {
             "equity_start": equity_start,
             "equity_end": equity_end,
             "metrics": perf,
@@ -241,5 +622,108 @@ class BacktestEngine:
             "trades": trade_log,
             "max_dd_pct": max_dd_pct,
             "max_dd_cash": max_dd_cash,
+            "pruned": pruned,
+            "bars": bars,
+            "bars_per_sec": bars_per_sec,
+            "timings": timings,
             "exec_time": datetime.now() - start_exec,
         }
+        if self.equity_curve:
+            result["equity_curve"] = strat.analyzers.equity.get_analysis()
+        return result
+
+    # ------------------------------------------------------
+    def run_tail(self, source=None, on_bar=None, poll=TAIL_POLL, idle_timeout=None,
+                 stop=None, verbose=True):
+        """
+        Modo incremental (engine/tail_follow.py): o Cerebro e a estratégia
+        ficam vivos seguindo o arquivo de dados. O histórico é processado
+        uma vez e depois só as barras acrescentadas ao arquivo, cada uma
+        assim que sua linha chega, com métricas, drawdown e log de trades
+        atualizados a cada barra.
+
+        O feed é o mesmo GenericCSVData do feed="csv" (com resample do
+        Backtrader acima de 1m) e o Cerebro roda barra a barra: ao fim,
+        o resultado é o mesmo de um run() sobre o arquivo final. Acima de
+        1m a barra em formação só é entregue quando fecha (ou no fim).
+
+        Args:
+            source: None (segue `datafile`) ou objeto com readline() (pipe,
+                socket.makefile(), sys.stdin); no stream timeframe_minutes
+                é obrigatório
+            on_bar: função chamada a cada barra nova com o relatório do
+                TailMonitor (latência, equity, métricas, trades novos).
+                None com verbose -> uma linha impressa por barra
+            poll: intervalo (s) entre verificações do arquivo parado
+            idle_timeout: encerra após N s sem linhas novas (None: até `stop`)
+            stop: threading.Event (ou função) que encerra o acompanhamento
+
+        Returns:
+            dict no formato de run() (métricas até a última barra, "trades"
+            com o log completo) + "new_bars" e "latency" ({"mean", "p50",
+            "p95", "max"} em segundos por barra nova)
+        """
+        start_exec = datetime.now()
+        self.timer = timer = PhaseTimer()
+        t0 = time.perf_counter()
+
+        if source is None:
+            with timer.phase("metadata"):
+                self._load_data_metadata()
+        elif self.timeframe_minutes is None:
+            raise ValueError("Stream sem arquivo: informe timeframe_minutes")
+
+        if on_bar is None and verbose:
+            on_bar = _print_tail_bar
+
+        reader = TailReader(self.datafile if source is None else source,
+                            poll=poll, idle_timeout=idle_timeout, stop=stop)
+        self._tail = reader
+        try:
+            with timer.phase("setup"):
+                self._setup_cerebro(save_trades=True)
+                # Último analyzer: vê a barra já contada pelos demais
+                self.cerebro.addanalyzer(TailMonitor, _name="tail", reader=reader, on_bar=on_bar)
+
+            if verbose:
+                self._print_header(f"Seguindo {os.path.basename(str(self.datafile))}")
+
+            equity_start = self.cerebro.broker.getvalue()
+            t_run = time.perf_counter()
+            with timer.phase("strategy"):
+                results = self.cerebro.run()
+            run_seconds = time.perf_counter() - t_run
+        finally:
+            self._tail = None
+            reader.close()
+
+        strat = results[0]
+        result = self._collect(strat, equity_start, run_seconds, start_exec)
+        tail = strat.analyzers.tail.get_analysis()
+        result["new_bars"] = tail["bars"]
+        result["latency"] = tail["latency"]
+        result["timings"] = {**timer.timings, "total": time.perf_counter() - t0}
+
+        if verbose:
+            perf, latency = result["metrics"], result["latency"]
+            self._print_header("Resultados")
+            print(f"Barras novas   : {result['new_bars']} (de {result['bars']})")
+            print(f"Equity final   : {result['equity_end']:,.2f}")
+            print(f"Trades totais  : {perf.get('trades', 0)}")
+            print(f"Max Drawdown % : {result['max_dd_pct']:.2f}%")
+            if latency:
+                print(f"Latência (ms)  : p50 {latency['p50'] * 1e3:.2f} | "
+                      f"p95 {latency['p95'] * 1e3:.2f} | máx {latency['max'] * 1e3:.2f}")
+        return result
+
+
+def _print_tail_bar(report):
+    """Uma linha por barra nova (on_bar padrão do run_tail verbose)"""
+    perf = report["metrics"]
+    print(f"🕯️ {report['datetime']} | {report['latency'] * 1e3:.2f} ms"
+          f" | equity {report['equity']:,.2f} | trades {perf.get('trades', 0)}"
+          f" | DD {report['max_dd_pct']:.2f}%")
+    for trade in report["new_trades"]:
+        print(f"   💰 trade fechado: {trade['direction']:+d} x{trade['size']:g}"
+              f" {trade['entry_price']:.2f} -> {trade['exit_price']:.2f}"
+              f" | PnL {trade['pnl_comm']:,.2f}")
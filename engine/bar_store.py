@@ -0,0 +1,359 @@
+# ===================================================
+# bar_store.py
+# Cache binário (colunar, memory-mapped) do arquivo de dados
+# ===================================================
+import os
+import json
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from engine.array_feed import BAR_COLUMNS, timestamps_to_num
+from engine.data_index import DT_WIDTH, cache_basename, parse_timestamps
+from engine.memo import LRUMemo
+from engine.resample_cache import resample_bars
+
+
+STORE_VERSION = 2
+
+# Memo por processo: (fingerprint, timeframe) -> arrays carregados. Limitado
+# (LRU): barras em memória (feed="array", fatias do walk-forward) não se
+# acumulam por arquivo/timeframe/janela
+LOADED_MAX = 16
+_LOADED = LRUMemo(LOADED_MAX)
+
+# Memo por processo: fingerprint -> índice de dias
+_DAYS = {}
+
+
+def file_fingerprint(datafile, content_hash=True):
+    """
+    Identidade do arquivo de dados: path, tamanho, mtime e hash do conteúdo.
+    """
+    path = os.path.abspath(datafile)
+    st = os.stat(path)
+    fp = {
+        "path": path,
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+    }
+    if content_hash:
+        fp["sha1"] = hash_file(path)
+    return fp
+
+
+def hash_file(path, chunk_size=1 << 20):
+    """SHA-1 do conteúdo do arquivo (lido em blocos)"""
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def to_seconds(value):
+    """Data/datetime/texto ("2024-10-01", "2024-10-01 09:30") -> segundos desde 1970"""
+    return int(pd.Timestamp(value).value // 10 ** 9)
+
+
+def slice_bounds(timestamps, start=None, end=None):
+    """
+    Fatia [i0, i1) das barras com start <= timestamp < end (busca binária
+    no array de timestamps, sem reler nada). None = sem limite.
+    """
+    i0 = 0 if start is None else int(np.searchsorted(timestamps, to_seconds(start), "left"))
+    i1 = len(timestamps) if end is None else int(np.searchsorted(timestamps, to_seconds(end), "left"))
+    return i0, max(i0, i1)
+
+
+def fixed_timestamps(texts):
+    """
+    Textos "YYYYMMDD HHMMSS" -> segundos desde 1970 (int64) por aritmética
+    inteira sobre os bytes (data_index.parse_timestamps), sem strptime.
+
+    Returns:
+        array int64, ou None se algum texto fugir do layout fixo
+    """
+    raw = np.asarray(texts).astype(f"S{DT_WIDTH + 1}")
+    fields = raw.view(np.uint8).reshape(len(raw), DT_WIDTH + 1)
+    digits = np.delete(fields[:, :DT_WIDTH], 8, axis=1)
+    if (fields[:, DT_WIDTH].any() or (fields[:, 8] != ord(" ")).any()
+            or ((digits < ord("0")) | (digits > ord("9"))).any()):
+        return None
+    return parse_timestamps(fields[:, :DT_WIDTH])
+
+
+def parse_datafile(datafile):
+    """
+    Lê o arquivo texto (YYYYMMDD HHMMSS;open;high;low;close;volume)
+    inteiro de uma vez e devolve as colunas como arrays.
+
+    Leitor C do pandas (floats com round_trip: os mesmos do float() do
+    GenericCSVData) e datas pelo layout fixo; pd.to_datetime só se o
+    arquivo fugir do layout.
+    """
+    df = pd.read_csv(
+        datafile,
+        sep=";",
+        header=None,
+        names=["datetime", "open", "high", "low", "close", "volume"],
+        dtype={"datetime": str, "open": np.float64, "high": np.float64,
+               "low": np.float64, "close": np.float64, "volume": np.float64},
+        float_precision="round_trip",
+    )
+
+    timestamps = fixed_timestamps(df["datetime"].to_numpy())
+    if timestamps is None:
+        dt = pd.to_datetime(df["datetime"], format="%Y%m%d %H%M%S")
+        timestamps = dt.to_numpy(dtype="datetime64[s]").astype(np.int64)
+
+    bars = {
+        "timestamp": timestamps,
+        "datetime": timestamps_to_num(timestamps),
+    }
+    for col in ("open", "high", "low", "close", "volume"):
+        bars[col] = df[col].to_numpy(dtype=np.float64)
+
+    return bars
+
+
+def read_bars(datafile):
+    """
+    Barras do arquivo texto parseadas em memória, sem cache em disco
+    (feed="array"). Parseado uma vez por processo enquanto tamanho e
+    mtime não mudarem.
+    """
+    st = os.stat(datafile)
+    key = ("array", os.path.abspath(datafile), st.st_size, st.st_mtime_ns)
+    if key not in _LOADED:
+        _LOADED[key] = parse_datafile(datafile)
+    return _LOADED[key]
+
+
+def read_resampled(datafile, compression, start=0, end=None):
+    """
+    Resample em memória das barras 1m [start, end) de read_bars
+    (feed="array"), uma vez por processo.
+
+    Returns:
+        dict coluna -> array, ou None (usar cerebro.resampledata)
+    """
+    bars_1m = read_bars(datafile)
+    st = os.stat(datafile)
+    key = ("array", os.path.abspath(datafile), st.st_size, st.st_mtime_ns,
+           compression, start, end)
+    if key not in _LOADED:
+        if start == 0 and end is None:
+            bars = bars_1m
+        else:
+            bars = {col: values[start:end] for col, values in bars_1m.items()}
+        _LOADED[key] = resample_bars(bars, compression)
+    return _LOADED[key]
+
+
+# ==========================================================
+# BAR STORE
+# ==========================================================
+class BarStore:
+    """
+    Converte o arquivo texto UMA vez para arrays .npy (um por coluna)
+    e depois serve as barras via memory-map.
+
+    Também guarda as séries resampleadas (uma por timeframe).
+
+    O cache fica em <pasta do arquivo>/.bar_cache/<nome>_<hash do path>/
+    e se invalida sozinho: tamanho e mtime iguais -> válido; se mudaram,
+    o hash do conteúdo decide (arquivo apenas "tocado" continua válido).
+
+    Vários processos que abrem o mesmo cache compartilham as páginas
+    mapeadas (sem cópia).
+    """
+
+    def __init__(self, datafile, cache_dir=None):
+        self.datafile = os.path.abspath(datafile)
+        self.path = cache_basename(self.datafile, cache_dir)
+        self.meta_file = os.path.join(self.path, "meta.json")
+
+    # ------------------------------------------------------
+    def _read_meta(self):
+        try:
+            with open(self.meta_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, meta, meta_file=None):
+        meta_file = meta_file or self.meta_file
+        tmp = f"{meta_file}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp, meta_file)
+
+    @staticmethod
+    def _save_arrays(path, bars):
+        os.makedirs(path, exist_ok=True)
+        suffix = f".{os.getpid()}.tmp.npy"
+        for col in BAR_COLUMNS:
+            tmp = os.path.join(path, col + suffix)
+            np.save(tmp, bars[col])
+            os.replace(tmp, os.path.join(path, col + ".npy"))
+
+    @staticmethod
+    def _load_arrays(path, mmap):
+        mode = "r" if mmap else None
+        return {
+            col: np.load(os.path.join(path, col + ".npy"), mmap_mode=mode)
+            for col in BAR_COLUMNS
+        }
+
+    # ------------------------------------------------------
+    def is_valid(self):
+        """True se o cache existe e corresponde ao arquivo atual"""
+        meta = self._read_meta()
+        if meta is None or meta.get("version") != STORE_VERSION:
+            return False
+
+        fp = meta["fingerprint"]
+        st = os.stat(self.datafile)
+        if st.st_size != fp["size"]:
+            return False
+
+        if st.st_mtime_ns == fp["mtime_ns"]:
+            return True
+
+        # mtime mudou: confere o conteúdo antes de descartar
+        if hash_file(self.datafile) != fp["sha1"]:
+            return False
+
+        meta["fingerprint"]["mtime_ns"] = st.st_mtime_ns
+        self._write_meta(meta)
+        return True
+
+    def fingerprint(self):
+        """Fingerprint do arquivo (lido do cache, construindo se preciso)"""
+        self.ensure()
+        return self._read_meta()["fingerprint"]
+
+    # ------------------------------------------------------
+    def build(self):
+        """(Re)constrói o cache a partir do arquivo texto"""
+        fp = file_fingerprint(self.datafile)
+        bars = parse_datafile(self.datafile)
+
+        self._save_arrays(self.path, bars)
+
+        # meta.json por último: só então o cache passa a ser válido
+        self._write_meta({
+            "version": STORE_VERSION,
+            "fingerprint": fp,
+            "rows": int(len(bars["datetime"])),
+            "columns": list(BAR_COLUMNS),
+        })
+
+    def ensure(self):
+        """Garante que o cache está válido (constrói se necessário)"""
+        if not self.is_valid():
+            self.build()
+        return self
+
+    # ------------------------------------------------------
+    def load(self, mmap=True):
+        """
+        Retorna dict coluna -> array (memory-mapped por padrão).
+        Dentro do mesmo processo o resultado é reaproveitado.
+        """
+        self.ensure()
+
+        fp = self._read_meta()["fingerprint"]
+        key = (fp["path"], fp["size"], fp["sha1"], 1, mmap)
+        if key in _LOADED:
+            return _LOADED[key]
+
+        bars = self._load_arrays(self.path, mmap)
+
+        _LOADED[key] = bars
+        return bars
+
+    # ------------------------------------------------------
+    def day_index(self):
+        """
+        Índice de dias do arquivo (calculado uma vez por processo):
+
+        Returns:
+            (days, offsets): datas (datetime64[D]) que têm barras e a
+            posição da primeira barra 1m de cada uma
+        """
+        bars = self.load()
+        fp = self._read_meta()["fingerprint"]
+        key = (fp["path"], fp["size"], fp["sha1"])
+        if key not in _DAYS:
+            day_numbers, offsets = np.unique(np.asarray(bars["timestamp"]) // 86400,
+                                             return_index=True)
+            _DAYS[key] = (day_numbers.astype("datetime64[D]"), offsets)
+        return _DAYS[key]
+
+    # ------------------------------------------------------
+    def resampled_slice(self, compression, start, end):
+        """
+        Barras resampleadas só das barras 1m [start, end) (índices).
+        Refeito sobre o recorte (e não recortado do resampled) para que
+        as barras das pontas sejam as mesmas de um arquivo só com aquele
+        período. Guardado na memória do processo (não vai para o disco).
+
+        Returns:
+            dict coluna -> array, ou None (usar cerebro.resampledata)
+        """
+        bars_1m = self.load()
+        fp = self._read_meta()["fingerprint"]
+        key = (fp["path"], fp["size"], fp["sha1"], compression, start, end)
+        if key not in _LOADED:
+            _LOADED[key] = resample_bars({col: bars_1m[col][start:end] for col in bars_1m},
+                                         compression)
+        return _LOADED[key]
+
+    # ------------------------------------------------------
+    def resampled(self, compression, mmap=True):
+        """
+        Barras resampleadas para `compression` minutos.
+
+        Calculadas UMA vez por timeframe (engine/resample_cache.py) e
+        guardadas em <cache>/tf_<N>m/, válidas enquanto o cache 1m for.
+
+        Returns:
+            dict coluna -> array, ou None se os dados exigirem o resampler
+            original do Backtrader (usar cerebro.resampledata)
+        """
+        if compression == 1:
+            return self.load(mmap=mmap)
+
+        bars_1m = self.load(mmap=mmap)
+        fp = self._read_meta()["fingerprint"]
+        key = (fp["path"], fp["size"], fp["sha1"], compression, mmap)
+        if key in _LOADED:
+            return _LOADED[key]
+
+        path = os.path.join(self.path, f"tf_{compression}m")
+        meta_file = os.path.join(path, "meta.json")
+        try:
+            with open(meta_file, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            meta = None
+
+        if meta is None or meta.get("version") != STORE_VERSION or meta.get("sha1") != fp["sha1"]:
+            bars = resample_bars(bars_1m, compression)
+            os.makedirs(path, exist_ok=True)
+            if bars is not None:
+                self._save_arrays(path, bars)
+            meta = {
+                "version": STORE_VERSION,
+                "sha1": fp["sha1"],
+                "supported": bars is not None,
+            }
+            self._write_meta(meta, meta_file)
+
+        bars = self._load_arrays(path, mmap) if meta["supported"] else None
+
+        _LOADED[key] = bars
+        return bars
@@ -3,10 +3,277 @@
 # Motor genérico para batch de otimização
 # ===================================================
 
+import os
+import glob
+import random
 import pandas as pd
-from itertools import product
 from datetime import datetime
-from engine.backtest_engine import BacktestEngine
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from engine.backtest_engine import BacktestEngine, peak_rss_mb
+from engine.bar_store import BarStore
+from engine.data_index import DataIndex
+from engine.indicator_bank import bank_requests
+from engine.kill_rules import normalize_kill_rules
+from engine.profiling import normalize_profiling, wants_profile
+from engine.result_cache import ResultCache
+from engine.results_db import lower_is_better
+from engine.robustness import combo_seeds, monte_carlo, robustness_columns
+from engine.result_sink import (
+    RESULT_COLUMNS, TIMING_COLUMNS, ResultSink, TopK, open_sink, top_k_from_chunks,
+)
+from engine.search import SEARCH_BATCH, make_sampler
+from engine.trade_recorder import TRADE_FORMATS, trade_format, trade_log_name
+from engine.vector_engine import VectorEngine, cross_check
+
+
+# Combinações avaliadas por chamada do VectorEngine (limita a memória)
+VECTOR_CHUNK = 10000
+
+# Colunas que medem a execução (não vão para o cache de resultados)
+RUN_STATS = ("Bars/s", *TIMING_COLUMNS.values())
+
+# Pseudo-parâmetro da combinação com o arquivo de dados (como "timeframe":
+# sai dos params da estratégia). Vira coluna do resultado com vários arquivos
+FILE_PARAM = "datafile"
+
+
+def resolve_datafiles(datafile):
+    """
+    Normaliza `datafile`: path, glob ("data/MNQ*.txt") ou lista de
+    paths/globs -> lista de arquivos, sem repetição (glob em ordem alfabética)
+    """
+    patterns = [datafile] if isinstance(datafile, (str, os.PathLike)) else list(datafile)
+    files = []
+    for pattern in map(os.fspath, patterns):
+        if any(c in pattern for c in "*?["):
+            matches = sorted(glob.glob(pattern))
+            if not matches:
+                raise FileNotFoundError(f"Nenhum arquivo de dados para: {pattern}")
+            files.extend(matches)
+        else:
+            files.append(pattern)
+    if not files:
+        raise ValueError("Nenhum arquivo de dados")
+    return list(dict.fromkeys(files))
+
+
+# ===================================================
+# EXECUÇÃO DE UMA COMBINAÇÃO
+# (nível de módulo para poder ser enviada aos processos do pool)
+# ===================================================
+def _run_combo(job, combo, profiling=None):
+    """
+    Roda o backtest de UMA combinação e devolve a linha de resultados.
+
+    job: dict com o que é comum a todo o batch (ver BatchRunner._make_job)
+    profiling: None ou dict de engine/profiling.profiled (cProfile/tracemalloc)
+    """
+    engine, timeframe = _combo_engine(job, combo)
+
+    result = engine.run(verbose=False, save_trades=False, profiling=profiling,
+                        trade_log=bool(job.get("trades_format")))
+    _save_trade_log(job, combo, result)
+
+    # Coleta métricas
+    return _build_row(combo, timeframe, result)
+
+
+def _save_trade_log(job, combo, result):
+    """Grava o log de trades da combinação (se o batch pediu), ainda no worker"""
+    fmt = job.get("trades_format")
+    if not fmt:
+        return
+    name = trade_log_name(combo) + TRADE_FORMATS[fmt]
+    result["trades"].export(os.path.join(job["trades_dir"], name), fmt)
+
+
+def _combo_engine(job, combo):
+    """BacktestEngine de UMA combinação: (engine, timeframe)"""
+    # Merge fixed + variable params
+    all_params = {**job["fixed_params"], **combo}
+
+    # Separa arquivo e timeframe dos strategy_params
+    datafile = all_params.pop(FILE_PARAM, job["datafile"])
+    timeframe = all_params.pop("timeframe", job["base_timeframe"])
+
+    engine = BacktestEngine(
+        strategy=job["strategy_class"],
+        datafile=datafile,
+        timeframe_minutes=timeframe,
+        initial_cash=job["initial_cash"],
+        commission=job["commission"],
+        strategy_params=all_params,
+        feed=job["feed"],
+        data_index=job["data_index"].get(datafile),
+        kill_rules=job["kill_rules"],
+        profile=job["profile"],
+        start=job["start"],
+        end=job["end"],
+        equity_curve=job.get("equity_curve", False),
+        indicator_bank=job.get("indicator_bank"),
+        timings=job.get("timings", False),
+    )
+    return engine, timeframe
+
+
+def _run_chunk(job, combos, profiling=None):
+    """
+    Roda várias combinações do MESMO arquivo e timeframe num Cerebro só
+    (BacktestEngine.run_many): dados carregados e indicadores iguais
+    calculados uma vez. Devolve as linhas na ordem de `combos`.
+    """
+    if len(combos) == 1:
+        return [_run_combo(job, combos[0], profiling)]
+
+    fixed = dict(job["fixed_params"])
+    first = {**fixed, **combos[0]}
+    datafile = first.get(FILE_PARAM, job["datafile"])
+    timeframe = first.get("timeframe", job["base_timeframe"])
+    fixed.pop(FILE_PARAM, None)
+    fixed.pop("timeframe", None)
+
+    engine = BacktestEngine(
+        strategy=job["strategy_class"],
+        datafile=datafile,
+        timeframe_minutes=timeframe,
+        initial_cash=job["initial_cash"],
+        commission=job["commission"],
+        strategy_params=fixed,
+        feed=job["feed"],
+        data_index=job["data_index"].get(datafile),
+        kill_rules=job["kill_rules"],
+        profile=job["profile"],
+        start=job["start"],
+        end=job["end"],
+        equity_curve=job.get("equity_curve", False),
+        indicator_bank=job.get("indicator_bank"),
+        timings=job.get("timings", False),
+    )
+
+    param_sets = [{k: v for k, v in combo.items() if k not in ("timeframe", FILE_PARAM)}
+                  for combo in combos]
+    results = engine.run_many(param_sets, profiling=profiling,
+                              trade_log=bool(job.get("trades_format")))
+
+    rows = []
+    for combo, result in zip(combos, results):
+        _save_trade_log(job, combo, result)
+        rows.append(_build_row(combo, timeframe, result))
+    return rows
+
+
+def _build_row(combo, timeframe, result):
+    """
+    Linha de resultados a partir do dict retornado pelo engine.
+    Combinação podada (kill rules): métricas parciais, Equity Final NaN
+    (fica fora dos rankings) e o motivo em "Pruned".
+    """
+    row = {
+        **combo,  # Parâmetros testados
+        "Timeframe": f"{timeframe}m" if timeframe else "auto",
+        "Equity Final": result["equity_end"],
+        "Profit Factor": result["metrics"].get("profit_factor", 0),
+        "Avg Trade": result["metrics"].get("avg_trade", 0),
+        "Expectancy": result["metrics"].get("expectancy", 0),
+        "Trades": result["metrics"].get("trades", 0),
+        "Wins": result["metrics"].get("wins", 0),
+        "Losses": result["metrics"].get("losses", 0),
+        "Win Rate %": (result["metrics"].get("wins", 0) /
+                      result["metrics"].get("trades", 1) * 100)
+                      if result["metrics"].get("trades", 0) > 0 else 0,
+        "Max DD %": result["max_dd_pct"],
+        "Max DD $": result["max_dd_cash"],
+        "Bars/s": result["bars_per_sec"],
+    }
+
+    for phase, seconds in result.get("timings", {}).items():
+        row[TIMING_COLUMNS[phase]] = seconds
+
+    if result.get("pruned"):
+        row["Equity Final"] = float("nan")
+        row["Pruned"] = result["pruned"]
+
+    return row
+
+
+def _run_combo_task(task):
+    """
+    Wrapper executado dentro do worker.
+    Exceções da estratégia viram uma linha de erro (o batch continua).
+    """
+    idx, job, combo, profiling = task
+    try:
+        row = _run_combo(job, combo, profiling)
+    except Exception as e:
+        row = _error_row(job, combo, e)
+    return idx, row
+
+
+def _run_chunk_task(task):
+    """
+    Wrapper de um chunk dentro do worker. Se alguma combinação levantar
+    exceção, o chunk roda de novo uma a uma: só a culpada vira linha de erro.
+    """
+    indices, job, combos, profiling = task
+    try:
+        rows = _run_chunk(job, combos, profiling)
+    except Exception:
+        return [_run_combo_task((idx, job, combo, None)) for idx, combo in zip(indices, combos)]
+    return list(zip(indices, rows))
+
+
+def _robustness_task(task):
+    """
+    Monte Carlo de um líder no worker: roda a combinação de novo com log
+    de trades e simula sobre o PnL líquido dos trades
+    """
+    job, combo, config, seed = task
+    job = {**job, "kill_rules": _without_timeout(job["kill_rules"])}
+    engine, _ = _combo_engine(job, combo)
+    result = engine.run(verbose=False, trade_log=True)
+    pnls = result["trades"].columns["pnl_comm"]
+    return monte_carlo(pnls, initial_cash=job["initial_cash"], seed=seed, **config)
+
+
+def _error_row(job, combo, error):
+    """Linha de resultado para uma combinação que falhou"""
+    timeframe = {**job["fixed_params"], **combo}.get("timeframe", job["base_timeframe"])
+    return {
+        **combo,
+        "Timeframe": f"{timeframe}m" if timeframe else "auto",
+        "Equity Final": float("nan"),
+        "Erro": f"{type(error).__name__}: {error}",
+    }
+
+
+def _top_rows(df, metric, top_n, largest=True):
+    """Top N do DataFrame em memória (podadas fora, como no TopK)"""
+    if "Pruned" in df:
+        df = df[df["Pruned"].isna()]
+    return df.nlargest(top_n, metric) if largest else df.nsmallest(top_n, metric)
+
+
+def _without_timeout(kill_rules):
+    """Regras sem o timeout (não existe no vetorizado)"""
+    if not kill_rules:
+        return None
+    return {k: v for k, v in kill_rules.items() if k != "timeout"} or None
+
+
+def resolve_workers(workers):
+    """
+    Normaliza o número de workers.
+    None/1 -> sequencial | 0, "auto" ou negativo -> todos os núcleos
+    """
+    if workers in (None, ""):
+        return 1
+    if workers == "auto":
+        return os.cpu_count() or 1
+    workers = int(workers)
+    if workers <= 0:
+        return os.cpu_count() or 1
+    return workers
 
 
 class BatchRunner:
@@ -15,19 +282,124 @@ class BatchRunner:
     Gera todas as combinações de params variáveis e roda o backtest.
     """
 
-    def __init__(self, strategy_class, datafile, base_timeframe=None):
+    def __init__(self, strategy_class, datafile, base_timeframe=None, workers=1,
+                 feed="store", engine="backtrader", cross_check=0,
+                 initial_cash=100000, commission=1.24, cache=True,
+                 sink=None, top_k=20, rank_by=("Equity Final",), kill_rules=None,
+                 profile="lean", chunk_size=1, profiling=None, start=None, end=None,
+                 save_trades=None, distributed=None, indicator_bank=True,
+                 timings=False):
         """
         Args:
             strategy_class: Classe da estratégia (ex: SMATest)
-            datafile: Path do arquivo de dados
+            datafile: Path do arquivo de dados, glob ("data/MNQ*.txt") ou
+                lista. Com vários arquivos o grid roda em cada um (coluna
+                "datafile" no resultado e líderes por arquivo)
             base_timeframe: Timeframe base (None para auto-detect)
+            workers: Processos em paralelo (1 = sequencial, 0/"auto" = todos os núcleos)
+            feed: Origem das barras ("store" = cache binário, "csv" = texto,
+                "array" = texto parseado em bloco na memória de cada processo)
+            engine: "backtrader" (Cerebro por combinação) ou "vector"
+                (engine/vector_engine.py, estratégias que declaram `vector`)
+            cross_check: Com engine="vector", quantas combinações sorteadas
+                rodar também no Backtrader para conferir os resultados
+            initial_cash: Caixa inicial de cada backtest
+            commission: Comissão por contrato (FuturesCommission)
+            cache: True = cache de resultados padrão (engine/result_cache.py),
+                path = arquivo do cache, False = sempre recalcular
+            sink: None = resultados em memória (self.results); path
+                (.csv/.parquet/.db) ou ResultSink = linhas gravadas em disco
+                conforme terminam, guardando em memória só os líderes
+            top_k: Quantos líderes manter por métrica no modo sink
+            rank_by: Métricas com ranking top-k mantido durante o batch
+            kill_rules: Regras de parada antecipada (engine/kill_rules.py)
+                Ex: {"max_dd_pct": 15, "min_trades": 2, "trades_window": 1000}
+            profile: Perfil do Cerebro (backtest_engine.PROFILES). "lean" só
+                liga o que o batch lê; "full" volta ao Cerebro padrão
+            chunk_size: Combinações por Cerebro (1 = um Cerebro por
+                combinação). >1 carrega os dados uma vez por chunk e
+                compartilha indicadores iguais (engine/shared_cerebro.py)
+            profiling: cProfile/tracemalloc em combinações escolhidas
+                (engine/profiling.py), ex: {"every": 100, "tracemalloc": True}.
+                Arquivos .prof/.mem/.txt ao lado dos resultados
+            start/end: Fatia de datas [start, end) do arquivo (ex: "2024-01-01").
+                Todas as combinações rodam só nesse período
+            save_trades: Formato do log de trades de CADA combinação ("csv",
+                "parquet", "feather", "npz"; engine/trade_recorder.py). Um
+                arquivo por combinação em <sink>_trades/ (ou results/trades_<ts>/),
+                gravado pelo próprio worker. Combinações do cache rodam de novo
+            distributed: Modo coordenador (engine/distributed.py): os chunks
+                vão para workers conectados por TCP (outras máquinas ou
+                `local_workers` processos locais) em vez do pool local.
+                Ex: {"listen": "0.0.0.0:5555", "authkey": "segredo",
+                "lease_timeout": 300, "local_workers": 0}
+            indicator_bank: True = indicadores do grid pré-calculados em
+                lote, uma vez por processo e timeframe (engine/indicator_bank.py;
+                os períodos vêm da declaração `vector` + params do batch).
+                Mesmos valores do Backtrader; só nos perfis full/lean
+            timings: True = tempo de cada chamada dos analyzers e da carga
+                das barras em colunas próprias (T Analyzers / T Feed), com
+                custo por barra. False = só por fase (analyzers em T Strategy)
         """
+        if engine not in ("backtrader", "vector"):
+            raise ValueError(f"Engine inválido: {engine}")
+        if engine == "vector" and (start is not None or end is not None):
+            raise ValueError("Fatia de datas (start/end) não suportada no engine vector")
+        if engine == "vector" and distributed:
+            raise ValueError("Modo distribuído não suportado no engine vector")
+
         self.strategy_class = strategy_class
-        self.datafile = datafile
+        self.datafiles = resolve_datafiles(datafile)
+        self.datafile = self.datafiles[0]
         self.base_timeframe = base_timeframe
+        self.workers = resolve_workers(workers)
+        self.feed = feed
+        self.engine = engine
+        self.cross_check = int(cross_check or 0)
+        self.initial_cash = initial_cash
+        self.commission = commission
+        self.cache = cache
+        self.sink = sink
+        self.top_k = top_k
+        self.rank_by = tuple(rank_by)
+        self.kill_rules = normalize_kill_rules(kill_rules)
+        self.profile = profile
+        self.indicator_bank = bool(indicator_bank)
+        self.timings = bool(timings)
+        self.chunk_size = max(int(chunk_size or 1), 1)
+        self.profiling = normalize_profiling(profiling)
+        self.start = start
+        self.end = end
+        self.trades_format = trade_format(save_trades)
+        self.distributed = None
+        if distributed:
+            # Import só quando usado (distributed.py importa este módulo)
+            from engine.distributed import normalize_distributed
+            self.distributed = normalize_distributed(distributed)
         self.results = []
+        self.count = 0
+        self.pruned = 0
+        self.cached = 0         # combinações vindas do cache de resultados
+        self._bars_per_sec = []
+        self._phase_totals = dict.fromkeys(TIMING_COLUMNS.values(), 0.0)
+        self._df = None
+        self._sink = None
+        self._columns = None
+        self._leaders = {}
+        self._file_leaders = {}
+        self._checked = 0
+        self._numbers = {}
+        self._dispatched = 0
+        self._round_base = 0
+        self._profile_dir = None
+        self._trades_path = None
+        self._coordinator = None
+        self._job = None
+        self.param_names = []
 
-    def run(self, fixed_params=None, variable_params=None, verbose=True):
+    def run(self, fixed_params=None, variable_params=None, verbose=True, workers=None,
+            search="grid", budget=None, seed=None, metric="Equity Final",
+            search_batch=SEARCH_BATCH):
         """
         Roda batch de otimização.
 
@@ -40,98 +412,637 @@ class BatchRunner:
             
             verbose: Se True, imprime progresso
 
+            workers: Sobrescreve o número de processos do construtor
+
+            search: Como percorrer o grid (engine/search.py)
+                "grid" = todas as combinações | "random" | "bayesian" | "zoom"
+
+            budget: Máximo de backtests na busca (ignorado no "grid")
+
+            seed: Semente da busca (None = sorteada e impressa)
+
+            metric: Métrica maximizada pelas buscas adaptativas
+
+            search_batch: Pontos por rodada nas buscas adaptativas. Não
+                depende de `workers`: a mesma semente pede os mesmos pontos
+                com qualquer nº de processos
+
         Returns:
-            DataFrame com resultados
+            DataFrame com resultados (no modo sink: só os top_k líderes
+            por rank_by[0]; o conjunto completo fica no arquivo)
         """
         fixed_params = fixed_params or {}
         variable_params = variable_params or {}
+        workers = self.workers if workers is None else resolve_workers(workers)
+
+        # Vários arquivos: o arquivo entra no grid como primeira dimensão
+        if len(self.datafiles) > 1:
+            variable_params = {FILE_PARAM: self.datafiles, **variable_params}
 
-        # Gera todas as combinações dos parâmetros variáveis
-        combinations = self._generate_combinations(variable_params)
+        search = search or "grid"
+        if search != "grid" and seed is None:
+            seed = random.randrange(2 ** 31)
 
-        total = len(combinations)
+        # Gera as combinações (todas no "grid", por rodadas nas outras buscas)
+        search_batch = max(int(search_batch or SEARCH_BATCH), 1)
+        sampler = make_sampler(search, variable_params, budget=budget, seed=seed,
+                               batch_size=search_batch)
+
+        total = sampler.space.size
+        workers = min(workers, sampler.budget)
         if verbose:
             print(f"\n{'='*60}")
             print(f"  BATCH OPTIMIZATION")
             print(f"{'='*60}")
             print(f"Estratégia: {self.strategy_class.__name__}")
-            print(f"Arquivo: {self.datafile}")
+            if len(self.datafiles) > 1:
+                print(f"Arquivos ({len(self.datafiles)}): "
+                      + ", ".join(os.path.basename(f) for f in self.datafiles))
+            else:
+                print(f"Arquivo: {self.datafile}")
+            if self.start is not None or self.end is not None:
+                print(f"Período: {self.start or 'início'} -> {self.end or 'fim'}")
             print(f"Parâmetros fixos: {fixed_params}")
             print(f"Parâmetros variáveis: {list(variable_params.keys())}")
             print(f"Total de combinações: {total}")
+            if search != "grid":
+                print(f"Busca: {search} (orçamento: {sampler.budget}, seed: {seed})")
+            print(f"Workers: {workers}")
             print(f"{'='*60}\n")
 
-        # Roda cada combinação
-        for idx, combo in enumerate(combinations, 1):
-            # Merge fixed + variable params
-            all_params = {**fixed_params, **combo}
-            
-            # Separa timeframe dos strategy_params
-            timeframe = all_params.pop("timeframe", self.base_timeframe)
-            
+        # Converte o arquivo (e cada timeframe) para o cache binário UMA vez,
+        # aqui no processo principal; os workers só abrem (memory-map)
+        if self.feed == "store":
+            self._prepare_store(self._timeframes(fixed_params, variable_params))
+
+        job = self._make_job(fixed_params, variable_params)
+        self._job = job
+        self.param_names = list(variable_params.keys())
+        cache = self._open_cache()
+        self._checked = 0
+        self._dispatched = 0
+        self._round_base = 0
+        self._profile_dir = self._profiling_dir()
+        self._trades_path = job["trades_dir"]
+
+        # Destino das linhas: lista em memória ou sink em disco
+        if self.sink is not None:
+            self._open_sink(list(variable_params.keys()) + RESULT_COLUMNS)
+
+        # Modo distribuído: coordenador no ar durante todas as rodadas
+        if self.distributed is not None:
+            self._start_coordinator(job, verbose)
+
+        evaluated = 0
+        try:
+            while True:
+                combinations = sampler.ask(search_batch)
+                if not combinations:
+                    break
+
+                scores = [None] * len(combinations) if sampler.adaptive else None
+                self._run_round(job, cache, combinations, workers, metric, scores,
+                                verbose and not sampler.adaptive)
+                sampler.tell(combinations, scores or [])
+
+                evaluated += len(combinations)
+                if verbose and sampler.adaptive:
+                    _, best = sampler.best()
+                    print(f"🔍 {search}: {evaluated}/{sampler.budget} avaliadas"
+                          f" - melhor {metric}: {best:,.2f}")
+        finally:
+            if self._coordinator is not None:
+                self._coordinator.close()
+                if verbose:
+                    print(f"🛰️ Workers que participaram: {len(self._coordinator.seen)}")
+                self._coordinator = None
+
+        if verbose:
+            self._print_throughput()
+
+        if self.sink is not None:
+            self._sink.close()
             if verbose:
-                print(f"[{idx}/{total}] Testando: {combo}")
-
-            # Roda backtest
-            engine = BacktestEngine(
-                strategy=self.strategy_class,
-                datafile=self.datafile,
-                timeframe_minutes=timeframe,
-                strategy_params=all_params
-            )
+                print(f"\n💾 {self._sink.count} linhas gravadas em: {self._sink.path}")
+            return self.get_best(self.rank_by[0], self.top_k)
 
-            result = engine.run(verbose=False, save_trades=False)
-
-            # Coleta métricas
-            self.results.append({
-                **combo,  # Parâmetros testados
-                "Timeframe": f"{timeframe}m" if timeframe else "auto",
-                "Equity Final": result["equity_end"],
-                "Profit Factor": result["metrics"].get("profit_factor", 0),
-                "Avg Trade": result["metrics"].get("avg_trade", 0),
-                "Expectancy": result["metrics"].get("expectancy", 0),
-                "Trades": result["metrics"].get("trades", 0),
-                "Wins": result["metrics"].get("wins", 0),
-                "Losses": result["metrics"].get("losses", 0),
-                "Win Rate %": (result["metrics"].get("wins", 0) / 
-                              result["metrics"].get("trades", 1) * 100) 
-                              if result["metrics"].get("trades", 0) > 0 else 0,
-                "Max DD %": result["max_dd_pct"],
-                "Max DD $": result["max_dd_cash"],
-            })
+        self._df = None
 
         return self._create_dataframe()
 
-    def _generate_combinations(self, variable_params):
+    def _print_throughput(self):
+        """Barras/seg por combinação (mediana) e pico de memória do processo"""
+        if self._bars_per_sec:
+            median = sorted(self._bars_per_sec)[len(self._bars_per_sec) // 2]
+            print(f"\n⏱️ Barras/seg por combinação (mediana): {median:,.0f} [{self.profile}]")
+        total = self._phase_totals["T Total"]
+        if total > 0:
+            print("⏱️ Tempo por fase (soma das combinações): " + " | ".join(
+                f"{col[2:].lower()} {seconds:,.1f}s ({seconds / total:.0%})"
+                for col, seconds in self._phase_totals.items()
+                if col != "T Total" and seconds > 0))
+        if self._profile_dir and os.path.isdir(self._profile_dir):
+            print(f"🔬 Profiling: {self._profile_dir}")
+        if self._trades_path and os.path.isdir(self._trades_path):
+            print(f"📒 Logs de trades ({self.trades_format}): {self._trades_path}")
+        rss = peak_rss_mb()
+        if rss is not None:
+            print(f"🧠 Pico de memória (RSS): {rss:,.1f} MB")
+
+    def _run_round(self, job, cache, combinations, workers, metric, scores, verbose):
         """
-        Gera todas as combinações cartesianas dos parâmetros variáveis.
-        
-        Ex: {"a": [1,2], "b": [3,4]} -> [{"a":1,"b":3}, {"a":1,"b":4}, ...]
+        Roda uma lista de combinações (o grid inteiro ou uma rodada da busca).
+
+        scores: lista a preencher com `metric` de cada combinação (ou None)
         """
-        if not variable_params:
-            return [{}]
+        rows = [None] * len(combinations) if self.sink is None else None
+        base = self._round_base
+        self._round_base += len(combinations)
 
-        keys = variable_params.keys()
-        values = variable_params.values()
-        
-        combinations = []
-        for combo in product(*values):
-            combinations.append(dict(zip(keys, combo)))
-        
-        return combinations
+        def emit(idx, row):
+            if rows is None:
+                # Empates no ranking pelo nº da combinação (entre rodadas também)
+                self._sink.write(row)
+                for tracker in self._leaders.values():
+                    tracker.push(row, base + idx)
+                if self._file_leaders:
+                    self._file_leaders[row[FILE_PARAM]].push(row, base + idx)
+            else:
+                rows[idx] = row
+            if scores is not None:
+                scores[idx] = row.get(metric)
+            self.count += 1
+            if row.get("Pruned"):
+                self.pruned += 1
+            if row.get("Bars/s"):
+                self._bars_per_sec.append(row["Bars/s"])
+            for col in self._phase_totals:
+                self._phase_totals[col] += row.get(col) or 0.0
+
+        # Agrupa por arquivo e timeframe: cada worker pega as combinações de
+        # um arquivo/série enquanto ela está carregada (memo do BarStore)
+        order = self._order_by_data(combinations, job["fixed_params"])
+
+        # Combinações já calculadas (cache persistente) não rodam de novo;
+        # cada combinação concluída é gravada na hora (checkpoint)
+        cached, checkpoint = self._load_cached(cache, job, combinations, emit, verbose)
+        order = [idx for idx in order if idx not in cached]
+
+        # Número de cada combinação na ordem de execução (1, 2, ...),
+        # usado para escolher as perfiladas (profiling "every"/"combos")
+        self._numbers = {idx: self._dispatched + k for k, idx in enumerate(order, 1)}
+        self._dispatched += len(order)
+
+        # Modo sink: linhas gravadas na ordem de execução (a mesma de uma
+        # execução sequencial), não na ordem em que os workers terminam.
+        # Quem chega adiantado espera no buffer só até as anteriores voltarem
+        position = {idx: k for k, idx in enumerate(order)}
+        pending = {}
+        next_position = 0
+
+        def on_row(idx, row):
+            nonlocal next_position
+            checkpoint(idx, row)
+            if rows is not None:
+                emit(idx, row)
+                return
+            pending[position[idx]] = (idx, row)
+            while next_position in pending:
+                emit(*pending.pop(next_position))
+                next_position += 1
+
+        if self.engine == "vector":
+            self._run_vector(job, combinations, verbose, order, on_row)
+        elif self._coordinator is not None:
+            self._run_distributed(job, combinations, verbose, order, on_row)
+        elif workers > 1:
+            self._run_parallel(job, combinations, workers, verbose, order, on_row)
+        else:
+            self._run_sequential(job, combinations, verbose, order, on_row)
+
+        if rows is not None:
+            self.results.extend(rows)
+
+    def _open_sink(self, columns):
+        """
+        Modo sink: cada linha vai para o arquivo (em lotes) e para os
+        rankings top-k; nada cresce em memória com o tamanho do grid.
+        """
+        self._sink = self.sink if isinstance(self.sink, ResultSink) else open_sink(self.sink)
+        self._columns = columns
+        self._sink.open(self._columns)
+        self._leaders = {metric: TopK(metric, self.top_k, not lower_is_better(metric))
+                         for metric in self.rank_by}
+        if len(self.datafiles) > 1:
+            first = self.rank_by[0]
+            self._file_leaders = {f: TopK(first, self.top_k, not lower_is_better(first))
+                                  for f in self.datafiles}
+
+    def _profiling_dir(self):
+        """Pasta dos arquivos de profiling: "dir" do config ou ao lado do sink"""
+        if self.profiling is None:
+            return None
+        if self.profiling["dir"]:
+            return self.profiling["dir"]
+        if isinstance(self.sink, str):
+            return os.path.splitext(self.sink)[0] + "_profile"
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return os.path.join("results", f"profile_{timestamp}")
+
+    def _trades_dir(self):
+        """Pasta dos logs de trades por combinação (ao lado do sink)"""
+        if self.trades_format is None:
+            return None
+        if isinstance(self.sink, str):
+            return os.path.splitext(self.sink)[0] + "_trades"
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return os.path.join("results", f"trades_{timestamp}")
+
+    def _profiling_for(self, indices):
+        """
+        Opções de profiled() se alguma das combinações (índices) deve ser
+        perfilada; arquivos nomeados pelo número da primeira delas
+        """
+        if self.profiling is None:
+            return None
+
+        numbers = [self._numbers[idx] for idx in indices
+                   if wants_profile(self.profiling, self._numbers[idx])]
+        if not numbers:
+            return None
+
+        return {
+            "path": os.path.join(self._profile_dir, f"combo_{numbers[0]:06d}"),
+            "cprofile": self.profiling["cprofile"],
+            "trace_memory": self.profiling["tracemalloc"],
+            "top": self.profiling["top"],
+        }
+
+    def _make_job(self, fixed_params, variable_params=None):
+        """
+        Parte comum a todas as combinações (enviada aos workers).
+        O índice de metadados é montado uma vez aqui quando algum engine
+        vai usá-lo: nenhuma combinação relê o arquivo só para descobrir
+        datas/timeframe. Idem para as
+        séries que o banco de indicadores vai calcular (todo o grid).
+        """
+        bank = None
+        if self.indicator_bank and self.engine == "backtrader":
+            bank = bank_requests(self.strategy_class, fixed_params, variable_params)
+
+        # Índice só de quem vai usar: todo Cerebro lê (datas/timeframe); o
+        # vetorizado só para detectar o timeframe. Fora isso fica preguiçoso
+        data_index = {f: DataIndex(f) for f in self.datafiles}
+        if (self.engine == "backtrader"
+                or None in self._timeframes(fixed_params, variable_params or {})):
+            for index in data_index.values():
+                index.ensure()
+
+        return {
+            "strategy_class": self.strategy_class,
+            "datafile": self.datafile,
+            "fixed_params": fixed_params,
+            "base_timeframe": self.base_timeframe,
+            "feed": self.feed,
+            "data_index": data_index,
+            "initial_cash": self.initial_cash,
+            "commission": self.commission,
+            "kill_rules": self.kill_rules,
+            "profile": self.profile,
+            "start": self.start,
+            "end": self.end,
+            "trades_format": self.trades_format,
+            "trades_dir": self._trades_dir(),
+            "indicator_bank": bank,
+            "timings": self.timings,
+        }
+
+    def _combo_timeframe(self, combo, fixed_params):
+        return {**fixed_params, **combo}.get("timeframe", self.base_timeframe)
+
+    def _combo_file(self, combo, fixed_params):
+        return {**fixed_params, **combo}.get(FILE_PARAM, self.datafile)
+
+    def _combo_params(self, combo, fixed_params):
+        """Params completos de uma combinação (fixos + variáveis + timeframe, sem o arquivo)"""
+        params = {**fixed_params, **combo}
+        params.pop(FILE_PARAM, None)
+        params.setdefault("timeframe", self.base_timeframe)
+        return params
+
+    def _timeframes(self, fixed_params, variable_params):
+        """Todos os timeframes que o batch pode usar"""
+        if "timeframe" in variable_params:
+            return set(variable_params["timeframe"])
+        return {fixed_params.get("timeframe", self.base_timeframe)}
+
+    def _open_cache(self):
+        """
+        Cache de resultados (engine/result_cache.py) de cada arquivo:
+        dict arquivo -> ResultCache, ou None se desligado
+        """
+        if not self.cache:
+            return None
+
+        return {
+            datafile: ResultCache(
+                self.strategy_class,
+                datafile,
+                self.initial_cash,
+                self.commission,
+                path=None if self.cache is True else self.cache,
+                kill_rules=self.kill_rules,
+                date_range=(self.start, self.end),
+                engine=self.engine,
+                feed=self.feed,
+                profile=self.profile,
+            )
+            for datafile in self.datafiles
+        }
+
+    def _load_cached(self, cache, job, combinations, emit, verbose):
+        """
+        Emite as combinações que já estão no cache de resultados.
+
+        Returns:
+            (índices já calculados, callback checkpoint(idx, row) que
+            grava cada combinação nova)
+        """
+        if cache is None:
+            return set(), lambda idx, row: None
+
+        fixed = job["fixed_params"]
+        caches = [cache[self._combo_file(combo, fixed)] for combo in combinations]
+        keys = [file_cache.key(self._combo_params(combo, fixed))
+                for file_cache, combo in zip(caches, combinations)]
+
+        done = set()
+        # Com log de trades tudo roda (o cache só guarda métricas)
+        for idx, key in enumerate([] if self.trades_format else keys):
+            cached = caches[idx].get(key)
+            if cached is not None:
+                emit(idx, {**combinations[idx], **cached})
+                done.add(idx)
+        self.cached += len(done)
+
+        if verbose and done:
+            print(f"♻️ Cache: {len(done)}/{len(combinations)} combinações já calculadas")
+
+        def checkpoint(idx, row):
+            # Erros e timeouts dependem da máquina: rodam de novo
+            if "Erro" in row or str(row.get("Pruned", "")).startswith("timeout"):
+                return
+            # Velocidade/tempos são da execução, não da combinação: fora do cache
+            metrics = {k: v for k, v in row.items()
+                       if k not in combinations[idx] and k not in RUN_STATS}
+            caches[idx].put(keys[idx], metrics)
+
+        return done, checkpoint
+
+    def _order_by_data(self, combinations, fixed_params):
+        """Índices das combinações agrupados por arquivo e timeframe (ordem estável)"""
+        files = {f: n for n, f in enumerate(self.datafiles)}
+        return sorted(
+            range(len(combinations)),
+            key=lambda idx: (files[self._combo_file(combinations[idx], fixed_params)],
+                             self._combo_timeframe(combinations[idx], fixed_params) or 0),
+        )
+
+    def _prepare_store(self, timeframes):
+        """Monta o cache 1m e as séries resampleadas de cada timeframe (em cada arquivo)"""
+        for datafile in self.datafiles:
+            store = BarStore(datafile).ensure()
+
+            for timeframe in sorted(tf for tf in timeframes if tf and tf > 1):
+                store.resampled(timeframe)
+
+    def _run_vector(self, job, combinations, verbose, order, on_row):
+        """
+        Avalia as combinações no VectorEngine (sem Cerebro), um arquivo por vez.
+        Timeframes que exigem o resampler do Backtrader caem no caminho normal.
+        """
+        fixed = job["fixed_params"]
+        for datafile in self.datafiles:
+            file_order = [idx for idx in order
+                          if self._combo_file(combinations[idx], fixed) == datafile]
+            if file_order:
+                self._run_vector_file(job, datafile, combinations, verbose, file_order, on_row)
+
+    def _run_vector_file(self, job, datafile, combinations, verbose, order, on_row):
+        """_run_vector das combinações de um arquivo"""
+        vector = VectorEngine(
+            self.strategy_class,
+            datafile,
+            initial_cash=job["initial_cash"],
+            commission=job["commission"],
+            data_index=job["data_index"][datafile],
+            kill_rules=job["kill_rules"],
+        )
+
+        vector_idx, param_sets = [], []
+
+        for idx in order:
+            params = self._combo_params(combinations[idx], job["fixed_params"])
+            if vector.supports(params["timeframe"]):
+                vector_idx.append(idx)
+                param_sets.append(params)
+            else:
+                on_row(idx, _run_combo(job, combinations[idx], self._profiling_for([idx])))
+
+        # Amostra da conferência sorteada antes: só esses resultados
+        # ficam guardados; o resto vai direto para on_row, bloco a bloco
+        sample = set(random.Random(0).sample(
+            range(len(param_sets)),
+            min(self.cross_check - self._checked, len(param_sets))))
+        sample_params, sample_results = [], []
+
+        for start in range(0, len(param_sets), VECTOR_CHUNK):
+            block = param_sets[start:start + VECTOR_CHUNK]
+            for k, result in enumerate(vector.run_many(block), start):
+                idx = vector_idx[k]
+                _save_trade_log(job, combinations[idx], result)
+                on_row(idx, _build_row(combinations[idx], param_sets[k]["timeframe"], result))
+                if k in sample:
+                    sample_params.append(param_sets[k])
+                    sample_results.append(result)
+
+        if verbose and order:
+            where = f" ({os.path.basename(datafile)})" if len(self.datafiles) > 1 else ""
+            print(f"⚡ Vetorizado{where}: {len(vector_idx)}/{len(order)} combinações")
+
+        if sample_params:
+            checked = cross_check(
+                self.strategy_class, datafile, sample_params, sample_results,
+                sample=len(sample_params),
+                initial_cash=job["initial_cash"],
+                commission=job["commission"],
+                kill_rules=_without_timeout(job["kill_rules"]),
+            )
+            self._checked += len(checked)
+            if verbose:
+                print(f"🔎 Conferência: {len(checked)} combinações idênticas ao Backtrader")
+
+    def _chunks(self, job, combinations, order):
+        """
+        Divide `order` (já agrupado por arquivo e timeframe) em chunks de
+        até chunk_size combinações, sem misturar arquivos nem timeframes
+        """
+        chunks = []
+        last = object()
+        for idx in order:
+            data = (self._combo_file(combinations[idx], job["fixed_params"]),
+                    self._combo_timeframe(combinations[idx], job["fixed_params"]))
+            if not chunks or data != last or len(chunks[-1]) >= self.chunk_size:
+                chunks.append([])
+            chunks[-1].append(idx)
+            last = data
+        return chunks
+
+    def _run_sequential(self, job, combinations, verbose, order, on_row):
+        """Roda cada combinação (ou chunk de combinações) no processo atual"""
+        total = len(order)
+        done = 0
+
+        for chunk in self._chunks(job, combinations, order):
+            combos = [combinations[idx] for idx in chunk]
+            if verbose:
+                for combo in combos:
+                    done += 1
+                    print(f"[{done}/{total}] Testando: {combo}")
+
+            for idx, row in zip(chunk, _run_chunk(job, combos, self._profiling_for(chunk))):
+                on_row(idx, row)
+
+    def _run_parallel(self, job, combinations, workers, verbose, order, on_row):
+        """
+        Distribui as combinações (em chunks de chunk_size) num pool de processos.
+
+        - Resultados voltam na ordem das combinações (determinístico)
+        - Exceção numa combinação vira linha de erro
+        - Se um worker morrer (pool quebrado), as combinações pendentes
+          são reenviadas a um pool novo; na última tentativa cada uma roda
+          isolada, para que só a combinação culpada seja marcada com erro
+        """
+        total = len(order)
+        pending = list(order)
+        done = 0
+        attempt = 0
+
+        while pending:
+            attempt += 1
+            isolated = attempt > 2
+
+            if isolated:
+                # Uma combinação por pool: uma morte não afeta as outras
+                batches = [[idx] for idx in pending]
+                pool_size = 1
+            else:
+                batches = [pending]
+                pool_size = workers
+
+            failed = set()
+            for batch in batches:
+                chunks = [batch] if isolated else self._chunks(job, combinations, batch)
+                with ProcessPoolExecutor(max_workers=pool_size) as pool:
+                    futures = {
+                        pool.submit(_run_chunk_task,
+                                    (chunk, job, [combinations[idx] for idx in chunk],
+                                     self._profiling_for(chunk))): chunk
+                        for chunk in chunks
+                    }
+
+                    for future in as_completed(futures):
+                        chunk = futures[future]
+                        try:
+                            rows = future.result()
+                        except BrokenProcessPool as e:
+                            if not isolated:
+                                failed.update(chunk)
+                                continue
+                            rows = [(idx, _error_row(job, combinations[idx], e)) for idx in chunk]
+
+                        for idx, row in rows:
+                            on_row(idx, row)
+                            done += 1
+                            if verbose:
+                                print(f"[{done}/{total}] Concluído: {combinations[idx]}")
+
+            if failed and verbose:
+                print(f"⚠️ Worker interrompido - reenviando {len(failed)} combinações")
+            pending = [idx for idx in order if idx in failed]
+
+    def _start_coordinator(self, job, verbose):
+        """Sobe o coordenador (engine/distributed.py) e os workers locais"""
+        from engine.distributed import Coordinator
+
+        cfg = self.distributed
+        self._coordinator = Coordinator(
+            job,
+            address=cfg["address"],
+            authkey=cfg["authkey"],
+            lease_timeout=cfg["lease_timeout"],
+            max_attempts=cfg["max_attempts"],
+            local_workers=cfg["local_workers"],
+        ).start()
+
+        if verbose:
+            host, port = self._coordinator.address
+            print(f"🛰️ Coordenador em {host}:{port} (lease {cfg['lease_timeout']:.0f}s"
+                  f", workers locais: {cfg['local_workers']})")
+            # Chave gerada (loopback): impressa para os workers desta máquina
+            key = cfg["authkey"].decode("utf-8") if cfg.get("authkey_generated") else "<chave>"
+            print(f"   Workers: python run_optimization_json.py worker --connect {host}:{port}"
+                  f" --authkey {key}")
+
+    def _run_distributed(self, job, combinations, verbose, order, on_row):
+        """
+        Publica os chunks no coordenador; os workers conectados pegam,
+        rodam e devolvem as linhas (em qualquer ordem: cada linha vai
+        para a posição da sua combinação)
+        """
+        tasks = [(chunk, [combinations[idx] for idx in chunk], self._profiling_for(chunk))
+                 for chunk in self._chunks(job, combinations, order)]
+
+        total = len(order)
+        done = 0
+        for idx, row in self._coordinator.map(tasks):
+            on_row(idx, row)
+            done += 1
+            if verbose:
+                print(f"[{done}/{total}] Concluído: {combinations[idx]}")
 
     def _create_dataframe(self):
-        """Cria DataFrame ordenado com os resultados"""
+        """
+        Cria DataFrame ordenado com os resultados.
+        Montado uma vez e reaproveitado até o próximo run().
+        """
+        if self._df is not None:
+            return self._df
+
         df = pd.DataFrame(self.results)
         
         # Ordena por Equity Final (melhor primeiro)
         df = df.sort_values("Equity Final", ascending=False)
         df = df.reset_index(drop=True)
         
+        self._df = df
         return df
 
     def save_results(self, filename=None):
         """Salva resultados em CSV"""
+        if self._sink is not None:
+            # Modo sink: os resultados já estão em disco
+            if filename is None:
+                print(f"\nResultados salvos em: {self._sink.path}")
+                return
+
+            header = True
+            for chunk in self._sink.read_chunks():
+                chunk.to_csv(filename, index=False, header=header, mode="w" if header else "a")
+                header = False
+            print(f"\nResultados salvos em: {filename}")
+            return
+
         if not self.results:
             print("Nenhum resultado para salvar")
             return
@@ -150,11 +1061,107 @@ class BatchRunner:
         Retorna as N melhores combinações por métrica.
         
         Args:
-            metric: Métrica para ranquear ("Equity Final", "Profit Factor", etc)
+            metric: Métrica para ranquear ("Equity Final", "Profit Factor", etc).
+                Max DD % / Max DD $ / Losses: menor é melhor
+                (results_db.LOWER_IS_BETTER)
             top_n: Quantidade de resultados
         
         Returns:
-            DataFrame com top N
+            DataFrame com top N (sem as combinações podadas)
         """
-        df = self._create_dataframe()
-        return df.nlargest(top_n, metric)
\ No newline at end of file
+        largest = not lower_is_better(metric)
+        if self._sink is not None:
+            # Modo sink: ranking mantido no heap ou, se não houver, relido do disco
+            tracker = self._leaders.get(metric)
+            if tracker is not None and tracker.k >= top_n:
+                df = tracker.dataframe(self._columns).head(top_n)
+            else:
+                df = top_k_from_chunks(self._sink.read_chunks(), metric, top_n, largest)
+
+            # Colunas de erro/poda só aparecem se alguma combinação tiver
+            for col in ("Pruned", "Erro"):
+                if col in df and df[col].isna().all():
+                    df = df.drop(columns=col)
+            return df
+
+        return _top_rows(self._create_dataframe(), metric, top_n, largest)
+
+    def iter_rows(self):
+        """Todas as linhas do último run() (relidas do sink em blocos, se houver)"""
+        if self._sink is None:
+            yield from self.results
+            return
+        for chunk in self._sink.read_chunks():
+            yield from chunk.to_dict("records")
+
+    def robustness(self, metric="Equity Final", top_n=10, sims=1000, method="bootstrap",
+                   seed=0, equity_floor=None, workers=None):
+        """
+        Monte Carlo dos líderes (engine/robustness.py): cada uma das top_n
+        combinações roda de novo com log de trades e a sequência de PnL é
+        reamostrada `sims` vezes.
+
+        Args:
+            metric / top_n: quais líderes (como em get_best)
+            sims: simulações por combinação
+            method: "bootstrap" (com reposição) ou "permutation" (só a ordem)
+            seed: semente; cada combinação recebe uma derivada dela, então
+                o resultado não depende de `workers`
+            equity_floor: piso da conta para "MC Ruína %" (padrão 90% do caixa)
+            workers: processos (padrão: os do construtor)
+
+        Returns:
+            DataFrame dos líderes com as colunas "MC ..." ao lado
+        """
+        if self._job is None:
+            raise RuntimeError("robustness() precisa de um run() antes")
+
+        leaders = self.get_best(metric, top_n).reset_index(drop=True)
+        combos = [
+            {name: value.item() if hasattr(value, "item") else value
+             for name, value in row.items() if name in self.param_names}
+            for row in leaders.to_dict("records")
+        ]
+        config = {"sims": int(sims), "method": method, "equity_floor": equity_floor}
+        tasks = [(self._job, combo, config, combo_seed)
+                 for combo, combo_seed in zip(combos, combo_seeds(seed, len(combos)))]
+
+        workers = min(self.workers if workers is None else resolve_workers(workers), len(tasks))
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                stats = list(pool.map(_robustness_task, tasks))
+        else:
+            stats = [_robustness_task(task) for task in tasks]
+
+        columns = pd.DataFrame([robustness_columns(s) for s in stats], index=leaders.index)
+        return pd.concat([leaders, columns], axis=1)
+
+    def get_best_by_file(self, metric="Equity Final", top_n=5):
+        """
+        Líderes de cada arquivo (batch com vários arquivos).
+
+        Returns:
+            dict arquivo -> DataFrame com top N daquele arquivo
+        """
+        if len(self.datafiles) == 1:
+            return {self.datafile: self.get_best(metric, top_n)}
+
+        largest = not lower_is_better(metric)
+        if self._sink is None:
+            df = self._create_dataframe()
+            return {f: _top_rows(df[df[FILE_PARAM] == f], metric, top_n, largest)
+                    for f in self.datafiles}
+
+        leaders = {}
+        for datafile in self.datafiles:
+            tracker = self._file_leaders.get(datafile)
+            if tracker is not None and tracker.metric == metric and tracker.k >= top_n:
+                df = tracker.dataframe(self._columns).head(top_n)
+            else:
+                chunks = (c[c[FILE_PARAM] == datafile] for c in self._sink.read_chunks())
+                df = top_k_from_chunks(chunks, metric, top_n, largest)
+            for col in ("Pruned", "Erro"):
+                if col in df and df[col].isna().all():
+                    df = df.drop(columns=col)
+            leaders[datafile] = df
+        return leaders
@@ -1,5 +1,82 @@
+from array import array
+
+import numpy as np
+import pandas as pd
 import backtrader as bt
 
+from engine.array_feed import EPOCH_ORDINAL
+from engine.trade_recorder import TradeRecorder, num_to_seconds
+
+
+def performance_metrics(trades, wins, losses, gross_profit, gross_loss,
+                        profit_factor=True, avg_trade=True, expectancy=True):
+    """
+    Métricas de performance a partir dos acumulados dos trades fechados.
+    Usada pelo PerformanceAnalyzer e pelo avaliador vetorizado.
+    """
+    results = {}
+
+    if trades == 0:
+        return results
+
+    winrate = wins / trades
+    lossrate = losses / trades
+
+    avg_win = gross_profit / wins if wins > 0 else 0
+    avg_loss = gross_loss / losses if losses > 0 else 0
+
+    if profit_factor:
+        results["profit_factor"] = (
+            gross_profit / gross_loss
+            if gross_loss > 0 else float("inf")
+        )
+
+    if avg_trade:
+        results["avg_trade"] = (
+            (gross_profit - gross_loss) / trades
+        )
+
+    if expectancy:
+        results["expectancy"] = (
+            winrate * avg_win - lossrate * avg_loss
+        )
+
+    results["trades"] = trades
+    results["wins"] = wins
+    results["losses"] = losses
+
+    return results
+
+
+def metrics_from_pnls(pnls):
+    """
+    performance_metrics a partir do PnL líquido de cada trade fechado,
+    com os mesmos acumulados (e a mesma ordem de soma) do PerformanceAnalyzer
+    """
+    pnls = np.asarray(pnls, dtype=np.float64)
+    won = pnls > 0
+    profits = pnls[won]
+    losses = np.abs(pnls[~won])
+    # cumsum soma em sequência (como o += por trade); np.sum somaria em pares
+    gross_profit = float(np.cumsum(profits)[-1]) if len(profits) else 0.0
+    gross_loss = float(np.cumsum(losses)[-1]) if len(losses) else 0.0
+    return performance_metrics(len(pnls), len(profits), len(losses), gross_profit, gross_loss)
+
+
+def max_drawdown(values):
+    """
+    (max drawdown %, max drawdown $) de uma sequência de valores da conta,
+    com as contas do bt.analyzers.DrawDown
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if not len(values):
+        return 0.0, 0.0
+    peak = np.maximum.accumulate(values)
+    moneydown = peak - values
+    drawdown = 100.0 * moneydown / peak
+    return max(0.0, float(drawdown.max())), max(0.0, float(moneydown.max()))
+
+
 class PerformanceAnalyzer(bt.Analyzer):
     params = dict(
         profit_factor=True,
@@ -30,35 +107,236 @@ class PerformanceAnalyzer(bt.Analyzer):
             self.gross_loss += abs(pnl)
 
     def get_analysis(self):
-        results = {}
+        return performance_metrics(
+            self.trades, self.wins, self.losses,
+            self.gross_profit, self.gross_loss,
+            profit_factor=self.p.profit_factor,
+            avg_trade=self.p.avg_trade,
+            expectancy=self.p.expectancy,
+        )
 
-        if self.trades == 0:
-            return results
 
-        winrate = self.wins / self.trades
-        lossrate = self.losses / self.trades
+class EquityCurveAnalyzer(bt.Analyzer):
+    """
+    Valor da conta ao fim de cada barra (inclusive no aquecimento).
+    get_analysis() -> pd.Series indexada pelo datetime da barra.
+    """
 
-        avg_win = self.gross_profit / self.wins if self.wins > 0 else 0
-        avg_loss = self.gross_loss / self.losses if self.losses > 0 else 0
+    def start(self):
+        self.dts = []
+        self.values = []
 
-        if self.p.profit_factor:
-            results["profit_factor"] = (
-                self.gross_profit / self.gross_loss
-                if self.gross_loss > 0 else float("inf")
-            )
+    def next(self):
+        self.dts.append(self.data.datetime[0])
+        self.values.append(self.strategy.broker.getvalue())
 
-        if self.p.avg_trade:
-            results["avg_trade"] = (
-                (self.gross_profit - self.gross_loss) / self.trades
-            )
+    def get_analysis(self):
+        # Data numérica do Backtrader -> segundos desde 1970 (barras em segundos inteiros)
+        seconds = np.round((np.asarray(self.dts) - EPOCH_ORDINAL) * 86400.0).astype(np.int64)
+        return pd.Series(self.values, index=pd.to_datetime(seconds, unit="s"), name="equity")
+
+
+# Versões do Backtrader (inclusive) cujos internos de Strategy/BackBroker o
+# ResultAnalyzer._trim_history conhece. Fora delas (ou com outro broker) o
+# modo bounded não descarta o histórico: mesmos resultados, só mais memória
+TRIM_VERSIONS = ((1, 9, 76), (1, 9, 78, 123))
+
+
+def can_trim_history(strategy):
+    """True se o histórico de ordens/trades da estratégia pode ser descartado"""
+    low, high = TRIM_VERSIONS
+    return (low <= bt.version.__btversion__ <= high
+            and type(strategy.broker) is bt.brokers.BackBroker)
+
+
+class ResultAnalyzer(bt.Analyzer):
+    """
+    Analyzer único do backtest: substitui PerformanceAnalyzer,
+    TradeLogAnalyzer e bt.analyzers.DrawDown com os mesmos números.
+
+    Por barra só guarda o valor da conta (notify_fund) num array de
+    floats; por trade fechado, o PnL líquido (e uma linha no TradeRecorder,
+    se trade_log=True). Métricas e drawdown são calculados uma vez no stop().
+
+    bounded=True (perfil lowmem): memória constante no tamanho dos dados.
+    Em vez dos arrays, acumulados correntes (pico, drawdown máximo, somas
+    dos trades) com os mesmos números; e a cada trade fechado descarta o
+    histórico que o próprio Backtrader guarda sem limite (ordens
+    notificadas na estratégia, ordens encerradas no broker e trades
+    fechados). O descarte mexe em internos do Backtrader: só com o
+    BackBroker e nas versões de TRIM_VERSIONS (senão não descarta).
+
+    get_analysis() -> {"metrics": dict do PerformanceAnalyzer,
+                       "max_dd_pct", "max_dd_cash",
+                       "trades": TradeRecorder (vazio sem trade_log)}
+    """
 
-        if self.p.expectancy:
-            results["expectancy"] = (
-                winrate * avg_win - lossrate * avg_loss
+    params = (
+        ("trade_log", False),
+        ("bounded", False),
+    )
+
+    def start(self):
+        self.values = array("d")
+        self.pnls = array("d")
+        self.trades = TradeRecorder()
+        self._positions = {}    # (data, tradeid) -> [posição, maior posição]
+        self._closes = {}       # (data, tradeid) -> [(preço de saída, tamanho)] a notificar
+        self._filled = {}       # ref -> executado já visto (ordens parciais)
+        self._record = self._running if self.p.bounded else self.values.append
+        self._fundmode = self.strategy.broker.fundmode
+        self._trim = self.p.bounded and can_trim_history(self.strategy)
+        self.rets = {}
+
+        # Acumulados do modo bounded
+        self._peak = float("-inf")
+        self._max_dd_pct = self._max_dd_cash = 0.0
+        self._wins = self._losses = 0
+        self._gross_profit = self._gross_loss = 0.0
+
+    def notify_fund(self, cash, value, fundvalue, shares):
+        # Uma notificação por barra, logo antes do next (mesmo valor do DrawDown)
+        self._record(fundvalue if self._fundmode else value)
+
+    def _running(self, value):
+        """Drawdown corrente: mesmas contas (e ordem) do max_drawdown()"""
+        if value > self._peak:
+            self._peak = value
+        moneydown = self._peak - value
+        if moneydown > self._max_dd_cash:
+            self._max_dd_cash = moneydown
+        drawdown = 100.0 * moneydown / self._peak
+        if drawdown > self._max_dd_pct:
+            self._max_dd_pct = drawdown
+
+    # Nada a fazer no next: o drawdown sai do array de valores no stop()
+    def _prenext(self):
+        pass
+
+    _nextstart = _next = _prenext
+
+    def notify_order(self, order):
+        if self.p.trade_log and order.status in (order.Partial, order.Completed):
+            self._book_fill(order)
+
+    def _book_fill(self, order):
+        """
+        Posição de cada data/tradeid a partir das execuções, na mesma
+        conta do Strategy._addnotification: quando uma execução zera (ou
+        inverte) a posição, guarda o preço dessa execução e o maior
+        tamanho do trade. O Backtrader notifica todas as ordens antes dos
+        trades, então cada trade fechado encontra o seu na fila.
+        """
+        size, price = order.executed.size, order.executed.price
+        seen_size, seen_price = self._filled.pop(order.ref, (0.0, 0.0))
+        if order.status == order.Partial:
+            self._filled[order.ref] = (size, price)
+
+        fill = size - seen_size
+        if not fill:
+            return
+        # Preço só das execuções novas (executed.price é a média da ordem)
+        fill_price = price if not seen_size else (size * price - seen_size * seen_price) / fill
+
+        data = order.data._compensate
+        key = (order.data if data is None else data, order.tradeid)
+        position, peak = self._positions.get(key, (0.0, 0.0))
+        new = position + fill
+
+        if position and (not new or (new > 0) != (position > 0)):
+            self._closes.setdefault(key, []).append((fill_price, peak))
+            peak = 0.0
+        self._positions[key] = (new, max(peak, abs(new)))
+
+    def notify_trade(self, trade):
+        if not trade.isclosed:
+            return
+
+        pnl = trade.pnlcomm  # já desconta comissão
+        if not self.p.bounded:
+            self.pnls.append(pnl)
+        elif pnl > 0:
+            self._wins += 1
+            self._gross_profit += pnl
+        else:
+            self._losses += 1
+            self._gross_loss += abs(pnl)
+
+        if self.p.trade_log:
+            key = (trade.data, trade.tradeid)
+            closes = self._closes.get(key)
+            exit_price, size = closes.pop(0) if closes else (float("nan"), 0.0)
+            if closes == []:
+                del self._closes[key]
+            self.trades.append(
+                num_to_seconds(trade.dtopen),
+                num_to_seconds(trade.dtclose),
+                1 if trade.long else -1,
+                size,
+                trade.price,
+                exit_price,
+                trade.pnl,
+                trade.commission,
+                trade.pnlcomm,
+                trade.barlen,
             )
+        if self._trim:
+            self._trim_history()
 
-        results["trades"] = self.trades
-        results["wins"] = self.wins
-        results["losses"] = self.losses
+    def _trim_history(self):
+        """
+        Descarta o que o Backtrader acumula por ordem/trade e não relê:
+        clones já notificados (strategy._orders), ordens encerradas no
+        broker (lista, filas de bracket e grupos OCO) e trades fechados
+        (só o último de cada data/tradeid é usado).
 
-        return results
+        Grupos OCO só ficam para ordens vivas: no perfil lowmem, oco=
+        precisa apontar para uma ordem ainda viva.
+        """
+        strategy = self.strategy
+        del strategy._orders[:]
+
+        broker = strategy.broker
+        broker.orders = [order for order in broker.orders if order.alive()]
+        children = broker._pchildren
+        for pref in [pref for pref, pc in children.items()
+                     if not any(order.alive() for order in pc)]:
+            del children[pref]
+
+        alive = {order.ref for order in broker.orders}
+        alive.update(order.ref for order in broker.pending if order is not None)
+        alive.update(order.ref for pc in children.values() for order in pc)
+        alive.update([broker._ocos[ref] for ref in alive if ref in broker._ocos])
+        for groups in (broker._ocos, broker._ocol):
+            for ref in [ref for ref in groups if ref not in alive]:
+                del groups[ref]
+
+        for datatrades in strategy._trades.values():
+            for trades in datatrades.values():
+                del trades[:-1]
+
+    def snapshot(self):
+        """
+        Resultado até a barra atual, no formato de get_analysis(). No modo
+        bounded é O(1) (acumulados correntes): usado a cada barra pelo
+        modo incremental (engine/tail_follow.py)
+        """
+        if self.p.bounded:
+            metrics = performance_metrics(self._wins + self._losses, self._wins, self._losses,
+                                          self._gross_profit, self._gross_loss)
+            max_dd_pct, max_dd_cash = self._max_dd_pct, self._max_dd_cash
+        else:
+            metrics = metrics_from_pnls(self.pnls)
+            max_dd_pct, max_dd_cash = max_drawdown(self.values)
+        return {
+            "metrics": metrics,
+            "max_dd_pct": max_dd_pct,
+            "max_dd_cash": max_dd_cash,
+            "trades": self.trades,
+        }
+
+    def stop(self):
+        self.rets = self.snapshot()
+
+    def get_analysis(self):
+        return self.rets
@@ -0,0 +1,245 @@
+# ===================================================
+# data_index.py
+# Índice de metadados do arquivo de dados (sidecar JSON)
+# ===================================================
+import os
+import json
+import hashlib
+from datetime import datetime, timedelta
+
+import numpy as np
+
+
+INDEX_VERSION = 1
+CACHE_DIRNAME = ".bar_cache"
+
+# Layout fixo do início de cada linha: "YYYYMMDD HHMMSS"
+DT_WIDTH = 15
+_EPOCH = datetime(1970, 1, 1)
+
+
+def cache_basename(datafile, cache_dir=None):
+    """
+    Caminho base (sem extensão) dos caches de um arquivo de dados:
+    <pasta do arquivo>/.bar_cache/<nome>_<hash do path>
+    """
+    datafile = os.path.abspath(datafile)
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(datafile), CACHE_DIRNAME)
+
+    name = os.path.splitext(os.path.basename(datafile))[0]
+    path_hash = hashlib.sha1(datafile.encode("utf-8")).hexdigest()[:10]
+    return os.path.join(cache_dir, f"{name}_{path_hash}".replace(" ", "_"))
+
+
+def parse_timestamps(fields):
+    """
+    Converte uma matriz (n, 15) de bytes "YYYYMMDD HHMMSS" em segundos
+    desde 1970 usando aritmética inteira (sem strptime).
+    """
+    d = fields.astype(np.int64) - 48  # ASCII '0'
+
+    year = d[:, 0] * 1000 + d[:, 1] * 100 + d[:, 2] * 10 + d[:, 3]
+    month = d[:, 4] * 10 + d[:, 5]
+    day = d[:, 6] * 10 + d[:, 7]
+    hour = d[:, 9] * 10 + d[:, 10]
+    minute = d[:, 11] * 10 + d[:, 12]
+    second = d[:, 13] * 10 + d[:, 14]
+
+    months = (year - 1970) * 12 + (month - 1)
+    days = (months.astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+            + day - 1)
+
+    return days * 86400 + hour * 3600 + minute * 60 + second
+
+
+def _ts_to_datetime(ts):
+    return _EPOCH + timedelta(seconds=int(ts))
+
+
+# ==========================================================
+# DATA INDEX
+# ==========================================================
+class DataIndex:
+    """
+    Metadados do arquivo de dados calculados UMA vez e guardados em
+    .bar_cache/<nome>_<hash>.index.json (validado por tamanho e mtime):
+
+    - primeiro / último timestamp
+    - intervalo das barras (moda das diferenças, em segundos)
+    - número de linhas
+    - offset em bytes (e linha) do início de cada dia
+
+    Pode ser passado pronto ao BacktestEngine (data_index=...) para que
+    o batch não releia o arquivo a cada combinação.
+
+    Carregado no primeiro uso (meta); sem permissão de escrita na pasta
+    do arquivo o índice fica só na memória do processo.
+    """
+
+    def __init__(self, datafile, cache_dir=None):
+        self.datafile = os.path.abspath(datafile)
+        self.index_file = cache_basename(self.datafile, cache_dir) + ".index.json"
+        self._meta = None
+
+    @property
+    def meta(self):
+        """Metadados (lidos do disco ou construídos no primeiro acesso)"""
+        if self._meta is None:
+            self.ensure()
+        return self._meta
+
+    # ------------------------------------------------------
+    def _read(self):
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def is_valid(self, meta=None):
+        """True se o índice em disco corresponde ao arquivo atual"""
+        meta = meta or self._read()
+        if meta is None or meta.get("version") != INDEX_VERSION:
+            return False
+
+        st = os.stat(self.datafile)
+        return st.st_size == meta["size"] and st.st_mtime_ns == meta["mtime_ns"]
+
+    def ensure(self):
+        """Carrega o índice do disco ou (re)constrói se inválido"""
+        meta = self._read()
+        if not self.is_valid(meta):
+            meta = self.build()
+        self._meta = meta
+        return self
+
+    # ------------------------------------------------------
+    def build(self, chunk_size=8 << 20):
+        """Varre o arquivo em blocos (vetorizado) e grava o índice (se der)"""
+        st = os.stat(self.datafile)
+
+        rows = 0
+        first_ts = last_ts = None
+        diff_counts = {}
+        days = []            # [YYYYMMDD, offset em bytes, linha]
+        last_day = None
+
+        def process(buf, starts, base_offset):
+            nonlocal rows, first_ts, last_ts, last_day
+
+            arr = np.frombuffer(buf, dtype=np.uint8)
+            fields = arr[starts[:, None] + np.arange(DT_WIDTH)]
+            ts = parse_timestamps(fields)
+
+            # Diferenças (inclui a fronteira com o bloco anterior)
+            prev = np.array([last_ts] if last_ts is not None else [], dtype=np.int64)
+            diffs = np.diff(np.concatenate((prev, ts)))
+            values, counts = np.unique(diffs, return_counts=True)
+            for v, c in zip(values.tolist(), counts.tolist()):
+                diff_counts[v] = diff_counts.get(v, 0) + c
+
+            # Início de cada dia
+            day_num = ts // 86400
+            change = np.flatnonzero(np.diff(np.concatenate(
+                ([last_day if last_day is not None else -1], day_num))) != 0)
+            for k in change.tolist():
+                days.append([
+                    bytes(fields[k, :8]).decode("ascii"),
+                    int(base_offset + starts[k]),
+                    rows + k,
+                ])
+
+            if first_ts is None:
+                first_ts = int(ts[0])
+            last_ts = int(ts[-1])
+            last_day = int(day_num[-1])
+            rows += len(ts)
+
+        with open(self.datafile, "rb") as f:
+            carry = b""
+            base_offset = 0
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+
+                buf = carry + chunk
+                arr = np.frombuffer(buf, dtype=np.uint8)
+                newlines = np.flatnonzero(arr == 10)
+                if len(newlines) == 0:
+                    carry = buf
+                    continue
+
+                starts = np.concatenate(([0], newlines[:-1] + 1))
+                lengths = newlines - starts
+                starts = starts[lengths >= DT_WIDTH]   # ignora linhas vazias
+                if len(starts):
+                    process(buf, starts, base_offset)
+
+                consumed = int(newlines[-1]) + 1
+                carry = buf[consumed:]
+                base_offset += consumed
+
+            if len(carry.strip()) >= DT_WIDTH:
+                process(carry, np.array([0]), base_offset)
+
+        if rows == 0:
+            raise ValueError(f"Arquivo de dados vazio: {self.datafile}")
+
+        # Moda das diferenças (empate -> menor valor, como pandas.mode)
+        interval = 0
+        if diff_counts:
+            best = max(diff_counts.values())
+            interval = min(v for v, c in diff_counts.items() if c == best)
+
+        meta = {
+            "version": INDEX_VERSION,
+            "path": self.datafile,
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "rows": rows,
+            "first_ts": first_ts,
+            "last_ts": last_ts,
+            "interval_seconds": interval,
+            "days": days,
+        }
+
+        tmp = f"{self.index_file}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.index_file), exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            os.replace(tmp, self.index_file)
+        except OSError:
+            # Pasta só leitura: o índice vale para este processo, sem sidecar
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+        return meta
+
+    # ------------------------------------------------------
+    @property
+    def start(self):
+        return _ts_to_datetime(self.meta["first_ts"])
+
+    @property
+    def end(self):
+        return _ts_to_datetime(self.meta["last_ts"])
+
+    @property
+    def rows(self):
+        return self.meta["rows"]
+
+    @property
+    def interval_seconds(self):
+        return self.meta["interval_seconds"]
+
+    @property
+    def days(self):
+        """Lista de [YYYYMMDD, offset em bytes, linha] (um item por dia)"""
+        return self.meta["days"]
+
+    def timeframe_minutes(self):
+        """Timeframe detectado do arquivo (em minutos)"""
+        return self.interval_seconds // 60
@@ -0,0 +1,449 @@
+# ===================================================
+# distributed.py
+# Batch distribuído: coordenador TCP + workers (várias máquinas ou
+# vários processos locais), sem broker externo
+# ===================================================
+import os
+import time
+import queue
+import socket
+import secrets
+import ipaddress
+import itertools
+import threading
+import multiprocessing
+from collections import deque
+from multiprocessing.connection import AuthenticationError, Client, Listener
+
+from engine.batch_runner import _error_row, _run_chunk_task
+
+
+DEFAULT_PORT = 5555
+
+# Sem notícia do worker por lease_timeout segundos -> chunk volta para a fila
+# (worker que cai fecha a conexão e devolve os chunks na hora)
+LEASE_TIMEOUT = 300.0
+
+# Tentativas por combinação antes de virar linha de erro
+MAX_ATTEMPTS = 3
+
+# Intervalo do worker sem tarefa (fila vazia, rodada da busca em andamento)
+POLL_INTERVAL = 0.5
+
+
+class WorkerLost(RuntimeError):
+    """Combinação cujo worker caiu (ou sumiu) em todas as tentativas"""
+
+
+def parse_address(text, default_host="127.0.0.1"):
+    """"host:porta", ":porta" ou "porta" -> (host, porta)"""
+    if isinstance(text, (tuple, list)):
+        return text[0], int(text[1])
+    host, _, port = str(text).rpartition(":")
+    return host or default_host, int(port or DEFAULT_PORT)
+
+
+def is_loopback(host):
+    """True se o host só aceita conexões da própria máquina"""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def normalize_distributed(config):
+    """
+    Valida a configuração do modo distribuído do batch.
+
+    Aceita:
+        true                                   -> 127.0.0.1:5555, sem workers locais
+        {"listen": "0.0.0.0:5555", "authkey": "segredo"}
+        {"local_workers": 4, "lease_timeout": 120}
+
+    As mensagens são pickle (jobs e a classe da estratégia): quem se
+    conecta com a chave executa código nos workers. Sem "authkey", só
+    no loopback, com uma chave aleatória ("authkey_generated": True,
+    impressa para os workers da mesma máquina); fora do loopback a
+    chave é obrigatória.
+
+    Returns:
+        dict normalizado ou None (desligado)
+    """
+    if not config:
+        return None
+    if config is True:
+        config = {}
+
+    known = {"listen", "authkey", "lease_timeout", "max_attempts", "local_workers"}
+    unknown = set(config) - known
+    if unknown:
+        raise ValueError(f"Opções de distributed desconhecidas: {sorted(unknown)}")
+
+    address = parse_address(config.get("listen", f"127.0.0.1:{DEFAULT_PORT}"))
+    authkey = config.get("authkey")
+    generated = not authkey
+    if generated:
+        if not is_loopback(address[0]):
+            raise ValueError(
+                f"distributed: listen em {address[0]}:{address[1]} (fora do loopback) "
+                "exige authkey; as mensagens são pickle e quem conecta executa "
+                "código nos workers")
+        authkey = secrets.token_hex(16)
+    distributed = {
+        "address": address,
+        "authkey": authkey.encode("utf-8") if isinstance(authkey, str) else bytes(authkey),
+        "authkey_generated": generated,
+        "lease_timeout": float(config.get("lease_timeout", LEASE_TIMEOUT)),
+        "max_attempts": int(config.get("max_attempts", MAX_ATTEMPTS)),
+        "local_workers": int(config.get("local_workers", 0)),
+    }
+    if distributed["lease_timeout"] <= 0:
+        raise ValueError("lease_timeout deve ser > 0")
+    if distributed["max_attempts"] < 1:
+        raise ValueError("max_attempts deve ser >= 1")
+    return distributed
+
+
+# ==========================================================
+# FILA COM LEASES
+# ==========================================================
+class WorkQueue:
+    """
+    Fila de chunks com lease: um chunk emprestado a um worker volta para a
+    fila se o worker cair (release) ou não renovar o lease a tempo (expire).
+
+    - Chunk que falhou e tem várias combinações volta dividido (uma por
+      tarefa): só a combinação culpada esgota as tentativas
+    - Combinação que falhou max_attempts vezes sai como evento "failed"
+    - Resultado de um lease já expirado é descartado (a combinação roda
+      de novo em outro worker e só uma linha é emitida)
+
+    Eventos em self.events: ("rows", [(idx, row), ...]) e
+    ("failed", tarefa, motivo).
+    """
+
+    def __init__(self, lease_timeout=LEASE_TIMEOUT, max_attempts=MAX_ATTEMPTS):
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max_attempts
+        self.events = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending = deque()
+        self._leases = {}            # lease_id -> [tarefa, worker, prazo]
+        self._lease_ids = itertools.count(1)
+
+    def put(self, indices, combos, profiling=None):
+        task = {"indices": list(indices), "combos": list(combos),
+                "profiling": profiling, "attempts": 0}
+        with self._lock:
+            self._pending.append(task)
+
+    def lease(self, worker):
+        """(lease_id, tarefa) para o worker, ou None com a fila vazia"""
+        with self._lock:
+            if not self._pending:
+                return None
+            task = self._pending.popleft()
+            lease_id = next(self._lease_ids)
+            self._leases[lease_id] = [task, worker, time.monotonic() + self.lease_timeout]
+            return lease_id, task
+
+    def renew(self, lease_id):
+        with self._lock:
+            entry = self._leases.get(lease_id)
+            if entry is not None:
+                entry[2] = time.monotonic() + self.lease_timeout
+
+    def complete(self, lease_id, rows):
+        """Registra o resultado; False se o lease já tinha expirado"""
+        with self._lock:
+            if self._leases.pop(lease_id, None) is None:
+                return False
+            self.events.put(("rows", rows))
+            return True
+
+    def release(self, worker, reason):
+        """Devolve à fila os chunks de um worker que caiu"""
+        with self._lock:
+            lost = [lid for lid, entry in self._leases.items() if entry[1] == worker]
+            for lease_id in lost:
+                self._requeue(self._leases.pop(lease_id)[0], reason)
+        return len(lost)
+
+    def expire(self):
+        """Devolve à fila os chunks com lease vencido"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [lid for lid, entry in self._leases.items() if entry[2] < now]
+            for lease_id in expired:
+                task, worker, _ = self._leases.pop(lease_id)
+                self._requeue(task, f"lease expirou ({worker})")
+        return len(expired)
+
+    def _requeue(self, task, reason):
+        task["attempts"] += 1
+        if task["attempts"] >= self.max_attempts:
+            self.events.put(("failed", task, reason))
+        elif len(task["indices"]) > 1:
+            self._pending.extendleft(reversed([
+                {"indices": [idx], "combos": [combo], "profiling": None,
+                 "attempts": task["attempts"]}
+                for idx, combo in zip(task["indices"], task["combos"])
+            ]))
+        else:
+            self._pending.appendleft(task)
+
+
+# ==========================================================
+# COORDENADOR
+# ==========================================================
+class Coordinator:
+    """
+    Servidor TCP (multiprocessing.connection, autenticado por authkey)
+    que distribui os chunks do batch aos workers conectados.
+
+    Protocolo (mensagens pickle):
+        worker -> ("hello", nome)         coordenador -> ("job", job, lease_timeout)
+        worker -> ("lease",)              coordenador -> ("task", lease_id, índices,
+                                                          combinações, profiling)
+                                                         | ("wait", s) | ("done",)
+        worker -> ("renew", lease_id)     (heartbeat enquanto roda o chunk)
+        worker -> ("result", lease_id, [(idx, linha), ...])
+
+    O job vai uma vez por conexão; a classe da estratégia viaja por
+    referência (o worker precisa do mesmo código). Paths relativos
+    (dados, logs de trades, profiling) são do diretório de cada worker.
+    """
+
+    def __init__(self, job, address=("127.0.0.1", DEFAULT_PORT), authkey=None,
+                 lease_timeout=LEASE_TIMEOUT, max_attempts=MAX_ATTEMPTS, local_workers=0):
+        self.job = job
+        self.address = parse_address(address)
+        # Sem chave: aleatória (só os workers locais, que a recebem, conectam)
+        self.authkey = authkey or secrets.token_bytes(32)
+        self.lease_timeout = lease_timeout
+        self.local_workers = local_workers
+        self.queue = WorkQueue(lease_timeout, max_attempts)
+        self.workers = set()
+        self.seen = set()
+        self._listener = None
+        self._closed = False
+        self._lock = threading.Lock()
+        self._worker_ids = itertools.count(1)
+        self._processes = []
+
+    # ------------------------------------------------------
+    def start(self):
+        """Abre a porta, sobe os workers locais e começa a aceitar conexões"""
+        self._listener = Listener(self.address, authkey=self.authkey)
+        self.address = self._listener.address
+
+        # Workers locais antes de qualquer thread (fork seguro)
+        ctx = multiprocessing.get_context()
+        for n in range(self.local_workers):
+            process = ctx.Process(
+                target=run_worker,
+                args=(self.address, self.authkey),
+                kwargs={"name": f"local-{n + 1}", "verbose": False},
+                daemon=True,
+            )
+            process.start()
+            self._processes.append(process)
+
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        return self
+
+    def close(self, timeout=10.0):
+        """Encerra: workers recebem "done" no próximo pedido; locais são aguardados"""
+        self._closed = True
+        deadline = time.monotonic() + timeout
+        for process in self._processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.terminate()
+        if self._listener is not None:
+            self._listener.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------------------------------------------
+    def map(self, tasks):
+        """
+        Publica os chunks e devolve (idx, linha) conforme os workers
+        terminam. Bloqueia até todas as combinações voltarem.
+
+        Args:
+            tasks: lista de (índices, combinações, profiling)
+        """
+        total = 0
+        for indices, combos, profiling in tasks:
+            self.queue.put(indices, combos, profiling)
+            total += len(indices)
+
+        received = 0
+        while received < total:
+            try:
+                event = self.queue.events.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                self.queue.expire()
+                continue
+
+            if event[0] == "rows":
+                rows = event[1]
+            else:
+                _, task, reason = event
+                error = WorkerLost(f"{task['attempts']} tentativas sem resultado: {reason}")
+                rows = [(idx, _error_row(self.job, combo, error))
+                        for idx, combo in zip(task["indices"], task["combos"])]
+
+            received += len(rows)
+            yield from rows
+
+    # ------------------------------------------------------
+    def _accept_loop(self):
+        while not self._closed:
+            try:
+                conn = self._listener.accept()
+            except AuthenticationError:
+                continue
+            except OSError:
+                return  # listener fechado
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        """Atende um worker até ele sair (ou cair)"""
+        worker = None
+        try:
+            kind, name = conn.recv()
+            if kind != "hello":
+                return
+            worker = f"{name}#{next(self._worker_ids)}"
+            with self._lock:
+                self.workers.add(worker)
+                self.seen.add(worker)
+            conn.send(("job", self.job, self.lease_timeout))
+
+            while True:
+                message = conn.recv()
+                kind = message[0]
+                if kind == "lease":
+                    if self._closed:
+                        conn.send(("done",))
+                        return
+                    leased = self.queue.lease(worker)
+                    if leased is None:
+                        conn.send(("wait", POLL_INTERVAL))
+                    else:
+                        lease_id, task = leased
+                        conn.send(("task", lease_id, task["indices"], task["combos"],
+                                   task["profiling"]))
+                elif kind == "renew":
+                    self.queue.renew(message[1])
+                elif kind == "result":
+                    self.queue.complete(message[1], message[2])
+        except (EOFError, OSError):
+            pass  # worker caiu: os chunks dele voltam para a fila abaixo
+        finally:
+            if worker is not None:
+                self.queue.release(worker, f"conexão perdida ({worker})")
+                with self._lock:
+                    self.workers.discard(worker)
+            conn.close()
+
+
+# ==========================================================
+# WORKER
+# ==========================================================
+def _connect(address, authkey, timeout):
+    """Conecta ao coordenador, tentando de novo até `timeout` segundos"""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return Client(address, authkey=authkey)
+        except (ConnectionRefusedError, FileNotFoundError):
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(POLL_INTERVAL)
+
+
+def _heartbeat(send, lease_id, stop, interval):
+    """Renova o lease enquanto o chunk roda"""
+    while not stop.wait(interval):
+        try:
+            send(("renew", lease_id))
+        except (OSError, EOFError):
+            return
+
+
+def run_worker(address, authkey, name=None, connect_timeout=30.0,
+               verbose=True):
+    """
+    Worker: pega chunks do coordenador, roda (BatchRunner._run_chunk) e
+    devolve as linhas, até o coordenador mandar "done" ou sair.
+
+    Args:
+        address: (host, porta) ou "host:porta" do coordenador
+        authkey: chave compartilhada com o coordenador (bytes ou str)
+        name: nome do worker nos logs (padrão: host:pid)
+        connect_timeout: segundos tentando conectar (coordenador subindo)
+
+    Returns:
+        número de combinações executadas
+    """
+    address = parse_address(address)
+    if isinstance(authkey, str):
+        authkey = authkey.encode("utf-8")
+    name = name or f"{socket.gethostname()}:{os.getpid()}"
+
+    conn = _connect(address, authkey, connect_timeout)
+    lock = threading.Lock()
+
+    def send(message):
+        with lock:
+            conn.send(message)
+
+    done = 0
+    try:
+        send(("hello", name))
+        _, job, lease_timeout = conn.recv()
+        if verbose:
+            print(f"🛰️ Worker {name} conectado a {address[0]}:{address[1]}")
+
+        while True:
+            send(("lease",))
+            message = conn.recv()
+            if message[0] == "done":
+                break
+            if message[0] == "wait":
+                time.sleep(message[1])
+                continue
+
+            _, lease_id, indices, combos, profiling = message
+            stop = threading.Event()
+            beat = threading.Thread(target=_heartbeat,
+                                    args=(send, lease_id, stop, lease_timeout / 3),
+                                    daemon=True)
+            beat.start()
+            try:
+                rows = _run_chunk_task((indices, job, combos, profiling))
+            finally:
+                stop.set()
+                beat.join()
+
+            send(("result", lease_id, rows))
+            done += len(rows)
+            if verbose:
+                print(f"✅ {name}: {len(rows)} combinações (total {done})")
+    except (EOFError, OSError):
+        pass  # coordenador encerrou
+    finally:
+        conn.close()
+
+    if verbose:
+        print(f"🏁 Worker {name}: {done} combinações executadas")
+    return done
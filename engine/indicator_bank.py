@@ -0,0 +1,194 @@
+# ===================================================
+# indicator_bank.py
+# Banco de indicadores pré-calculados (vetorizado) para o grid inteiro
+# ===================================================
+from array import array
+
+import numpy as np
+import backtrader as bt
+from backtrader.lineseries import LineSeriesStub
+
+from engine.memo import LRUMemo
+from engine.shared_cerebro import _walk
+from engine.vector_engine import sma_many, vector_spec
+
+
+# Indicadores do banco: classe do Backtrader -> (nome, param, cálculo em lote).
+# bt.indicators.SMA é um Average ligado à linha "sma": o banco entra no
+# Average e o SMA (e qualquer indicador montado sobre um Average de uma
+# linha do feed) recebe os valores pela ligação normal do Backtrader
+BANK_INDICATORS = {
+    bt.indicators.Average: ("sma", "period", sma_many),
+}
+
+# Nome do indicador na declaração `vector` -> nome no banco
+_VECTOR_NAMES = {"sma": "sma"}
+
+# Memo por processo: origem das barras -> {(nome, param): série}. Limitado
+# (LRU) às origens mais recentes: um worker que passa por vários arquivos,
+# timeframes ou janelas não guarda os bancos de todos
+BANKS_MAX = 8
+_BANKS = LRUMemo(BANKS_MAX)
+
+
+def bank_requests(strategy_class, fixed_params=None, variable_params=None):
+    """
+    Séries que o grid vai pedir, a partir da declaração `vector` da
+    estratégia (engine/vector_engine.py) e dos params do batch.
+
+    Ex: entry=("close", ">", ("sma", "sma_period")) com
+    variable={"sma_period": [10, 20, 50]} -> {"sma": [10, 20, 50]}
+
+    Returns:
+        dict nome -> lista ordenada de valores do param ({} sem `vector`)
+    """
+    spec = vector_spec(strategy_class)
+    if spec is None:
+        return {}
+
+    fixed_params = fixed_params or {}
+    variable_params = variable_params or {}
+    defaults = dict(strategy_class.params._getitems())
+
+    requests = {}
+    for operand in spec["entry"][::2]:
+        if isinstance(operand, str) or operand[0] not in _VECTOR_NAMES:
+            continue
+        name, param = operand
+        if param in variable_params:
+            values = variable_params[param]
+        else:
+            values = [fixed_params.get(param, defaults.get(param))]
+        requests.setdefault(_VECTOR_NAMES[name], set()).update(
+            v for v in values if v is not None)
+
+    return {name: sorted(values) for name, values in requests.items()}
+
+
+# ==========================================================
+# BANCO
+# ==========================================================
+class IndicatorBank:
+    """
+    Séries de indicadores de UMA origem de barras (arquivo, timeframe e
+    fatia), calculadas em lote e guardadas no processo: todas as
+    combinações do grid (e todos os chunks do mesmo worker) copiam daqui.
+
+    Args:
+        source: chave da origem (ex: (datafile, timeframe, start, end))
+        requests: bank_requests(), calculado junto no primeiro uso
+    """
+
+    def __init__(self, source, requests=None):
+        self.source = source
+        self.requests = requests or {}
+
+    def series(self, line_key, name, value, values):
+        """
+        Série (nome, param) sobre a linha `line_key` do feed. Na primeira
+        vez calcula junto tudo o que foi pedido para aquela linha.
+
+        Args:
+            values: linha do feed já pré-carregada (array("d"))
+        """
+        bank = _BANKS.setdefault((self.source, line_key, len(values)), {})
+        if (name, value) not in bank:
+            compute = next(c for n, _, c in BANK_INDICATORS.values() if n == name)
+            wanted = {value, *self.requests.get(name, ())}
+            wanted -= {v for n, v in bank if n == name}
+            source = np.frombuffer(values, dtype=np.float64)
+            for v, result in compute(source, sorted(wanted)).items():
+                bank[(name, v)] = result
+        return bank[(name, value)]
+
+
+def attach_bank(strategy, bank):
+    """
+    Troca o cálculo (_once) dos indicadores do banco na estratégia por
+    uma cópia da série pré-calculada. Só indicadores sobre uma linha do
+    feed; os demais seguem calculados pelo Backtrader.
+
+    Returns:
+        quantos indicadores vieram do banco
+    """
+    lines = {}
+    for i, data in enumerate(strategy.datas):
+        for alias, line in zip(data.lines.getlinealiases(), data.lines):
+            lines[id(line)] = (i, alias)
+
+    banked = 0
+    for indicator in _walk(strategy):
+        entry = BANK_INDICATORS.get(type(indicator))
+        if entry is None or len(indicator.datas) != 1:
+            continue
+        # Linha solta (stub) ou o próprio feed (SMA(self.data)): linha 0 (close)
+        source = indicator.datas[0]
+        if isinstance(source, (LineSeriesStub, bt.AbstractDataBase)):
+            source = source.lines[0]
+        line_key = lines.get(id(source))
+        if line_key is None:
+            continue
+
+        name, param, _ = entry
+        value = getattr(indicator.params, param)
+        indicator._once = _banked_once(indicator, bank, line_key, name, value, source)
+        banked += 1
+    return banked
+
+
+def _banked_once(indicator, bank, line_key, name, value, source):
+    """_once do indicador: mesmo roteiro do LineIterator._once, com a série do banco"""
+    compute = indicator._once
+
+    def _once():
+        size = indicator._clock.buflen()
+        if len(source.array) != size:  # linha com lookahead/extensão: cálculo normal
+            return compute()
+
+        indicator.forward(size=size)
+        for data in indicator.datas:
+            data.home()
+        indicator.home()
+
+        values = array("d")
+        values.frombytes(bank.series(line_key, name, value, source.array).tobytes())
+        line = indicator.lines[0]
+        line.array[:] = values
+        line.oncebinding()
+
+    return _once
+
+
+# ==========================================================
+# ANALYZER (liga o banco antes do runonce)
+# ==========================================================
+class IndicatorBankAnalyzer(bt.Analyzer):
+    """
+    Liga o banco nos indicadores da estratégia. Os analyzers começam
+    (start) depois do __init__ da estratégia e antes do runonce do
+    Cerebro: a troca vale para o cálculo dos indicadores.
+
+    Só tem efeito com preload + runonce (perfis full/lean); no lowmem os
+    indicadores seguem barra a barra.
+
+    get_analysis() -> {"banked": indicadores servidos pelo banco}
+    """
+
+    params = (
+        ("bank", None),
+    )
+
+    def start(self):
+        self.rets = {"banked": 0}
+        cerebro = self.strategy.cerebro
+        if cerebro._dopreload and cerebro._dorunonce:
+            self.rets["banked"] = attach_bank(self.strategy, self.p.bank)
+
+    # Nada por barra
+    def _prenext(self):
+        pass
+
+    _nextstart = _next = _prenext
+
+    def get_analysis(self):
+        return self.rets
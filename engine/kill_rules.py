@@ -0,0 +1,127 @@
+# ===================================================
+# kill_rules.py
+# Regras de parada antecipada (poda de combinações sem chance)
+# ===================================================
+import time
+
+import backtrader as bt
+
+
+# Regras aceitas em "kill" no config do batch
+KILL_RULES = (
+    "max_dd_pct",       # drawdown % acima do limite
+    "equity_floor",     # valor da conta abaixo do piso
+    "min_trades",       # mínimo de trades abertos a cada `trades_window` barras
+    "trades_window",
+    "timeout",          # segundos de relógio por combinação
+)
+
+
+def normalize_kill_rules(rules):
+    """
+    Valida o dict de regras e remove as vazias.
+
+    Returns:
+        dict só com as regras ativas, ou None se nenhuma
+    """
+    if not rules:
+        return None
+
+    unknown = set(rules) - set(KILL_RULES)
+    if unknown:
+        raise ValueError(f"Regras de parada desconhecidas: {sorted(unknown)}")
+
+    rules = {k: v for k, v in rules.items() if v is not None}
+    if ("min_trades" in rules) != ("trades_window" in rules):
+        raise ValueError("min_trades e trades_window precisam vir juntos")
+
+    return rules or None
+
+
+# ----------------------------------------------------------
+# Mensagens (iguais no Backtrader e no vetorizado)
+# ----------------------------------------------------------
+def dd_reason(drawdown, limit, bar):
+    return f"max_dd_pct: {drawdown:.2f}% > {limit}% (barra {bar})"
+
+
+def floor_reason(value, limit, bar):
+    return f"equity_floor: {value:,.2f} < {limit:,} (barra {bar})"
+
+
+def trades_reason(trades, needed, bar):
+    return f"min_trades: {trades} < {needed} trades (barra {bar})"
+
+
+def timeout_reason(seconds, limit, bar):
+    return f"timeout: {seconds:.1f}s > {limit}s (barra {bar})"
+
+
+# ==========================================================
+# KILL SWITCH
+# ==========================================================
+class KillSwitch(bt.Analyzer):
+    """
+    Confere as regras a cada barra (inclusive no aquecimento) e, na
+    primeira violada, para o Cerebro (runstop). O motivo fica em
+    get_analysis()["reason"].
+
+    Ordem de checagem na mesma barra: drawdown, piso, trades, timeout.
+    """
+
+    params = dict(
+        max_dd_pct=None,
+        equity_floor=None,
+        min_trades=None,
+        trades_window=None,
+        timeout=None,
+    )
+
+    def start(self):
+        self.peak = float("-inf")
+        self.opened = 0
+        self.reason = None
+        self.bar = None
+        self.t0 = time.perf_counter()
+
+    def notify_trade(self, trade):
+        if trade.justopened:
+            self.opened += 1
+
+    def next(self):
+        if self.reason is not None:
+            return
+
+        bar = len(self.strategy)
+        value = self.strategy.broker.getvalue()
+        self.peak = max(self.peak, value)
+
+        if self.p.max_dd_pct is not None:
+            drawdown = 100.0 * (self.peak - value) / self.peak
+            if drawdown > self.p.max_dd_pct:
+                return self._prune(dd_reason(drawdown, self.p.max_dd_pct, bar), bar)
+
+        if self.p.equity_floor is not None and value < self.p.equity_floor:
+            return self._prune(floor_reason(value, self.p.equity_floor, bar), bar)
+
+        if self.p.min_trades is not None and bar % self.p.trades_window == 0:
+            needed = self.p.min_trades * (bar // self.p.trades_window)
+            if self.opened < needed:
+                return self._prune(trades_reason(self.opened, needed, bar), bar)
+
+        if self.p.timeout is not None:
+            elapsed = time.perf_counter() - self.t0
+            if elapsed > self.p.timeout:
+                return self._prune(timeout_reason(elapsed, self.p.timeout, bar), bar)
+
+    def _prune(self, reason, bar):
+        self.reason = reason
+        self.bar = bar
+        self.strategy.env.runstop()
+
+    def get_analysis(self):
+        return {
+            "pruned": self.reason is not None,
+            "reason": self.reason,
+            "bar": self.bar,
+        }
@@ -0,0 +1,37 @@
+# ===================================================
+# memo.py
+# Memo por processo com limite de entradas (LRU)
+# ===================================================
+from collections import OrderedDict
+
+
+class LRUMemo(OrderedDict):
+    """
+    dict que guarda no máximo `maxsize` entradas: ao passar do limite
+    descarta a usada há mais tempo. Ler (memo[key]) ou gravar conta como
+    uso; `key in memo` não.
+
+    Para os memos globais do processo (bar_store, indicator_bank): um
+    worker que passa por muitos arquivos, timeframes ou janelas de
+    walk-forward não acumula todos na memória.
+    """
+
+    def __init__(self, maxsize):
+        super().__init__()
+        self.maxsize = maxsize
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        self.move_to_end(key)
+        return value
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        while len(self) > self.maxsize:
+            self.popitem(last=False)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
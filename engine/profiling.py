@@ -0,0 +1,212 @@
+# ===================================================
+# profiling.py
+# Tempo por fase do backtest + cProfile/tracemalloc opcionais
+# ===================================================
+import os
+import io
+import time
+import pstats
+import cProfile
+import tracemalloc
+from contextlib import contextmanager
+
+import backtrader as bt
+
+
+# Fases medidas em BacktestEngine.run (exclusivas: somam o tempo medido)
+#   metadata  : índice do arquivo (datas, timeframe)
+#   setup     : Cerebro, feeds, broker e analyzers (feed="array" em 1m:
+#               inclui o parse do texto)
+#   resample  : série resampleada do cache (feed="store") ou em memória
+#               (feed="array", inclui o parse do texto)
+#   feed      : carga das barras (parse do CSV / cópia dos arrays; no
+#               feed="csv" com resample inclui o resample do Backtrader).
+#               Sem preload, a carga barra a barra só sai do loop com timings
+#   strategy  : loop do Cerebro (estratégia, indicadores, broker e, sem
+#               timings, os analyzers)
+#   analyzers : chamadas dos analyzers (só com timings: AnalyzerTimer)
+#   output    : gravação do log de trades
+PHASES = ("metadata", "setup", "resample", "feed", "strategy", "analyzers", "output")
+
+
+# ==========================================================
+# TEMPO POR FASE
+# ==========================================================
+class PhaseTimer:
+    """
+    Cronômetro de fases aninháveis: ao entrar numa fase, a fase de fora
+    para de contar (tempos exclusivos, sem dupla contagem).
+    """
+
+    def __init__(self):
+        self.timings = dict.fromkeys(PHASES, 0.0)
+        self._stack = []
+        self._mark = None
+
+    def _switch(self):
+        now = time.perf_counter()
+        if self._stack:
+            self.timings[self._stack[-1]] += now - self._mark
+        self._mark = now
+
+    def enter(self, phase):
+        self._switch()
+        self._stack.append(phase)
+
+    def exit(self):
+        self._switch()
+        self._stack.pop()
+
+    @contextmanager
+    def phase(self, phase):
+        self.enter(phase)
+        try:
+            yield
+        finally:
+            self.exit()
+
+    def wrap(self, phase, fn):
+        """fn cronometrada como `phase` (chamadas já dentro da fase não pagam o custo)"""
+        stack = self._stack
+
+        def timed(*args, **kwargs):
+            if stack and stack[-1] == phase:
+                return fn(*args, **kwargs)
+            self.enter(phase)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.exit()
+
+        return timed
+
+    def flush(self):
+        """Contabiliza o trecho em andamento (para ler os tempos no meio de uma fase)"""
+        self._switch()
+        return dict(self.timings)
+
+
+class AnalyzerTimer(bt.Analyzer):
+    """
+    Analyzer "gancho": no start() envolve os métodos dos outros analyzers
+    da estratégia para que o tempo deles conte como fase "analyzers".
+    Deve ser o primeiro analyzer adicionado.
+    """
+
+    params = (("timer", None),)
+
+    # Métodos que a Strategy chama nos analyzers a cada barra / evento
+    HOOKED = ("_prenext", "_nextstart", "_next", "_notify_cashvalue",
+              "_notify_fund", "_notify_order", "_notify_trade", "_stop")
+
+    def start(self):
+        timer = self.p.timer
+        for analyzer in self.strategy.analyzers:
+            if analyzer is self:
+                continue
+            for name in self.HOOKED:
+                setattr(analyzer, name, timer.wrap("analyzers", getattr(analyzer, name)))
+
+    def get_analysis(self):
+        return {}
+
+
+# ==========================================================
+# PROFILING OPCIONAL (cProfile / tracemalloc)
+# ==========================================================
+PROFILE_TOOLS = ("cprofile", "tracemalloc")
+
+
+def normalize_profiling(config):
+    """
+    Valida a configuração de profiling do batch.
+
+    Aceita:
+        {"every": 100}                   -> cProfile a cada 100 combinações
+        {"combos": [1, 250], "tracemalloc": true, "cprofile": false}
+        {"every": 50, "dir": "results/prof", "top": 40}
+
+    Returns:
+        dict normalizado ou None (desligado)
+    """
+    if not config:
+        return None
+
+    known = {"every", "combos", "cprofile", "tracemalloc", "dir", "top"}
+    unknown = set(config) - known
+    if unknown:
+        raise ValueError(f"Opções de profiling desconhecidas: {sorted(unknown)}")
+
+    profiling = {
+        "every": int(config["every"]) if config.get("every") else None,
+        "combos": {int(n) for n in config.get("combos", [])},
+        "cprofile": bool(config.get("cprofile", True)),
+        "tracemalloc": bool(config.get("tracemalloc", False)),
+        "dir": config.get("dir"),
+        "top": int(config.get("top", 25)),
+    }
+    if not profiling["every"] and not profiling["combos"]:
+        raise ValueError("Profiling precisa de 'every' ou 'combos'")
+    if not profiling["cprofile"] and not profiling["tracemalloc"]:
+        raise ValueError("Profiling sem ferramenta (cprofile e tracemalloc desligados)")
+    return profiling
+
+
+def wants_profile(profiling, number):
+    """A combinação de número `number` (1, 2, ...) deve ser perfilada?"""
+    if profiling is None:
+        return False
+    if number in profiling["combos"]:
+        return True
+    every = profiling["every"]
+    return bool(every) and number % every == 0
+
+
+@contextmanager
+def profiled(path, cprofile=True, trace_memory=False, top=25, header=None):
+    """
+    Roda o bloco sob cProfile e/ou tracemalloc e grava, com `path` como base:
+
+        <path>.prof   estatísticas do cProfile (pstats / snakeviz)
+        <path>.mem    snapshot do tracemalloc (tracemalloc.Snapshot.load)
+        <path>.txt    resumo: `header`, top funções (tempo acumulado)
+                      e top linhas por memória alocada
+
+    Nenhuma edição na estratégia ou nos analyzers: tudo que roda dentro
+    do bloco aparece no perfil.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    profiler = cProfile.Profile() if cprofile else None
+    started_trace = trace_memory and not tracemalloc.is_tracing()
+    if started_trace:
+        tracemalloc.start(25)
+    if profiler is not None:
+        profiler.enable()
+
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        snapshot = tracemalloc.take_snapshot() if trace_memory else None
+        if started_trace:
+            tracemalloc.stop()
+
+        summary = io.StringIO()
+        if header:
+            summary.write(f"{header}\n\n")
+
+        if profiler is not None:
+            profiler.dump_stats(path + ".prof")
+            stats = pstats.Stats(profiler, stream=summary)
+            stats.sort_stats("cumulative").print_stats(top)
+
+        if snapshot is not None:
+            snapshot.dump(path + ".mem")
+            summary.write(f"Top {top} linhas por memória alocada:\n")
+            for stat in snapshot.statistics("lineno")[:top]:
+                summary.write(f"  {stat}\n")
+
+        with open(path + ".txt", "w", encoding="utf-8") as f:
+            f.write(summary.getvalue())
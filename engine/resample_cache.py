@@ -0,0 +1,197 @@
+# ===================================================
+# resample_cache.py
+# Resample 1m -> Nm feito uma vez por timeframe (arrays NumPy)
+# ===================================================
+from datetime import datetime, time, timedelta
+
+import numpy as np
+from backtrader.utils import date2num
+
+from engine.array_feed import EPOCH, timestamps_to_num
+
+
+# Fim de sessão padrão dos feeds do Backtrader (sessionend=None)
+SESSION_END = time(23, 59, 59, 999990)
+
+
+def _eos(day):
+    """Fim de sessão do dia (dias desde 1970): (segundos, data numérica)"""
+    dt = datetime.combine(EPOCH.date() + timedelta(days=day), SESSION_END)
+    return day * 86400 + 86399, date2num(dt)
+
+
+def _rollovers(days, onedge):
+    """
+    Barras 1m que fecham a barra aberta pela virada de sessão (_nexteos).
+
+    O _nexteos só avança numa virada: passa a ser o dia da barra 1m
+    seguinte. Por isso basta uma busca (searchsorted) por sessão, e não
+    uma passada barra a barra. Se a primeira barra depois do fim da
+    sessão estiver na borda exata (ex: 00:00), ou vier logo depois de
+    uma, o _nexteos fica parado e não há mais viradas por fim de sessão.
+
+    Returns:
+        índices (int64) das barras 1m em que a virada acontece
+    """
+    n = len(days)
+    rolls = []
+    eos_day = days[0]
+    while True:
+        k = int(np.searchsorted(days, eos_day, side="right"))
+        if k >= n or onedge[k] or onedge[k - 1]:
+            break
+        rolls.append(k)
+        if k + 1 >= n:
+            break
+        eos_day = days[k + 1]
+    return np.asarray(rolls, dtype=np.int64)
+
+
+def resample_groups(timestamps, compression):
+    """
+    Reproduz a máquina de estados do Resampler do Backtrader
+    (bar2edge/adjbartime/rightedge = True, sem calendário) para
+    Minutes/compression e devolve os grupos de barras 1m.
+
+    Vetorizado: as fronteiras saem da comparação dos blocos de minutos
+    do dia entre barras vizinhas e das viradas de sessão (_rollovers).
+    Inclui os comportamentos não óbvios do Backtrader:
+    - barra 1m exatamente na borda (ex: 00:00) é somada à barra aberta
+      e a entrega na hora, mesmo que a barra aberta seja do dia anterior
+    - barra fechada pela virada de sessão recebe o horário 23:59:59.99999
+    - sem virada de sessão, a troca de dia compara só os minutos do dia
+      (a barra aberta pode continuar no dia seguinte)
+    - a última barra (fim dos dados) recebe a borda direita do bloco
+
+    Returns:
+        (starts, ends, seconds, nums) como arrays NumPy (nums NaN -> a barra
+        usa o horário da própria barra 1m final), ou None se os dados tiverem
+        algo que só o resampler original trata (timestamps fora de ordem /
+        dados atrasados)
+    """
+    ts = np.asarray(timestamps, dtype=np.int64)
+    n = len(ts)
+    if n == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty, np.zeros(0, dtype=np.float64)
+
+    if n > 1 and not np.all(np.diff(ts) > 0):
+        return None
+
+    days, secs = np.divmod(ts, 86400)
+    minutes = secs // 60
+    blocks = minutes // compression
+    onedge = (secs % 60 == 0) & (blocks * compression == minutes)
+
+    rolled = np.zeros(n, dtype=bool)
+    rolls = _rollovers(days, onedge)
+    rolled[rolls] = True
+
+    # Nova barra em i: a anterior foi entregue na borda exata, ou a barra
+    # aberta fecha (virada de sessão / bloco de minutos posterior)
+    closes = rolled[1:] | ((minutes[1:] > minutes[:-1]) & (blocks[1:] > blocks[:-1]))
+    new_bar = np.empty(n, dtype=bool)
+    new_bar[0] = True
+    new_bar[1:] = onedge[:-1] | (closes & ~onedge[1:])
+
+    starts = np.flatnonzero(new_bar)
+    ends = np.append(starts[1:], n)
+    last = ends - 1
+
+    # Borda direita do bloco da última barra 1m (_calcadjtime, com virada
+    # de dia se passar de 24h)
+    seconds = days[last] * 86400 + (blocks[last] + 1) * compression * 60
+    nums = timestamps_to_num(seconds)
+
+    # Entregue na borda exata: horário da própria barra 1m
+    exact = onedge[last]
+    seconds[exact] = ts[last[exact]]
+    nums[exact] = np.nan
+
+    # Fechada pela virada de sessão: fim da sessão do dia da barra aberta.
+    # Com virada na última barra 1m, o Resampler.last() usa o _lastdteos
+    eos = np.zeros(len(starts), dtype=bool)
+    eos[:-1] = rolled[ends[:-1]]
+    eos_days = days[last]
+    if rolled[-1]:
+        eos[-1] = True
+        eos_days[-1] = days[n - 2]
+    for k in np.flatnonzero(eos):
+        seconds[k], nums[k] = _eos(int(eos_days[k]))
+
+    # Dados "atrasados": tratados só pelo resampler original
+    if np.any(ts[ends[:-1]] <= seconds[:-1]):
+        return None
+
+    return starts, ends, seconds, nums
+
+
+def flushed_last(timestamps, compression):
+    """
+    True se a última barra resampleada é entregue pelo Resampler.last()
+    no fim dos dados (última barra 1m fora da borda do bloco).
+
+    Nessa barra o Cerebro não atualiza os tick_open/high/low/close do
+    feed: o broker executa as ordens com os ticks da barra ANTERIOR
+    (ex: ordem a mercado no open da penúltima barra). O ArrayData
+    (stale_last) e o vector_engine.py reproduzem isso.
+    """
+    if compression <= 1 or not len(timestamps):
+        return False
+    seconds = int(timestamps[-1]) % 86400
+    return not (seconds % 60 == 0 and (seconds // 60) % compression == 0)
+
+
+def _sequential_sums(values, starts, ends):
+    """
+    Soma de cada grupo [start, end) na ordem das barras, como o += do
+    resampler do Backtrader (np.add.reduceat soma em outra ordem e pode
+    diferir no último bit com valores fracionários). Vetorizado por
+    posição dentro do grupo: no máximo `compression` passos.
+    """
+    lengths = ends - starts
+    sums = values[starts].copy()
+    for k in range(1, int(lengths.max())):
+        longer = lengths > k
+        sums[longer] += values[starts[longer] + k]
+    return sums
+
+
+def resample_bars(bars, compression):
+    """
+    Resample das barras 1m para `compression` minutos.
+
+    Args:
+        bars: dict de colunas (ver array_feed.BAR_COLUMNS)
+        compression: minutos por barra
+
+    Returns:
+        dict de colunas no mesmo formato, ou None se os dados exigirem o
+        resampler original do Backtrader
+    """
+    groups = resample_groups(bars["timestamp"], compression)
+    if groups is None:
+        return None
+
+    starts, ends, seconds, nums = groups
+    if not len(starts):
+        return {col: np.asarray(bars[col])[:0] for col in bars}
+
+    # Barras entregues na borda exata usam o horário da própria barra 1m
+    own = np.isnan(nums)
+    dtnum = nums.copy()
+    dtnum[own] = np.asarray(bars["datetime"], dtype=np.float64)[ends[own] - 1]
+
+    high = np.asarray(bars["high"])
+    low = np.asarray(bars["low"])
+    volume = np.asarray(bars["volume"])
+
+    return {
+        "timestamp": seconds,
+        "datetime": dtnum,
+        "open": np.asarray(bars["open"])[starts],
+        "high": np.maximum.reduceat(high, starts),
+        "low": np.minimum.reduceat(low, starts),
+        "close": np.asarray(bars["close"])[ends - 1],
+        "volume": _sequential_sums(volume, starts, ends),
+    }
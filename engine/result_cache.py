@@ -0,0 +1,152 @@
+# ===================================================
+# result_cache.py
+# Cache persistente de resultados do batch (retomada / memoização)
+# ===================================================
+import os
+import json
+import glob
+import hashlib
+import inspect
+from functools import lru_cache
+
+import backtrader as bt
+
+from engine.bar_store import BarStore, hash_file
+from engine.data_index import cache_basename
+
+
+RESULT_CACHE_VERSION = 1
+
+
+def strategy_hash(strategy_class):
+    """
+    Hash do código da estratégia: o arquivo do módulo inteiro (pega também
+    funções auxiliares); se não houver arquivo, só o fonte da classe.
+    """
+    try:
+        with open(inspect.getsourcefile(strategy_class), "rb") as f:
+            source = f.read()
+    except (OSError, TypeError):
+        source = inspect.getsource(strategy_class).encode("utf-8")
+
+    h = hashlib.sha1(source)
+    h.update(f"{strategy_class.__module__}.{strategy_class.__qualname__}".encode("utf-8"))
+    return h.hexdigest()
+
+
+@lru_cache(maxsize=1)
+def engine_hash():
+    """
+    Hash do código que produz os resultados: todos os módulos do engine/
+    (feeds, resample, analyzers, broker/comissão, vetorizado...) + versão
+    do Backtrader. Uma correção em qualquer um invalida o cache sozinha,
+    sem depender de aumentar RESULT_CACHE_VERSION.
+    """
+    h = hashlib.sha1(bt.__version__.encode("utf-8"))
+    folder = os.path.dirname(os.path.abspath(__file__))
+    for path in sorted(glob.glob(os.path.join(folder, "*.py"))):
+        h.update(os.path.basename(path).encode("utf-8"))
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+# ==========================================================
+# RESULT CACHE
+# ==========================================================
+class ResultCache:
+    """
+    Resultados já calculados, um por linha (JSON Lines), chaveados por:
+
+    - hash do código da estratégia e do engine/ (engine_hash)
+    - params completos (fixos + variáveis + timeframe)
+    - caixa inicial e comissão
+    - engine, feed e perfil do Cerebro
+    - regras de parada antecipada (se houver)
+    - fatia de datas [start, end) (se houver)
+    - fingerprint (sha1) do arquivo de dados (no feed="csv" lido direto
+      do arquivo, sem construir o .bar_cache)
+
+    Cada combinação concluída é gravada na hora (checkpoint): se o batch
+    morrer, a próxima execução pula o que já foi feito. Aumentar o grid
+    só custa os pontos novos.
+
+    Combinações com erro não são gravadas (rodam de novo).
+    """
+
+    def __init__(self, strategy_class, datafile, initial_cash, commission, path=None,
+                 kill_rules=None, date_range=None, engine="backtrader", feed="store",
+                 profile="lean"):
+        self.strategy_class = strategy_class
+        self.datafile = datafile
+        self.path = path or (
+            cache_basename(datafile) + f".results_{strategy_class.__name__}.jsonl"
+        )
+
+        self._base = {
+            "version": RESULT_CACHE_VERSION,
+            "strategy": strategy_hash(strategy_class),
+            "engine_code": engine_hash(),
+            "data": hash_file(datafile) if feed == "csv" else BarStore(datafile).fingerprint()["sha1"],
+            "initial_cash": initial_cash,
+            "commission": commission,
+            "engine": engine,
+            "feed": feed,
+            "profile": profile,
+        }
+        if kill_rules:
+            # Regras de parada mudam o resultado das combinações podadas
+            self._base["kill_rules"] = kill_rules
+        if date_range and any(d is not None for d in date_range):
+            self._base["date_range"] = [None if d is None else str(d) for d in date_range]
+        self._rows = None
+        self._newline = False   # última linha do arquivo ficou incompleta
+
+    # ------------------------------------------------------
+    def key(self, params):
+        """Chave de uma combinação (params já com fixos e timeframe)"""
+        payload = json.dumps({**self._base, "params": params}, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def load(self):
+        """Lê o arquivo (linhas incompletas de uma execução interrompida são ignoradas)"""
+        self._rows = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    self._newline = not line.endswith("\n")
+                    try:
+                        item = json.loads(line)
+                    except ValueError:
+                        continue
+                    self._rows[item["key"]] = item["row"]
+        except OSError:
+            pass
+        return self
+
+    def get(self, key):
+        """Métricas gravadas para a chave (ou None)"""
+        if self._rows is None:
+            self.load()
+        return self._rows.get(key)
+
+    # ------------------------------------------------------
+    def put(self, key, row):
+        """Grava (append + flush) as métricas de uma combinação"""
+        if self._rows is None:
+            self.load()
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            if self._newline:
+                f.write("\n")
+                self._newline = False
+            f.write(json.dumps({"key": key, "row": row}) + "\n")
+            f.flush()
+
+        self._rows[key] = row
+
+    def __len__(self):
+        if self._rows is None:
+            self.load()
+        return len(self._rows)
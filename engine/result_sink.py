@@ -0,0 +1,279 @@
+# ===================================================
+# result_sink.py
+# Gravação incremental dos resultados do batch + ranking top-k
+# ===================================================
+import os
+import csv
+import math
+import heapq
+import sqlite3
+from abc import ABC, abstractmethod
+
+import pandas as pd
+
+
+# Tempo por fase em segundos (fases de engine/profiling.py + total)
+TIMING_COLUMNS = {
+    "metadata": "T Metadata",
+    "setup": "T Setup",
+    "resample": "T Resample",
+    "feed": "T Feed",
+    "strategy": "T Strategy",
+    "analyzers": "T Analyzers",
+    "output": "T Output",
+    "total": "T Total",
+}
+
+# Colunas de resultado (depois dos parâmetros da combinação)
+RESULT_COLUMNS = [
+    "Timeframe",
+    "Equity Final",
+    "Profit Factor",
+    "Avg Trade",
+    "Expectancy",
+    "Trades",
+    "Wins",
+    "Losses",
+    "Win Rate %",
+    "Max DD %",
+    "Max DD $",
+    "Bars/s",
+    *TIMING_COLUMNS.values(),
+    "Pruned",
+    "Erro",
+]
+
+# Colunas sempre texto (vazias quando não se aplicam)
+TEXT_COLUMNS = ("Timeframe", "Pruned", "Erro")
+
+
+def open_sink(path, batch_size=1000):
+    """Sink pela extensão do arquivo (.csv, .parquet, .db/.sqlite)"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return CSVSink(path, batch_size)
+    if ext in (".db", ".sqlite", ".sqlite3"):
+        return SQLiteSink(path, batch_size)
+    if ext == ".parquet":
+        return ParquetSink(path, batch_size)
+    raise ValueError(f"Formato de saída não suportado: {path}")
+
+
+# ==========================================================
+# SINKS
+# ==========================================================
+class ResultSink(ABC):
+    """
+    Base dos sinks: acumula linhas e grava a cada `batch_size` (append-only).
+    O conjunto completo fica em disco; a memória guarda só um lote.
+    Subclasses implementam _write e read_chunks (_open/_close opcionais).
+    """
+
+    def __init__(self, path, batch_size=1000):
+        self.path = path
+        self.batch_size = batch_size
+        self.columns = None
+        self.count = 0
+        self._buffer = []
+
+    def open(self, columns):
+        """Define as colunas (fixas para todo o arquivo) e cria o arquivo"""
+        self.columns = list(columns)
+        folder = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(folder, exist_ok=True)
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self._open()
+        return self
+
+    def write(self, row):
+        self._buffer.append([row.get(col) for col in self.columns])
+        self.count += 1
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._write(self._buffer)
+            self._buffer = []
+
+    def close(self):
+        self.flush()
+        self._close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------------------------------------------
+    @abstractmethod
+    def read_chunks(self, chunksize=100000):
+        """Relê o arquivo em blocos (DataFrames)"""
+
+    def _open(self):
+        pass
+
+    @abstractmethod
+    def _write(self, rows):
+        """Grava um lote de linhas (listas na ordem de self.columns)"""
+
+    def _close(self):
+        pass
+
+
+class CSVSink(ResultSink):
+
+    def _open(self):
+        self._file = open(self.path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(self.columns)
+
+    def _write(self, rows):
+        self._writer.writerows(rows)
+        self._file.flush()
+
+    def _close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def read_chunks(self, chunksize=100000):
+        yield from pd.read_csv(self.path, chunksize=chunksize)
+
+
+class SQLiteSink(ResultSink):
+    """Tabela `results` (uma coluna por campo)"""
+
+    TABLE = "results"
+
+    def _open(self):
+        self._conn = sqlite3.connect(self.path)
+        cols = ", ".join(f'"{col}"' for col in self.columns)
+        self._conn.execute(f"CREATE TABLE {self.TABLE} ({cols})")
+        self._insert = (
+            f"INSERT INTO {self.TABLE} VALUES ({', '.join('?' * len(self.columns))})"
+        )
+
+    def _write(self, rows):
+        self._conn.executemany(self._insert, rows)
+        self._conn.commit()
+
+    def _close(self):
+        self._conn.close()
+
+    def read_chunks(self, chunksize=100000):
+        with sqlite3.connect(self.path) as conn:
+            yield from pd.read_sql_query(
+                f"SELECT * FROM {self.TABLE}", conn, chunksize=chunksize
+            )
+
+
+class ParquetSink(ResultSink):
+    """Um row group por lote (requer pyarrow)"""
+
+    def _open(self):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as e:
+            raise ImportError("Saída .parquet requer pyarrow (pip install pyarrow)") from e
+        self._writer = None
+
+    def _write(self, rows):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        df = pd.DataFrame(rows, columns=self.columns)
+        if self._writer is None:
+            # Esquema fixo: números -> float64, resto -> texto
+            fields = []
+            for col in self.columns:
+                numeric = pd.api.types.is_numeric_dtype(df[col]) and col not in TEXT_COLUMNS
+                fields.append(pa.field(col, pa.float64() if numeric else pa.string()))
+            self._schema = pa.schema(fields)
+            self._writer = pq.ParquetWriter(self.path, self._schema)
+
+        for field in self._schema:
+            if field.type == pa.string():
+                df[field.name] = df[field.name].map(lambda v: None if v is None else str(v))
+            else:
+                df[field.name] = pd.to_numeric(df[field.name]).astype("float64")
+
+        table = pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+        self._writer.write_table(table)
+
+    def _close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+    def read_chunks(self, chunksize=100000):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(self.path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+
+
+# ==========================================================
+# TOP-K
+# ==========================================================
+class TopK:
+    """
+    As k melhores linhas por uma métrica, num heap de tamanho k
+    (O(log k) por linha, memória O(k)). NaN é ignorado.
+    Empates: fica à frente o menor `index` (nº da combinação no grid),
+    então os líderes não dependem da ordem em que os workers terminam.
+    Sem `index`, vale a ordem de chegada. Linhas podadas ("Pruned")
+    ficam fora: pararam no meio e têm DD/trades parciais.
+    """
+
+    def __init__(self, metric, k, largest=True):
+        self.metric = metric
+        self.k = k
+        self.largest = largest
+        self._heap = []
+        self._seq = 0
+
+    def push(self, row, index=None):
+        if index is None:
+            index = self._seq
+        self._seq += 1
+
+        value = row.get(self.metric)
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            return
+        if isinstance(row.get("Pruned"), str):
+            return
+
+        # Heap de mínimo sobre a chave: a raiz é a pior das k
+        key = value if self.largest else -value
+        item = (key, -index, row)
+
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, item)
+        elif item[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, item)
+
+    def rows(self):
+        """Linhas da melhor para a pior"""
+        return [item[2] for item in sorted(self._heap, key=lambda it: it[:2], reverse=True)]
+
+    def dataframe(self, columns=None):
+        return pd.DataFrame(self.rows(), columns=columns)
+
+
+def top_k_from_chunks(chunks, metric, k, largest=True):
+    """Top-k de um arquivo relido em blocos (sem carregar tudo)"""
+    tracker = TopK(metric, k, largest)
+    columns = None
+    offset = 0
+    for chunk in chunks:
+        chunk = chunk.reset_index(drop=True)
+        columns = list(chunk.columns)
+        if "Pruned" in chunk:
+            chunk = chunk[chunk["Pruned"].isna()]
+        best = chunk.nlargest(k, metric) if largest else chunk.nsmallest(k, metric)
+        # Empates pela posição da linha no arquivo
+        for position, row in zip(best.index, best.to_dict("records")):
+            tracker.push(row, offset + position)
+        offset += len(chunk)
+    return tracker.dataframe(columns)
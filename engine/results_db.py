@@ -0,0 +1,385 @@
+# ===================================================
+# results_db.py
+# Banco SQLite com todas as execuções de batch (consultas top/compare/history)
+# ===================================================
+import os
+import csv
+import json
+import math
+import sqlite3
+import hashlib
+from datetime import datetime, timedelta
+
+
+DB_VERSION = 1
+# Na raiz do repositório (não no diretório de onde a CLI foi chamada)
+DEFAULT_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          "results", "results.db")
+
+# Coluna do resultado do batch -> coluna SQL (métricas indexadas)
+METRIC_COLUMNS = {
+    "Equity Final": "equity_final",
+    "Profit Factor": "profit_factor",
+    "Avg Trade": "avg_trade",
+    "Expectancy": "expectancy",
+    "Trades": "trades",
+    "Wins": "wins",
+    "Losses": "losses",
+    "Win Rate %": "win_rate",
+    "Max DD %": "max_dd_pct",
+    "Max DD $": "max_dd_cash",
+}
+
+# Apelidos aceitos na CLI (--metric pf)
+METRIC_ALIASES = {
+    "equity": "equity_final",
+    "pf": "profit_factor",
+    "dd": "max_dd_pct",
+    "winrate": "win_rate",
+}
+
+# Métricas em que menor é melhor
+LOWER_IS_BETTER = ("max_dd_pct", "max_dd_cash", "losses")
+
+# Colunas do resultado que não são parâmetros nem métricas
+OTHER_COLUMNS = ("Timeframe", "Pruned", "Erro", "datafile", "Bars/s")
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started_at TEXT NOT NULL,
+    strategy TEXT NOT NULL,
+    batch TEXT NOT NULL,
+    config_path TEXT,
+    config_hash TEXT,
+    data_fingerprint TEXT,
+    datafile TEXT,
+    engine TEXT,
+    profile TEXT,
+    search TEXT,
+    result_path TEXT,
+    combos INTEGER DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS runs_strategy ON runs (strategy, batch, started_at);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    params TEXT NOT NULL,
+    timeframe TEXT,
+    datafile TEXT,
+    {", ".join(f"{col} REAL" for col in METRIC_COLUMNS.values())},
+    pruned TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS results_run ON results (run_id, timeframe);
+{"".join(f"CREATE INDEX IF NOT EXISTS results_{col} ON results ({col});" for col in METRIC_COLUMNS.values())}
+"""
+
+
+def metric_column(metric):
+    """"Profit Factor", "profit_factor" ou "pf" -> coluna SQL"""
+    if metric in METRIC_COLUMNS:
+        return METRIC_COLUMNS[metric]
+    key = str(metric).lower()
+    key = METRIC_ALIASES.get(key, key)
+    if key not in METRIC_COLUMNS.values():
+        raise ValueError(f"Métrica desconhecida: {metric} "
+                         f"({', '.join(METRIC_COLUMNS.values())})")
+    return key
+
+
+def lower_is_better(metric):
+    """Menor é melhor na métrica? (nome do batch, coluna ou apelido; fora do banco: não)"""
+    try:
+        return metric_column(metric) in LOWER_IS_BETTER
+    except ValueError:
+        return False
+
+
+def config_hash(*parts):
+    """sha1 (12 dígitos) do JSON canônico das partes do config"""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+
+
+def parse_since(text, now=None):
+    """"30d", "12h", "2w" ou data ISO -> texto ISO para comparar com started_at"""
+    if text is None:
+        return None
+    text = str(text).strip()
+    units = {"h": "hours", "d": "days", "w": "weeks"}
+    if text[-1:].lower() in units and text[:-1].isdigit():
+        now = now or datetime.now()
+        delta = timedelta(**{units[text[-1].lower()]: int(text[:-1])})
+        return (now - delta).isoformat(timespec="seconds")
+    return datetime.fromisoformat(text).isoformat(timespec="seconds")
+
+
+def _number(value):
+    """Valor do resultado -> float ou None (vazio / NaN / texto)"""
+    if value is None or value == "":
+        return None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(value) else value
+
+
+def _text(value):
+    if value is None or value == "" or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return str(value)
+
+
+def _param(value):
+    """Parâmetro lido de CSV (texto) -> int/float quando for número"""
+    if not isinstance(value, str):
+        return value.item() if hasattr(value, "item") else value
+    for cast in (int, float):
+        try:
+            return cast(value)
+        except ValueError:
+            pass
+    return value
+
+
+# ==========================================================
+# RESULTS DB
+# ==========================================================
+class ResultsDB:
+    """
+    Todas as execuções num SQLite só:
+
+    - runs: uma linha por execução (estratégia, batch, hash do config,
+      fingerprint dos dados, engine, perfil, arquivo de resultado)
+    - results: uma linha por combinação (params em JSON + métricas em
+      colunas), com índice por execução/timeframe e por métrica
+
+    As consultas (top/history/compare) usam só sqlite3: respondem sem
+    pandas e sem ler os arquivos result_*.csv.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or DEFAULT_DB
+        folder = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(folder, exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+        self.conn.execute("INSERT OR IGNORE INTO meta VALUES ('version', ?)", (str(DB_VERSION),))
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------------------------------------------
+    # GRAVAÇÃO
+    # ------------------------------------------------------
+    def record_run(self, strategy, batch, rows, started_at=None, fixed_params=None,
+                   batch_size=5000, **info):
+        """
+        Grava uma execução e as linhas dela.
+
+        Args:
+            strategy / batch: nomes (strategies/<strategy>, batch do config)
+            rows: iterável de dicts (linhas do BatchRunner)
+            started_at: datetime (padrão: agora)
+            fixed_params: params fixos do batch, gravados junto com os
+                variáveis de cada linha (params completos)
+            info: config_path, config_hash, data_fingerprint, datafile,
+                engine, profile, search, result_path
+
+        Returns:
+            id da execução
+        """
+        started_at = (started_at or datetime.now()).isoformat(timespec="seconds")
+        fixed = {k: v for k, v in (fixed_params or {}).items() if k != "timeframe"}
+        known = ("config_path", "config_hash", "data_fingerprint", "datafile",
+                 "engine", "profile", "search", "result_path")
+        unknown = set(info) - set(known)
+        if unknown:
+            raise ValueError(f"Campos de execução desconhecidos: {sorted(unknown)}")
+
+        with self.conn:
+            cur = self.conn.execute(
+                f"INSERT INTO runs (started_at, strategy, batch, {', '.join(known)}) "
+                f"VALUES (?, ?, ?, {', '.join('?' * len(known))})",
+                (started_at, strategy, batch, *(info.get(k) for k in known)),
+            )
+            run_id = cur.lastrowid
+
+            insert = (f"INSERT INTO results (run_id, params, timeframe, datafile, "
+                      f"{', '.join(METRIC_COLUMNS.values())}, pruned, error) "
+                      f"VALUES ({', '.join('?' * (len(METRIC_COLUMNS) + 6))})")
+            count, buffer = 0, []
+            for row in rows:
+                buffer.append(self._result_values(run_id, row, fixed))
+                count += 1
+                if len(buffer) >= batch_size:
+                    self.conn.executemany(insert, buffer)
+                    buffer = []
+            if buffer:
+                self.conn.executemany(insert, buffer)
+            self.conn.execute("UPDATE runs SET combos = ? WHERE id = ?", (count, run_id))
+        return run_id
+
+    @staticmethod
+    def _result_values(run_id, row, fixed):
+        params = dict(fixed)
+        params.update((k, _param(v)) for k, v in row.items()
+                      if k not in METRIC_COLUMNS and k not in OTHER_COLUMNS
+                      and k != "timeframe" and not k.startswith("T "))
+        datafile = _text(row.get("datafile"))
+        return (
+            run_id,
+            json.dumps(params, sort_keys=True, default=str),
+            _text(row.get("Timeframe")),
+            os.path.basename(datafile) if datafile else None,
+            *(_number(row.get(col)) for col in METRIC_COLUMNS),
+            _text(row.get("Pruned")),
+            _text(row.get("Erro")),
+        )
+
+    def import_csv(self, path, strategy, batch=None, started_at=None):
+        """
+        Importa um result_<batch>_<YYYYmmdd_HHMMSS>.csv antigo (batch e data
+        tirados do nome quando não informados). Lido com csv, linha a linha.
+        """
+        name = os.path.splitext(os.path.basename(path))[0]
+        parts = name.split("_")
+        if started_at is None and len(parts) >= 4:
+            try:
+                started_at = datetime.strptime("_".join(parts[-2:]), "%Y%m%d_%H%M%S")
+            except ValueError:
+                started_at = None
+        if started_at is None:
+            started_at = datetime.fromtimestamp(os.path.getmtime(path))
+        if batch is None:
+            batch = "_".join(parts[1:-2]) if len(parts) >= 4 else name
+
+        with open(path, newline="", encoding="utf-8") as f:
+            return self.record_run(strategy, batch, csv.DictReader(f),
+                                   started_at=started_at, result_path=os.path.abspath(path))
+
+    def has_result_path(self, path):
+        cur = self.conn.execute("SELECT 1 FROM runs WHERE result_path = ? LIMIT 1",
+                                (os.path.abspath(path),))
+        return cur.fetchone() is not None
+
+    # ------------------------------------------------------
+    # CONSULTAS
+    # ------------------------------------------------------
+    def run_counts(self):
+        """{estratégia: número de execuções registradas}"""
+        return dict(self.conn.execute("SELECT strategy, COUNT(*) FROM runs GROUP BY strategy"))
+
+    def _run_filter(self, strategy=None, batch=None, since=None, runs=None):
+        where, args = [], []
+        if strategy is not None:
+            where.append("r.strategy = ?")
+            args.append(strategy)
+        if batch is not None:
+            where.append("r.batch = ?")
+            args.append(batch)
+        if since is not None:
+            where.append("r.started_at >= ?")
+            args.append(parse_since(since))
+        if runs:
+            where.append(f"r.id IN ({', '.join('?' * len(runs))})")
+            args.extend(int(r) for r in runs)
+        return where, args
+
+    def top(self, strategy=None, metric="equity_final", batch=None, timeframe=None,
+            since=None, runs=None, limit=10):
+        """
+        Melhores combinações de todas as execuções que passam nos filtros.
+
+        Args:
+            metric: coluna/nome/apelido (ex: "pf", "Profit Factor")
+            timeframe: "10m" (como na coluna Timeframe)
+            since: "30d", "12h" ou data ISO
+
+        Returns:
+            lista de sqlite3.Row (run_id, started_at, batch, params, timeframe, métricas)
+        """
+        col = metric_column(metric)
+        where, args = self._run_filter(strategy, batch, since, runs)
+        # Podadas/com erro param no meio: DD e trades parciais ficam fora do ranking
+        where.append(f"s.{col} IS NOT NULL AND s.pruned IS NULL AND s.error IS NULL")
+        if timeframe is not None:
+            where.append("s.timeframe = ?")
+            args.append(timeframe)
+        order = "ASC" if col in LOWER_IS_BETTER else "DESC"
+        sql = (
+            "SELECT s.run_id, r.started_at, r.strategy, r.batch, s.params, s.timeframe, "
+            "s.datafile, s.equity_final, s.profit_factor, s.trades, s.win_rate, s.max_dd_pct"
+            + (f", s.{col}" if col not in ("equity_final", "profit_factor", "trades",
+                                           "win_rate", "max_dd_pct") else "")
+            + " FROM results s JOIN runs r ON r.id = s.run_id"
+            f" WHERE {' AND '.join(where)} ORDER BY s.{col} {order} LIMIT ?"
+        )
+        return self.conn.execute(sql, (*args, int(limit))).fetchall()
+
+    def history(self, strategy=None, batch=None, since=None, limit=20):
+        """Execuções (mais recentes primeiro) com o melhor Equity Final de cada"""
+        where, args = self._run_filter(strategy, batch, since)
+        sql = (
+            "SELECT r.id, r.started_at, r.strategy, r.batch, r.combos, r.config_hash, "
+            "r.data_fingerprint, r.engine, r.profile, "
+            "(SELECT MAX(equity_final) FROM results WHERE run_id = r.id) AS best_equity, "
+            "(SELECT MAX(profit_factor) FROM results WHERE run_id = r.id) AS best_pf "
+            "FROM runs r"
+            + (f" WHERE {' AND '.join(where)}" if where else "")
+            + " ORDER BY r.started_at DESC, r.id DESC LIMIT ?"
+        )
+        return self.conn.execute(sql, (*args, int(limit))).fetchall()
+
+    def compare(self, run_ids, metric="equity_final"):
+        """
+        Resumo lado a lado de execuções: combinações, melhor/mediana da
+        métrica, params do melhor, hash do config e dos dados
+
+        Returns:
+            lista de dicts (na ordem de run_ids)
+        """
+        col = metric_column(metric)
+        order = "ASC" if col in LOWER_IS_BETTER else "DESC"
+        summary = []
+        for run_id in run_ids:
+            run = self.conn.execute("SELECT * FROM runs WHERE id = ?", (int(run_id),)).fetchone()
+            if run is None:
+                raise ValueError(f"Execução {run_id} não encontrada em {self.path}")
+
+            finished = f"run_id = ? AND {col} IS NOT NULL AND pruned IS NULL AND error IS NULL"
+            valid = self.conn.execute(
+                f"SELECT COUNT(*) FROM results WHERE {finished}", (run["id"],)
+            ).fetchone()[0]
+            best = self.conn.execute(
+                f"SELECT params, timeframe, {col} FROM results WHERE {finished} "
+                f"ORDER BY {col} {order} LIMIT 1", (run["id"],)
+            ).fetchone()
+            median = self.conn.execute(
+                f"SELECT {col} FROM results WHERE {finished} "
+                f"ORDER BY {col} LIMIT 1 OFFSET ?", (run["id"], max(valid - 1, 0) // 2)
+            ).fetchone()
+
+            summary.append({
+                "run": run["id"],
+                "started_at": run["started_at"],
+                "batch": run["batch"],
+                "combos": run["combos"],
+                "config": run["config_hash"],
+                "data": (run["data_fingerprint"] or "")[:12] or None,
+                f"best {col}": best[col] if best else None,
+                f"median {col}": median[0] if median else None,
+                "best params": best["params"] if best else None,
+                "best timeframe": best["timeframe"] if best else None,
+            })
+        return summary
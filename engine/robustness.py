@@ -0,0 +1,115 @@
+# ===================================================
+# robustness.py
+# Monte Carlo / bootstrap vetorizado sobre o PnL dos trades
+# ===================================================
+import numpy as np
+
+
+MC_METHODS = ("bootstrap", "permutation")
+
+# Percentis reportados (DD: o ruim é o alto; equity final: o ruim é o baixo)
+PERCENTILES = (5, 50, 95)
+
+# Elementos (simulações x trades) por bloco: limita a memória (~64 MB em float64)
+MC_BLOCK = 8_000_000
+
+
+def _simulated_pnls(rng, pnls, sims, method):
+    """Matriz (sims, trades) de sequências reamostradas"""
+    n = len(pnls)
+    if method == "bootstrap":
+        return pnls[rng.integers(0, n, size=(sims, n))]
+    return rng.permuted(np.broadcast_to(pnls, (sims, n)), axis=1)
+
+
+def monte_carlo(pnls, initial_cash=100000, sims=1000, method="bootstrap", seed=0,
+                equity_floor=None, percentiles=PERCENTILES):
+    """
+    Reamostra a sequência de trades `sims` vezes (em blocos NumPy, sem
+    loop por simulação) e mede a curva de equity de cada uma.
+
+    Args:
+        pnls: PnL líquido de cada trade, na ordem (array / lista)
+        initial_cash: caixa inicial da curva
+        sims: número de simulações
+        method: "bootstrap" (sorteio com reposição: muda a soma) ou
+            "permutation" (só a ordem muda: mesmo resultado final,
+            distribuição do drawdown)
+        seed: semente (int ou np.random.SeedSequence)
+        equity_floor: piso da conta para a probabilidade de ruína
+            (padrão: 90% do caixa inicial)
+        percentiles: percentis reportados
+
+    Returns:
+        dict com "max_dd_pct"/"max_dd_cash"/"equity_final" (dict percentil
+        -> valor), "ruin_pct" (% das simulações que tocaram o piso),
+        "sims" e "trades"
+
+    A equity é a de trades fechados (um ponto por trade), com as contas
+    do bt.analyzers.DrawDown (pico inclui o caixa inicial).
+    """
+    if method not in MC_METHODS:
+        raise ValueError(f"Método de Monte Carlo inválido: {method} ({', '.join(MC_METHODS)})")
+    pnls = np.asarray(pnls, dtype=np.float64)
+    if equity_floor is None:
+        equity_floor = initial_cash * 0.9
+
+    n = len(pnls)
+    stats = {"sims": int(sims), "trades": n}
+    if n == 0:
+        flat = dict.fromkeys(percentiles, 0.0)
+        stats.update(max_dd_pct=flat, max_dd_cash=dict(flat),
+                     equity_final=dict.fromkeys(percentiles, float(initial_cash)),
+                     ruin_pct=100.0 if initial_cash <= equity_floor else 0.0)
+        return stats
+
+    rng = np.random.default_rng(seed)
+    dd_pct = np.empty(sims)
+    dd_cash = np.empty(sims)
+    final = np.empty(sims)
+    ruined = np.empty(sims, dtype=bool)
+
+    block = max(1, MC_BLOCK // n)
+    for start in range(0, sims, block):
+        stop = min(start + block, sims)
+        equity = _simulated_pnls(rng, pnls, stop - start, method).cumsum(axis=1)
+        equity += initial_cash
+
+        peak = np.maximum.accumulate(equity, axis=1)
+        np.maximum(peak, initial_cash, out=peak)
+        down = peak - equity
+
+        dd_cash[start:stop] = down.max(axis=1)
+        dd_pct[start:stop] = (100.0 * down / peak).max(axis=1)
+        final[start:stop] = equity[:, -1]
+        ruined[start:stop] = equity.min(axis=1) <= equity_floor
+
+    # O "pior" de cada lado: DD nos percentis altos, equity nos baixos
+    stats.update(
+        max_dd_pct={p: float(np.percentile(dd_pct, p)) for p in percentiles},
+        max_dd_cash={p: float(np.percentile(dd_cash, p)) for p in percentiles},
+        equity_final={p: float(np.percentile(final, p)) for p in percentiles},
+        ruin_pct=float(ruined.mean() * 100.0),
+    )
+    return stats
+
+
+def robustness_columns(stats):
+    """Stats de monte_carlo() -> colunas para a tabela de líderes"""
+    row = {}
+    for p, value in stats["equity_final"].items():
+        row[f"MC Equity p{p}"] = value
+    for p, value in stats["max_dd_pct"].items():
+        row[f"MC DD % p{p}"] = value
+    for p, value in stats["max_dd_cash"].items():
+        row[f"MC DD $ p{p}"] = value
+    row["MC Ruína %"] = stats["ruin_pct"]
+    return row
+
+
+def combo_seeds(seed, n):
+    """
+    Uma semente independente por combinação (SeedSequence.spawn): o
+    resultado de cada uma não depende da ordem nem de quantos processos
+    """
+    return np.random.SeedSequence(seed).spawn(n)
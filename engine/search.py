@@ -0,0 +1,355 @@
+# ===================================================
+# search.py
+# Estratégias de busca no espaço de parâmetros (samplers)
+# ===================================================
+import math
+import random
+from abc import ABC, abstractmethod
+from itertools import product
+
+import numpy as np
+
+
+SEARCH_METHODS = ("grid", "random", "bayesian", "zoom")
+
+# Pontos por rodada das buscas adaptativas ("search_batch" no config). Fixo,
+# e não o nº de workers: mesma config + mesma semente = mesmos pontos em
+# qualquer máquina
+SEARCH_BATCH = 8
+
+
+def make_sampler(search, variable_params, budget=None, seed=None, batch_size=SEARCH_BATCH):
+    """
+    Cria o sampler pelo nome ("search" do JSON).
+
+    Args:
+        search: "grid" (produto cartesiano completo), "random",
+            "bayesian" (processo gaussiano + expected improvement)
+            ou "zoom" (grade grossa -> refina em volta do melhor)
+        variable_params: dict nome -> lista de valores
+        budget: máximo de backtests (ignorado no "grid")
+        seed: semente (mesma semente + mesmos resultados = mesma busca)
+        batch_size: pontos por rodada nos métodos adaptativos
+    """
+    search = search or "grid"
+    space = ParamSpace(variable_params)
+
+    if search == "grid":
+        return GridSampler(space)
+
+    budget = space.size if budget is None else min(int(budget), space.size)
+    if search == "random":
+        return RandomSampler(space, budget, seed)
+    if search == "bayesian":
+        return BayesianSampler(space, budget, seed, batch_size=batch_size)
+    if search == "zoom":
+        return ZoomSampler(space, budget, seed, batch_size=batch_size)
+
+    raise ValueError(f"Busca inválida: {search} ({', '.join(SEARCH_METHODS)})")
+
+
+# ==========================================================
+# ESPAÇO DE PARÂMETROS
+# ==========================================================
+class ParamSpace:
+    """
+    Grade discreta dos parâmetros variáveis. Cada ponto é a tupla dos
+    índices nas listas de valores (a ordem das listas define a vizinhança).
+    """
+
+    def __init__(self, variable_params):
+        self.names = list(variable_params.keys())
+        self.values = [list(v) for v in variable_params.values()]
+        self.shape = tuple(len(v) for v in self.values)
+        self.size = math.prod(self.shape) if self.names else 1
+
+    def combo(self, point):
+        return {name: values[i] for name, values, i in zip(self.names, self.values, point)}
+
+    def point(self, flat):
+        """Índice linear (ordem do itertools.product) -> ponto"""
+        point = []
+        for n in reversed(self.shape):
+            flat, i = divmod(flat, n)
+            point.append(i)
+        return tuple(reversed(point))
+
+    def unit(self, points):
+        """Pontos -> coordenadas normalizadas em [0, 1] (para o modelo)"""
+        points = np.asarray(points, dtype=np.float64).reshape(len(points), len(self.shape))
+        scale = np.array([max(n - 1, 1) for n in self.shape], dtype=np.float64)
+        return points / scale
+
+
+# ==========================================================
+# SAMPLERS
+# ==========================================================
+class Sampler(ABC):
+    """
+    Base: ask(n) devolve as próximas combinações (lista vazia = fim) e
+    tell(combinações, scores) informa o resultado (maior = melhor;
+    None/NaN = falhou).
+
+    adaptive=False -> tudo sai no primeiro ask (uma rodada só, paralelismo total).
+    """
+
+    adaptive = False
+
+    def __init__(self, space, budget=None, seed=None):
+        self.space = space
+        self.budget = space.size if budget is None else budget
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+        self.asked = set()
+        self.observed = {}           # ponto -> score
+
+    def _take(self, points, limit=None):
+        """Pontos ainda não pedidos, limitados ao orçamento (marca como pedidos)"""
+        points = list(dict.fromkeys(p for p in points if p not in self.asked))
+        limit = self.remaining if limit is None else min(limit, self.remaining)
+        points = points[:limit]
+        self.asked.update(points)
+        return points
+
+    @abstractmethod
+    def ask(self, n):
+        """Até n combinações novas (dicts nome -> valor); [] quando acabou"""
+
+    def tell(self, combos, scores):
+        for combo, score in zip(combos, scores):
+            point = tuple(values.index(combo[name])
+                          for name, values in zip(self.space.names, self.space.values))
+            if score is None or (isinstance(score, float) and math.isnan(score)):
+                score = float("-inf")
+            self.observed[point] = float(score)
+
+    def best(self):
+        """(ponto, score) do melhor resultado observado"""
+        if not self.observed:
+            return None, None
+        point = max(self.observed, key=lambda p: (self.observed[p], [-i for i in p]))
+        return point, self.observed[point]
+
+    @property
+    def remaining(self):
+        return self.budget - len(self.asked)
+
+
+class GridSampler(Sampler):
+    """Produto cartesiano completo (comportamento original)"""
+
+    def __init__(self, space):
+        super().__init__(space)
+        self._done = False
+
+    def ask(self, n):
+        if self._done:
+            return []
+        self._done = True
+        if not self.space.names:
+            return [{}]
+        return [dict(zip(self.space.names, combo)) for combo in product(*self.space.values)]
+
+    def tell(self, combos, scores):
+        pass
+
+
+class RandomSampler(Sampler):
+    """`budget` pontos distintos sorteados da grade"""
+
+    def ask(self, n):
+        if self.remaining <= 0:
+            return []
+        flat = self.rng.sample(range(self.space.size), self.remaining)
+        return [self.space.combo(p) for p in self._take([self.space.point(f) for f in flat])]
+
+
+class ZoomSampler(Sampler):
+    """
+    Coarse-to-fine: avalia uma grade grossa (poucos valores por eixo),
+    depois a vizinhança do melhor ponto com passo cada vez menor
+    (metade a cada rodada) até o passo 1. Com passo 1 esgotado, segue
+    para a vizinhança do 2º melhor, 3º, ...
+    """
+
+    adaptive = True
+
+    def __init__(self, space, budget, seed=None, batch_size=SEARCH_BATCH):
+        super().__init__(space, budget, seed)
+        self.batch_size = batch_size
+
+        # Valores por eixo na grade inicial: o maior m com m^d <= budget/2
+        d = max(len(space.shape), 1)
+        m = max(2, int((max(budget, 2) / 2) ** (1.0 / d)))
+        self.coarse = [
+            sorted(set(np.round(np.linspace(0, n - 1, min(m, n))).astype(int).tolist()))
+            for n in space.shape
+        ]
+        self.step = [max(1, math.ceil((n - 1) / max(len(c) - 1, 1)))
+                     for n, c in zip(space.shape, self.coarse)]
+        self._started = False
+
+    def _neighbors(self, center, step):
+        axes = []
+        for i, s, n in zip(center, step, self.space.shape):
+            axes.append(sorted({min(max(i + k * s, 0), n - 1) for k in (-1, 0, 1)}))
+        return list(product(*axes))
+
+    def ask(self, n):
+        if self.remaining <= 0:
+            return []
+
+        if not self._started:
+            self._started = True
+            points = list(product(*self.coarse))
+            if len(points) > self.remaining:
+                points = self.rng.sample(points, self.remaining)
+            return [self.space.combo(p) for p in self._take(points)]
+
+        n = max(n, self.batch_size)
+        while True:
+            center, _ = self.best()
+            points = [p for p in self._neighbors(center, self.step) if p not in self.asked]
+            if points:
+                self.rng.shuffle(points)
+                return [self.space.combo(p) for p in self._take(points, n)]
+
+            if any(s > 1 for s in self.step):
+                self.step = [max(1, s // 2) for s in self.step]
+                continue
+
+            # Passo 1 esgotado em volta do melhor: vizinhança dos seguintes
+            ranked = sorted(self.observed, key=lambda p: -self.observed[p])
+            for center in ranked:
+                points = [p for p in self._neighbors(center, self.step) if p not in self.asked]
+                if points:
+                    return [self.space.combo(p) for p in self._take(points, n)]
+            return []
+
+
+class BayesianSampler(Sampler):
+    """
+    Otimização bayesiana sobre a grade: processo gaussiano (kernel RBF,
+    escala escolhida por verossimilhança marginal) e expected improvement.
+    Rodadas de `batch_size` pontos ("constant liar": cada ponto escolhido
+    entra no modelo com a média prevista antes de escolher o próximo).
+
+    Só NumPy. Com grades grandes o EI é avaliado numa amostra de candidatos.
+    Se o kernel não fatorar (Cholesky) nem com o maior jitter, a rodada
+    usa pontos aleatórios.
+    """
+
+    adaptive = True
+
+    LENGTH_SCALES = (0.05, 0.1, 0.2, 0.4, 0.8)
+    MAX_CANDIDATES = 20000
+    JITTERS = (1e-6, 1e-4, 1e-2)
+
+    def __init__(self, space, budget, seed=None, batch_size=SEARCH_BATCH, n_init=None):
+        super().__init__(space, budget, seed)
+        self.batch_size = batch_size
+        d = max(len(space.shape), 1)
+        self.n_init = min(budget, n_init or max(2 * d + 1, batch_size))
+
+    # ------------------------------------------------------
+    def _candidates(self):
+        if self.space.size - len(self.asked) <= self.MAX_CANDIDATES:
+            points = [self.space.point(f) for f in range(self.space.size)]
+        else:
+            flat = self.rng.sample(range(self.space.size), self.MAX_CANDIDATES)
+            points = [self.space.point(f) for f in flat]
+        return [p for p in points if p not in self.asked]
+
+    @staticmethod
+    def _kernel(a, b, scale):
+        d2 = ((a[:, None, :] - b[None, :, :]) ** 2).sum(axis=2)
+        return np.exp(-0.5 * d2 / scale ** 2)
+
+    def _fit(self, x, y):
+        """
+        Escolhe a escala pela verossimilhança marginal e devolve o modelo
+        (None se nenhuma escala fatorar, nem com o maior jitter)
+        """
+        for jitter in self.JITTERS:
+            best = None
+            for scale in self.LENGTH_SCALES:
+                k = self._kernel(x, x, scale) + jitter * np.eye(len(x))
+                try:
+                    chol = np.linalg.cholesky(k)
+                except np.linalg.LinAlgError:
+                    continue
+                alpha = np.linalg.solve(chol.T, np.linalg.solve(chol, y))
+                loglik = -0.5 * y @ alpha - np.log(np.diag(chol)).sum()
+                if best is None or loglik > best[0]:
+                    best = (loglik, scale, chol, alpha)
+            if best is not None:
+                return best[1:]
+        return None
+
+    def _predict(self, model, x, cand):
+        scale, chol, alpha = model
+        ks = self._kernel(cand, x, scale)
+        mu = ks @ alpha
+        v = np.linalg.solve(chol, ks.T)
+        var = np.maximum(1.0 - (v ** 2).sum(axis=0), 1e-12)
+        return mu, np.sqrt(var)
+
+    @staticmethod
+    def _expected_improvement(mu, sigma, best, xi=0.01):
+        z = (mu - best - xi) / sigma
+        cdf = 0.5 * (1.0 + np.vectorize(math.erf)(z / math.sqrt(2.0)))
+        pdf = np.exp(-0.5 * z ** 2) / math.sqrt(2.0 * math.pi)
+        return (mu - best - xi) * cdf + sigma * pdf
+
+    # ------------------------------------------------------
+    def ask(self, n):
+        if self.remaining <= 0:
+            return []
+
+        n = max(n, self.batch_size)
+
+        # Fase inicial: pontos aleatórios
+        if len(self.asked) < self.n_init:
+            count = self.n_init - len(self.asked)
+            flat = self.rng.sample(range(self.space.size), min(count * 2, self.space.size))
+            points = [self.space.point(f) for f in flat]
+            return [self.space.combo(p) for p in self._take(points, count)]
+
+        candidates = self._candidates()
+        if not candidates:
+            return []
+
+        points = list(self.observed)
+        scores = np.array([self.observed[p] for p in points])
+
+        # Falhas (-inf) entram como o pior resultado válido
+        finite = np.isfinite(scores)
+        floor = scores[finite].min() if finite.any() else 0.0
+        scores = np.where(finite, scores, floor)
+
+        mean, std = scores.mean(), scores.std() or 1.0
+        y = list((scores - mean) / std)
+        x = list(self.space.unit(points))
+        cand = self.space.unit(candidates)
+
+        chosen = []
+        for _ in range(min(n, len(candidates), self.remaining)):
+            xa, ya = np.array(x), np.array(y)
+            model = self._fit(xa, ya)
+            if model is None:
+                # Modelo não fatorou: completa a rodada com pontos aleatórios
+                rest = [k for k in range(len(candidates)) if k not in chosen]
+                count = min(n, len(candidates), self.remaining) - len(chosen)
+                chosen.extend(self.rng.sample(rest, count))
+                break
+            mu, sigma = self._predict(model, xa, cand)
+            ei = self._expected_improvement(mu, sigma, ya.max())
+            ei[chosen] = -np.inf
+
+            k = int(np.argmax(ei))
+            chosen.append(k)
+            x.append(cand[k])
+            y.append(mu[k])             # constant liar
+
+        return [self.space.combo(p) for p in self._take([candidates[k] for k in chosen])]
@@ -0,0 +1,189 @@
+# ===================================================
+# shared_cerebro.py
+# Várias combinações num Cerebro só (dados e indicadores compartilhados)
+# ===================================================
+import time
+from array import array
+
+import backtrader as bt
+from backtrader.lineiterator import LineIterator
+from backtrader.lineseries import LineSeriesStub
+
+
+# ==========================================================
+# SHARED CEREBRO
+# ==========================================================
+class SharedCerebro(bt.Cerebro):
+    """
+    Cerebro que roda uma lista de combinações (params) em sequência sobre
+    os MESMOS dados, no estilo do optstrategy com optdatas:
+
+    - o feed (e o resample) é carregado/pré-carregado uma vez por chunk
+    - cada combinação roda isolada: o broker é reiniciado (caixa,
+      posições, ordens) e um runstop (kill rules) só para aquela combinação
+    - indicadores iguais (mesma classe, params e entradas) são calculados
+      uma vez e copiados para as instâncias seguintes
+
+    Só compartilha com preload + runonce (perfis full/lean). Com exactbars
+    o Backtrader desliga os dois e cada combinação recarrega os dados
+    (resultado igual, sem ganho).
+
+    Resultados: callback on_result(strategy, seconds) chamado ao fim de
+    cada combinação, com o broker ainda no estado final dela.
+    """
+
+    # Sequencial no processo atual; estratégias completas para o callback
+    params = (
+        ("maxcpus", 1),
+        ("optreturn", False),
+    )
+
+    def __init__(self):
+        super().__init__()
+        self.on_result = None
+        self.shared_indicators = 0
+        self._predata = False
+        self._indicators = None
+
+    def addstrategies(self, strategy, param_sets):
+        """Uma instância de `strategy` por dict de params (sem produto cartesiano)"""
+        self._dooptimize = True
+        self.strats.append([(strategy, (), dict(params)) for params in param_sets])
+
+    # ------------------------------------------------------
+    def run(self, **kwargs):
+        self._predata = False
+        self._indicators = {}
+        try:
+            return super().run(**kwargs)
+        finally:
+            if self._predata:
+                for data in self.datas:
+                    data.stop()
+            self._indicators = None
+
+    def runstrategies(self, iterstrat, predata=False):
+        # runstop de uma combinação não vale para as seguintes
+        self._event_stop = False
+
+        shared = self.p.optdatas and self._dopreload and self._dorunonce
+        if shared and not self._predata:
+            # Mesmo pré-carregamento que o Cerebro faz antes do pool do optstrategy
+            for data in self.datas:
+                data.reset()
+                if self._exactbars < 1:
+                    data.extend(size=self.params.lookahead)
+                data._start()
+                data.preload()
+            self._predata = True
+
+        t0 = time.perf_counter()
+        runstrats = super().runstrategies(iterstrat, predata=predata or shared)
+        seconds = time.perf_counter() - t0
+
+        if self.on_result is not None:
+            for strat in runstrats:
+                self.on_result(strat, seconds)
+
+        # Não guarda as estratégias (linhas inteiras) até o fim do chunk
+        return []
+
+    def _runonce(self, runstrats):
+        for strat in runstrats:
+            self.shared_indicators += share_indicators(strat, self._indicators)
+        return super()._runonce(runstrats)
+
+
+# ==========================================================
+# INDICADORES COMPARTILHADOS
+# ==========================================================
+def share_indicators(strategy, cache):
+    """
+    Liga o compartilhamento nos indicadores da estratégia: o primeiro
+    indicador com uma chave calcula e guarda as linhas em `cache`; os
+    seguintes só copiam (valores idênticos, inclusive o aquecimento).
+
+    Chave: classe + params + entradas. Entrada = linha do feed ou de outro
+    indicador com chave; qualquer outra (ex: operação entre linhas)
+    deixa o indicador fora do compartilhamento.
+
+    Returns:
+        quantos indicadores já estavam no cache
+    """
+    lines = {}
+    for i, data in enumerate(strategy.datas):
+        lines[id(data)] = ("data", i)
+        for k, line in enumerate(data.lines):
+            lines[id(line)] = ("data", i, k)
+
+    hits = 0
+    for indicator in _walk(strategy):
+        key = _indicator_key(indicator, lines)
+        if key is None:
+            continue
+
+        lines[id(indicator)] = key
+        for k, line in enumerate(indicator.lines):
+            lines[id(line)] = (key, k)
+
+        if key in cache:
+            hits += 1
+        indicator._once = _shared_once(indicator, key, cache)
+
+    return hits
+
+
+def _walk(owner):
+    """Indicadores da árvore (filhos antes do pai, na ordem de criação)"""
+    for indicator in owner._lineiterators[LineIterator.IndType]:
+        if isinstance(indicator, bt.Indicator):
+            yield from _walk(indicator)
+            yield indicator
+
+
+def _indicator_key(indicator, lines):
+    sources = []
+    for source in indicator.datas:
+        if isinstance(source, LineSeriesStub):
+            source = source.lines[0]
+        key = lines.get(id(source))
+        if key is None:
+            return None
+        sources.append(key)
+
+    key = (type(indicator), tuple(indicator.params._getkwargs().items()), tuple(sources))
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def _shared_once(indicator, key, cache):
+    """_once do indicador: calcula e guarda, ou copia do cache"""
+    compute = indicator._once
+
+    def _once():
+        cached = cache.get(key)
+        if cached is None or len(cached[0]) != indicator._clock.buflen():
+            compute()
+            cache[key] = [array(line.array.typecode, line.array) for line in indicator.lines]
+            return
+
+        # Mesmo roteiro do LineIterator._once, com a cópia no lugar do once()
+        indicator.forward(size=indicator._clock.buflen())
+        children = indicator._lineiterators[LineIterator.IndType]
+        for child in children:
+            child._once()
+        for data in indicator.datas:
+            data.home()
+        for child in children:
+            child.home()
+        indicator.home()
+
+        for line, values in zip(indicator.lines, cached):
+            line.array[:] = values
+        for line in indicator.lines:
+            line.oncebinding()
+
+    return _once
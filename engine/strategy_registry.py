@@ -0,0 +1,191 @@
+# ===================================================
+# strategy_registry.py
+# Descoberta automática de strategies/<nome>/strategy.py (índice em cache)
+# ===================================================
+import os
+import ast
+import json
+import importlib
+
+
+INDEX_VERSION = 1
+
+# Mesma pasta de cache do data_index.py (sem importar numpy aqui: a CLI
+# lista estratégias sem carregar nenhum módulo pesado)
+INDEX_DIRNAME = ".bar_cache"
+INDEX_FILENAME = "strategies.index.json"
+
+# Pasta padrão das estratégias (strategies/ na raiz do projeto)
+STRATEGIES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              "strategies")
+
+
+def _strategy_files(root):
+    """{nome da pasta: caminho do strategy.py} das subpastas de `root`"""
+    files = {}
+    try:
+        entries = sorted(os.scandir(root), key=lambda e: e.name)
+    except FileNotFoundError:
+        return files
+    for entry in entries:
+        if not entry.is_dir() or entry.name.startswith((".", "_")):
+            continue
+        path = os.path.join(entry.path, "strategy.py")
+        if os.path.isfile(path):
+            files[entry.name] = path
+    return files
+
+
+def _is_strategy_base(base, known):
+    """Base de classe que é bt.Strategy (ou outra estratégia do mesmo arquivo)"""
+    if isinstance(base, ast.Attribute):
+        return base.attr == "Strategy"
+    if isinstance(base, ast.Name):
+        return base.id == "Strategy" or base.id in known
+    return False
+
+
+def scan_strategy_file(path):
+    """
+    Lê o strategy.py com `ast` (sem importar) e devolve as classes que
+    herdam de bt.Strategy, na ordem do arquivo.
+
+    Returns:
+        lista de dicts {"class": nome, "doc": primeira linha da docstring}
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    classes, known = [], set()
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        if any(_is_strategy_base(base, known) for base in node.bases):
+            known.add(node.name)
+            doc = (ast.get_docstring(node) or "").strip().splitlines()
+            classes.append({"class": node.name, "doc": doc[0] if doc else ""})
+    return classes
+
+
+# ==========================================================
+# REGISTRO
+# ==========================================================
+class StrategyRegistry:
+    """
+    Estratégias encontradas em <root>/<nome>/strategy.py.
+
+    O índice (nome -> módulo, classe, docstring) fica em
+    <root>/.bar_cache/strategies.index.json e cada arquivo é relido só se
+    o tamanho ou o mtime mudou: listar estratégias não importa nada e
+    só a estratégia usada é importada (load).
+
+    Com mais de uma estratégia no mesmo arquivo vale a primeira; as
+    outras ficam em "classes" e podem ser pedidas por "<nome>.<Classe>".
+    """
+
+    def __init__(self, root=None):
+        self.root = os.path.abspath(root or STRATEGIES_DIR)
+        self.index_file = os.path.join(self.root, INDEX_DIRNAME, INDEX_FILENAME)
+        self._entries = None
+
+    # ------------------------------------------------------
+    def _read(self):
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if index.get("version") != INDEX_VERSION:
+            return {}
+        return index.get("strategies", {})
+
+    def _write(self, entries):
+        # Temporário único na mesma pasta + os.replace: dois processos
+        # gravando juntos nunca deixam um índice pela metade
+        import tempfile
+
+        folder = os.path.dirname(self.index_file)
+        tmp = None
+        try:
+            os.makedirs(folder, exist_ok=True)
+            with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=folder,
+                                             suffix=".tmp", delete=False) as f:
+                tmp = f.name
+                json.dump({"version": INDEX_VERSION, "strategies": entries}, f, indent=1)
+            os.replace(tmp, self.index_file)
+        except OSError:
+            # Pasta só leitura: funciona, só não guarda o índice
+            if tmp is not None and os.path.exists(tmp):
+                os.remove(tmp)
+
+    def entries(self):
+        """{nome: entrada do índice}, relendo só os arquivos alterados"""
+        if self._entries is not None:
+            return self._entries
+
+        cached = self._read()
+        package = os.path.basename(self.root)
+        entries, changed = {}, False
+
+        files = _strategy_files(self.root)
+        for name, path in files.items():
+            st = os.stat(path)
+            entry = cached.get(name)
+            if (entry is None or entry["size"] != st.st_size
+                    or entry["mtime_ns"] != st.st_mtime_ns):
+                try:
+                    classes = scan_strategy_file(path)
+                except SyntaxError as e:
+                    classes, error = [], f"SyntaxError: {e}"
+                else:
+                    error = None if classes else "nenhuma classe bt.Strategy"
+                entry = {
+                    "module": f"{package}.{name}.strategy",
+                    "size": st.st_size,
+                    "mtime_ns": st.st_mtime_ns,
+                    "classes": classes,
+                    "error": error,
+                }
+                changed = True
+            entry["path"] = path
+            entries[name] = entry
+
+        if changed or set(cached) != set(entries):
+            self._write(entries)
+        self._entries = entries
+        return entries
+
+    def names(self):
+        """Nomes das estratégias válidas (pastas), em ordem"""
+        return sorted(name for name, entry in self.entries().items() if entry["classes"])
+
+    def describe(self, name):
+        """Primeira linha da docstring da classe (sem importar)"""
+        entry = self.entries()[name]
+        return entry["classes"][0]["doc"] if entry["classes"] else ""
+
+    def load(self, name):
+        """
+        Importa só o módulo da estratégia `name` e devolve a classe.
+
+        Args:
+            name: pasta da estratégia ("sma_test") ou "<pasta>.<Classe>"
+
+        Returns:
+            classe da estratégia (bt.Strategy)
+        """
+        folder, _, class_name = name.partition(".")
+        entry = self.entries().get(folder)
+        if entry is None or not entry["classes"]:
+            detail = f" ({entry['error']})" if entry and entry["error"] else ""
+            raise ValueError(f"Estratégia '{name}' não encontrada{detail}! "
+                             f"Disponíveis: {', '.join(self.names())}")
+
+        classes = [c["class"] for c in entry["classes"]]
+        class_name = class_name or classes[0]
+        if class_name not in classes:
+            raise ValueError(f"Classe '{class_name}' não encontrada em {entry['path']} "
+                             f"({', '.join(classes)})")
+
+        module = importlib.import_module(entry["module"])
+        return getattr(module, class_name)
@@ -0,0 +1,170 @@
+# ===================================================
+# tail_follow.py
+# Modo incremental: segue o arquivo de dados (tail -f) com o Cerebro vivo
+# ===================================================
+import time
+from array import array
+
+import numpy as np
+import backtrader as bt
+
+
+# Intervalo padrão (s) entre verificações do arquivo quando não cresceu
+TAIL_POLL = 0.25
+
+
+# ==========================================================
+# LEITOR (readline que espera por barras novas)
+# ==========================================================
+class TailReader:
+    """
+    Linhas completas de um arquivo que cresce (como `tail -f`) ou de um
+    stream (pipe, socket.makefile(), sys.stdin), com o readline() que o
+    GenericCSVData do Backtrader usa: o feed é o mesmo do feed="csv" e o
+    parse das barras é idêntico ao de um run() completo.
+
+    Arquivo: lê o histórico inteiro e depois espera linhas novas (só
+    acréscimos). Linha sem "\\n" no fim (gravação pela metade) só é
+    entregue completa; ao encerrar, a sobra é entregue como a última
+    linha, igual à leitura do arquivo inteiro.
+
+    Stream: cada readline() bloqueia no próprio stream; o fim (quem
+    escreve fechou) encerra.
+
+    Args:
+        source: caminho do arquivo ou objeto com readline()
+        poll: intervalo (s) entre verificações do arquivo parado
+        idle_timeout: encerra após N s sem linhas novas (None: sem limite)
+        stop: threading.Event (ou função sem argumentos) que encerra a leitura
+
+    Atributos:
+        arrived: perf_counter() da chegada da última linha entregue
+        caught_up: True depois que o histórico do arquivo foi lido (no
+            stream, desde o início: toda linha é nova)
+    """
+
+    def __init__(self, source, poll=TAIL_POLL, idle_timeout=None, stop=None):
+        self.follow = not hasattr(source, "readline")
+        self.f = open(source, "r") if self.follow else source
+        self.poll = poll
+        self.idle_timeout = idle_timeout
+        self.stop = stop
+        self.arrived = None
+        self.caught_up = not self.follow
+        self.lines = 0
+        self._partial = ""
+
+    def _stopped(self, idle_since):
+        stop = self.stop
+        if stop is not None and (stop.is_set() if hasattr(stop, "is_set") else stop()):
+            return True
+        return (self.idle_timeout is not None
+                and time.perf_counter() - idle_since >= self.idle_timeout)
+
+    def readline(self):
+        if not self.follow:
+            line = self.f.readline()
+            self.arrived = time.perf_counter()
+            self.lines += bool(line)
+            return line
+
+        idle_since = time.perf_counter()
+        while True:
+            chunk = self.f.readline()
+            if chunk:
+                self._partial += chunk
+                if not chunk.endswith("\n"):
+                    continue  # resto da linha ainda não gravado
+                line, self._partial = self._partial, ""
+                break
+
+            # Fim do que já foi gravado: espera crescer
+            self.caught_up = True
+            if self._stopped(idle_since):
+                line, self._partial = self._partial, ""
+                break
+            time.sleep(self.poll)
+
+        self.arrived = time.perf_counter()
+        self.lines += bool(line)
+        return line
+
+    def close(self):
+        if self.f is not None:
+            self.f.close()
+            self.f = None
+
+
+# ==========================================================
+# MONITOR (relatório por barra nova)
+# ==========================================================
+class TailMonitor(bt.Analyzer):
+    """
+    Relatório de cada barra nova da estratégia (depois do histórico):
+    latência desde a chegada da linha que completou a barra até o fim do
+    next() da estratégia e dos analyzers, métricas e drawdown até aqui e
+    os trades fechados nesta barra.
+
+    Deve ser o último analyzer: o ResultAnalyzer (bounded) já contou a
+    barra quando o monitor roda.
+
+    on_bar(report) recebe um dict com "bar" (barras da estratégia),
+    "datetime", "latency" (s), "equity", "metrics", "max_dd_pct",
+    "max_dd_cash" e "new_trades" (array estruturada do TradeRecorder).
+
+    get_analysis() -> {"bars": barras novas, "latency": {"mean", "p50",
+                       "p95", "max"} (s)}
+    """
+
+    params = (
+        ("reader", None),
+        ("on_bar", None),
+    )
+
+    def start(self):
+        self.latencies = array("d")
+        self._reported = 0
+
+    def next(self):
+        reader = self.p.reader
+        result = self.strategy.analyzers.result
+        if not reader.caught_up:
+            # Histórico: processado, sem relatório (trades já conhecidos)
+            self._reported = len(result.trades)
+            return
+
+        snapshot = result.snapshot()
+        trades = snapshot["trades"]
+        new_trades = trades.rows(self._reported)
+        self._reported = len(trades)
+
+        latency = time.perf_counter() - reader.arrived
+        self.latencies.append(latency)
+
+        if self.p.on_bar is not None:
+            self.p.on_bar({
+                "bar": len(self.strategy),
+                "datetime": self.data.datetime.datetime(0),
+                "latency": latency,
+                "equity": self.strategy.broker.getvalue(),
+                "metrics": snapshot["metrics"],
+                "max_dd_pct": snapshot["max_dd_pct"],
+                "max_dd_cash": snapshot["max_dd_cash"],
+                "new_trades": new_trades,
+            })
+
+    def get_analysis(self):
+        return {"bars": len(self.latencies), "latency": latency_stats(self.latencies)}
+
+
+def latency_stats(latencies):
+    """Média, p50, p95 e máximo (s) das latências por barra ({} sem barras)"""
+    if not len(latencies):
+        return {}
+    values = np.frombuffer(latencies, dtype=np.float64)
+    return {
+        "mean": float(values.mean()),
+        "p50": float(np.percentile(values, 50)),
+        "p95": float(np.percentile(values, 95)),
+        "max": float(values.max()),
+    }
@@ -1,3 +1,8 @@
+# ===================================================
+# trade_log_analyzer.py
+# Mantido só por compatibilidade: o engine usa o ResultAnalyzer
+# (custom_analyzer.py) com trade_log=True + trade_recorder.py
+# ===================================================
 import backtrader as bt
 
 class TradeLogAnalyzer(bt.Analyzer):
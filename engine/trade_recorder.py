@@ -0,0 +1,186 @@
+# ===================================================
+# trade_recorder.py
+# Log de trades em arrays NumPy (colunar) + exportação
+# ===================================================
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from engine.array_feed import EPOCH_ORDINAL
+
+
+# Colunas do log (uma array contígua por coluna)
+#   entry_time / exit_time : int64, segundos desde 1970 (horário do arquivo)
+#   direction              : int8, 1 = comprado, -1 = vendido
+#   size                   : contratos (maior posição do trade, com aumentos)
+#   entry_price            : preço médio de entrada (trade.price)
+#   exit_price             : preço de execução da ordem que fechou o trade
+#   pnl / commission / pnl_comm : PnL bruto, comissões e PnL líquido
+#   bars_held              : barras entre abertura e fechamento
+TRADE_COLUMNS = {
+    "entry_time": np.int64,
+    "exit_time": np.int64,
+    "direction": np.int8,
+    "size": np.float64,
+    "entry_price": np.float64,
+    "exit_price": np.float64,
+    "pnl": np.float64,
+    "commission": np.float64,
+    "pnl_comm": np.float64,
+    "bars_held": np.int32,
+}
+
+# Formatos de exportação -> extensão
+TRADE_FORMATS = {
+    "csv": ".csv",
+    "parquet": ".parquet",
+    "feather": ".feather",
+    "npz": ".npz",
+}
+
+
+def num_to_seconds(num):
+    """Data numérica do Backtrader -> segundos desde 1970 (barras em segundos inteiros)"""
+    return int(round((num - EPOCH_ORDINAL) * 86400.0))
+
+
+def trade_format(save_trades):
+    """save_trades (True/False/formato) -> formato ou None"""
+    if not save_trades:
+        return None
+    fmt = "csv" if save_trades is True else str(save_trades).lower()
+    if fmt not in TRADE_FORMATS:
+        raise ValueError(f"Formato de trades inválido: {save_trades} ({', '.join(TRADE_FORMATS)})")
+    return fmt
+
+
+def trade_log_name(combo):
+    """Nome de arquivo estável para o log de uma combinação (params -> texto)"""
+    parts = []
+    for key, value in combo.items():
+        if key == "datafile":
+            value = os.path.splitext(os.path.basename(value))[0]
+        parts.append(f"{key}-{value}")
+    name = "_".join(parts) or "trades"
+    return re.sub(r"[^\w.\-]+", "_", name)
+
+
+# ==========================================================
+# TRADE RECORDER
+# ==========================================================
+class TradeRecorder:
+    """
+    Trades fechados em arrays pré-alocadas (uma por coluna), dobradas
+    quando enchem. Sem dict/objeto por trade: 10^5+ trades ocupam só
+    os bytes das colunas.
+
+    As colunas são contíguas: viram colunas Arrow/Parquet/Feather e
+    arrays do .npz sem cópia.
+    """
+
+    def __init__(self, capacity=1024):
+        self._columns = {name: np.empty(capacity, dtype=dtype)
+                         for name, dtype in TRADE_COLUMNS.items()}
+        self._capacity = capacity
+        self._n = 0
+
+    def __len__(self):
+        return self._n
+
+    def append(self, entry_time, exit_time, direction, size, entry_price, exit_price,
+               pnl, commission, pnl_comm, bars_held):
+        n = self._n
+        if n == self._capacity:
+            self._grow()
+
+        cols = self._columns
+        cols["entry_time"][n] = entry_time
+        cols["exit_time"][n] = exit_time
+        cols["direction"][n] = direction
+        cols["size"][n] = size
+        cols["entry_price"][n] = entry_price
+        cols["exit_price"][n] = exit_price
+        cols["pnl"][n] = pnl
+        cols["commission"][n] = commission
+        cols["pnl_comm"][n] = pnl_comm
+        cols["bars_held"][n] = bars_held
+        self._n = n + 1
+
+    def _grow(self):
+        self._capacity *= 2
+        for name, col in self._columns.items():
+            grown = np.empty(self._capacity, dtype=col.dtype)
+            grown[:self._n] = col[:self._n]
+            self._columns[name] = grown
+
+    # ------------------------------------------------------
+    @property
+    def columns(self):
+        """dict coluna -> array (views das posições preenchidas)"""
+        return {name: col[:self._n] for name, col in self._columns.items()}
+
+    def to_structured(self):
+        """Cópia como array estruturada NumPy (um registro por trade)"""
+        return self.rows()
+
+    def rows(self, start=0, stop=None):
+        """Cópia estruturada dos trades [start, stop) (ex: os fechados desde a última consulta)"""
+        stop = self._n if stop is None else min(stop, self._n)
+        start = min(start, stop)
+        out = np.empty(stop - start, dtype=list(TRADE_COLUMNS.items()))
+        for name, col in self._columns.items():
+            out[name] = col[start:stop]
+        return out
+
+    def to_frame(self):
+        """DataFrame com entry_time/exit_time como datetime"""
+        df = pd.DataFrame(self.columns)
+        for col in ("entry_time", "exit_time"):
+            df[col] = pd.to_datetime(df[col], unit="s")
+        return df
+
+    def to_arrow(self):
+        """pyarrow.Table (colunas numéricas sem cópia; tempos como timestamp[s])"""
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise ImportError("Exportar trades em parquet/feather requer pyarrow "
+                              "(pip install pyarrow)") from e
+
+        arrays = {}
+        for name, col in self.columns.items():
+            kind = pa.timestamp("s") if name in ("entry_time", "exit_time") else None
+            arrays[name] = pa.array(col, type=kind)
+        return pa.table(arrays)
+
+    def export(self, path, fmt=None):
+        """
+        Grava o log. Formato pela extensão (ou `fmt`): .csv, .parquet,
+        .feather ou .npz (arrays crus, np.load devolve as colunas)
+        """
+        if fmt is None:
+            ext = os.path.splitext(path)[1].lower()
+            fmt = next((f for f, e in TRADE_FORMATS.items() if e == ext), None)
+            if fmt is None:
+                raise ValueError(f"Formato de trades não suportado: {path}")
+
+        folder = os.path.dirname(os.path.abspath(path))
+        os.makedirs(folder, exist_ok=True)
+
+        if fmt == "csv":
+            self.to_frame().to_csv(path, index=False)
+        elif fmt == "npz":
+            np.savez(path, **self.columns)
+        elif fmt == "parquet":
+            table = self.to_arrow()
+            import pyarrow.parquet as pq
+            pq.write_table(table, path)
+        elif fmt == "feather":
+            table = self.to_arrow()
+            import pyarrow.feather as feather
+            feather.write_feather(table, path)
+        else:
+            raise ValueError(f"Formato de trades inválido: {fmt}")
+        return path
@@ -0,0 +1,575 @@
+# ===================================================
+# vector_engine.py
+# Avaliador vetorizado (NumPy) para estratégias simples de sinal
+# ===================================================
+import math
+import time
+import random
+from datetime import datetime
+
+import numpy as np
+
+from engine.bar_store import BarStore
+from engine.custom_analyzer import metrics_from_pnls
+from engine.data_index import DataIndex
+from engine.kill_rules import dd_reason, floor_reason, normalize_kill_rules, trades_reason
+from engine.profiling import PHASES
+from engine.resample_cache import flushed_last
+from engine.trade_recorder import TRADE_COLUMNS, TradeRecorder
+
+
+# ==========================================================
+# INDICADORES (mesmos valores do Backtrader)
+# ==========================================================
+_PRICE_SCALES = (1, 2, 4, 8, 10, 16, 20, 32, 64, 100, 1000, 10000)
+
+
+def _integer_scale(values):
+    """
+    Menor escala K tal que values * K são inteiros exatos (ex: tick 0.25 -> 4).
+    None se nenhuma escala conhecida servir.
+    """
+    for scale in _PRICE_SCALES:
+        scaled = np.round(values * scale)
+        if np.all(scaled / scale == values) and np.all(np.abs(scaled) < 2 ** 52):
+            return scale, scaled.astype(np.int64)
+    return None
+
+
+def sma(values, period):
+    """
+    SMA idêntica à bt.indicators.SMA (math.fsum(janela) / period).
+
+    Com preços em grade decimal (tick) a soma da janela é feita em inteiros
+    (exata) e a divisão por K dá o mesmo arredondamento do fsum. Fora disso,
+    usa fsum janela a janela. Posições de aquecimento ficam NaN.
+    """
+    return sma_many(values, [period])[period]
+
+
+def sma_many(values, periods):
+    """
+    sma() para vários períodos com UMA soma acumulada (em inteiros, na
+    grade de preço) compartilhada entre eles.
+
+    Returns:
+        dict período -> array (mesmos valores de sma())
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    out = {}
+
+    scaled = _integer_scale(values) if n else None
+    csum = None
+    if scaled is not None:
+        scale, ints = scaled
+        csum = np.concatenate(([0], np.cumsum(ints)))
+
+    for period in periods:
+        series = np.full(n, np.nan)
+        if period > n:
+            pass
+        elif csum is not None:
+            window = csum[period:] - csum[:-period]
+            series[period - 1:] = (window / scale) / period
+        else:
+            for i in range(period - 1, n):
+                series[i] = math.fsum(values[i - period + 1:i + 1]) / period
+        out[period] = series
+    return out
+
+
+INDICATORS = {
+    "sma": sma,
+}
+
+_OPERATORS = {
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+}
+
+_PRICES = ("open", "high", "low", "close")
+
+
+# ==========================================================
+# DECLARAÇÃO DA ESTRATÉGIA
+# ==========================================================
+def vector_spec(strategy_class):
+    """
+    Declaração vetorizada da estratégia (atributo de classe `vector`)
+    ou None se a estratégia não oferece o caminho rápido.
+
+    Formato:
+        vector = dict(
+            entry=("close", ">", ("sma", "sma_period")),
+            exit=dict(kind="stop_target", stop="stop_points", rr="target_rr"),
+            size=1,
+        )
+
+    - entry: comparação avaliada no fechamento de cada barra (só comprado);
+      operandos são um preço ("close", ...) ou (indicador, nome do param)
+    - exit "stop_target": stop = preço do sinal - stop; alvo = preço do sinal
+      + stop * rr, checados no fechamento; saída a mercado na próxima barra
+    """
+    spec = getattr(strategy_class, "vector", None)
+    if not spec:
+        return None
+
+    left, op, right = spec["entry"]
+    if op not in _OPERATORS:
+        raise ValueError(f"Operador não suportado no vetorizado: {op}")
+    for operand in (left, right):
+        if isinstance(operand, str):
+            if operand not in _PRICES:
+                raise ValueError(f"Preço desconhecido: {operand}")
+        elif operand[0] not in INDICATORS:
+            raise ValueError(f"Indicador não suportado no vetorizado: {operand[0]}")
+
+    if spec["exit"]["kind"] != "stop_target":
+        raise ValueError(f"Saída não suportada no vetorizado: {spec['exit']['kind']}")
+
+    return spec
+
+
+def _operand_key(operand, params):
+    if isinstance(operand, str):
+        return (operand,)
+    name, param = operand
+    return (name, params[param])
+
+
+def _first_exit(close, start, low, high, chunk=256):
+    """Primeiro índice >= start com close <= low ou close >= high (ou None)"""
+    n = len(close)
+    while start < n:
+        window = close[start:start + chunk]
+        hits = np.flatnonzero((window <= low) | (window >= high))
+        if len(hits):
+            return start + int(hits[0])
+        start += chunk
+        chunk = min(chunk * 4, 1 << 16)
+    return None
+
+
+# ==========================================================
+# VECTOR ENGINE
+# ==========================================================
+class VectorEngine:
+    """
+    Avalia muitas combinações de uma estratégia declarada em `vector`
+    diretamente sobre os arrays de barras (bar_store), sem o Cerebro.
+
+    Reproduz o BacktestEngine com FuturesCommission: ordens a mercado
+    executadas na abertura da barra seguinte, ajuste diário de caixa
+    (mark-to-market) e valor do broker barra a barra para o drawdown.
+    Trades, PnL, métricas do PerformanceAnalyzer e drawdown saem iguais.
+
+    Suposição: caixa sempre suficiente para a margem (sem ordens rejeitadas).
+    Use cross_check() para conferir amostras contra o Backtrader.
+    """
+
+    def __init__(
+        self,
+        strategy,
+        datafile,
+        initial_cash=100000,
+        commission=1.24,
+        margin=1.0,
+        mult=1.0,
+        data_index=None,
+        kill_rules=None,
+    ):
+        self.strategy = strategy
+        self.datafile = datafile
+        self.initial_cash = initial_cash
+        self.commission = commission
+        self.margin = margin
+        self.mult = mult
+        self.data_index = data_index
+        # "timeout" não se aplica: cada combinação leva milissegundos
+        self.kill_rules = normalize_kill_rules(kill_rules)
+
+        self.spec = vector_spec(strategy)
+        if self.spec is None:
+            raise ValueError(f"{strategy.__name__} não declara `vector`")
+
+        self._store = BarStore(datafile)
+
+    # ------------------------------------------------------
+    def _timeframe(self, timeframe):
+        if timeframe is None:
+            if self.data_index is None:
+                self.data_index = DataIndex(self.datafile).ensure()
+            timeframe = self.data_index.timeframe_minutes()
+        return timeframe
+
+    def supports(self, timeframe=None):
+        """False se o timeframe exige o resampler do Backtrader"""
+        return self._store.resampled(self._timeframe(timeframe)) is not None
+
+    def _bars(self, timeframe):
+        timeframe = self._timeframe(timeframe)
+        bars = self._store.resampled(timeframe)
+        if bars is None:
+            raise ValueError(
+                f"Timeframe {timeframe}m exige o resampler do Backtrader "
+                "(use o BacktestEngine)"
+            )
+        return timeframe, bars
+
+    def _fill_prices(self, opens, timeframe):
+        """
+        Preço das ordens a mercado em cada barra: o open, exceto na última
+        barra entregue pelo Resampler.last(), em que o broker do
+        Backtrader usa o tick_open da barra anterior (resample_cache.flushed_last)
+        """
+        if len(opens) < 2 or not flushed_last(self._store.load()["timestamp"], timeframe):
+            return opens
+        fills = opens.copy()
+        fills[-1] = opens[-2]
+        return fills
+
+    def _strategy_params(self, params):
+        """Params completos (defaults da estratégia + informados)"""
+        full = dict(self.strategy.params._getitems())
+        full.update(params)
+        return full
+
+    # ------------------------------------------------------
+    def run_many(self, param_sets):
+        """
+        Avalia uma lista de dicts de parâmetros (podem incluir "timeframe").
+
+        As barras de cada timeframe, cada indicador e cada série de sinais
+        são calculados uma vez e compartilhados pelas combinações.
+
+        Returns:
+            lista de resultados no formato do BacktestEngine.run
+        """
+        results = [None] * len(param_sets)
+
+        by_timeframe = {}
+        for k, params in enumerate(param_sets):
+            params = dict(params)
+            timeframe = params.pop("timeframe", None)
+            by_timeframe.setdefault(timeframe, []).append((k, params))
+
+        for timeframe, items in by_timeframe.items():
+            t_feed = time.perf_counter()
+            timeframe, bars = self._bars(timeframe)
+            arrays = {col: np.asarray(bars[col]) for col in _PRICES}
+            arrays["fill"] = self._fill_prices(arrays["open"], timeframe)
+            arrays["timestamp"] = np.asarray(bars["timestamp"])
+            # Carga das barras conta na primeira combinação do timeframe
+            feed_seconds = time.perf_counter() - t_feed
+
+            indicators = {}
+            signals = {}
+
+            for k, params in items:
+                start_exec = datetime.now()
+                t0 = time.perf_counter()
+                full = self._strategy_params(params)
+
+                left, op, right = self.spec["entry"]
+                sig_key = (_operand_key(left, full), op, _operand_key(right, full))
+
+                if sig_key not in signals:
+                    signals[sig_key] = self._signals(arrays, indicators, sig_key)
+
+                result = self._simulate(arrays, signals[sig_key], full)
+                result["data_info"] = {"timeframe": f"{timeframe}m"}
+                result["exec_time"] = datetime.now() - start_exec
+
+                seconds = time.perf_counter() - t0
+                result["timings"] = dict.fromkeys(PHASES, 0.0)
+                result["timings"].update(feed=feed_seconds, strategy=seconds,
+                                         total=feed_seconds + seconds)
+                feed_seconds = 0.0
+
+                result["bars"] = len(arrays["close"])
+                result["bars_per_sec"] = result["bars"] / seconds if seconds > 0 else float("inf")
+                results[k] = result
+
+        return results
+
+    def run(self, params, timeframe=None):
+        """Avalia uma combinação"""
+        return self.run_many([{**params, "timeframe": timeframe}])[0]
+
+    # ------------------------------------------------------
+    def _operand(self, arrays, indicators, key):
+        if len(key) == 1:
+            return arrays[key[0]], 0
+
+        if key not in indicators:
+            name, period = key
+            indicators[key] = INDICATORS[name](arrays["close"], period)
+        # Backtrader só chama next() quando todos os indicadores aqueceram
+        return indicators[key], key[1] - 1
+
+    def _signals(self, arrays, indicators, sig_key):
+        """
+        Sinal de entrada por barra e, para cada barra, o próximo índice
+        com sinal (n = nenhum)
+        """
+        left_key, op, right_key = sig_key
+        left, warm_l = self._operand(arrays, indicators, left_key)
+        right, warm_r = self._operand(arrays, indicators, right_key)
+
+        n = len(arrays["close"])
+        warmup = max(warm_l, warm_r)
+
+        with np.errstate(invalid="ignore"):
+            sig = _OPERATORS[op](left, right)
+        sig[:warmup] = False
+
+        idx = np.where(sig, np.arange(n), n)
+        next_sig = np.minimum.accumulate(idx[::-1])[::-1]
+        return next_sig
+
+    # ------------------------------------------------------
+    def _simulate(self, arrays, next_sig, params):
+        """Percorre os trades de uma combinação e monta métricas/equity"""
+        opens = arrays["fill"]
+        closes = arrays["close"]
+        n = len(closes)
+
+        exit_spec = self.spec["exit"]
+        stop_points = params[exit_spec["stop"]]
+        target_rr = params[exit_spec["rr"]]
+        size = self.spec.get("size", 1)
+
+        entries, exits = [], []
+        pos = 0
+        while pos < n:
+            i = int(next_sig[pos])
+            e = i + 1                       # compra executa na abertura seguinte
+            if e >= n:
+                break
+
+            # Mesmas contas do next() da estratégia
+            entry_price = float(closes[i])
+            stop_price = entry_price - stop_points
+            target_price = entry_price + (stop_points * target_rr)
+
+            k = _first_exit(closes, e, stop_price, target_price)
+            if k is None or k + 1 >= n:
+                entries.append(e)           # posição aberta até o fim
+                exits.append(n)
+                break
+
+            entries.append(e)
+            exits.append(k + 1)
+            pos = k + 1
+
+        return self._account(opens, closes, arrays["timestamp"], entries, exits, size)
+
+    def _account(self, opens, closes, times, entries, exits, size):
+        """
+        Caixa/valor do broker barra a barra (mesma sequência de operações
+        do BackBroker) + log dos trades fechados (TradeRecorder, mesmas
+        colunas do ResultAnalyzer com trade_log=True).
+        """
+        n = len(closes)
+        mult = self.mult
+        lev = 1.0
+        comm = abs(size) * self.commission
+        margin_value = abs(size) * self.margin
+
+        value = np.empty(n)
+        cash = self.initial_cash
+        last = 0
+
+        trade_pnls = []
+        trade_exits = []
+        trade_rows = []
+
+        for e, x in zip(entries, exits):
+            value[last:e] = cash + 0.0
+
+            # Entrada: margem + comissão, depois ajuste até o fechamento
+            c = cash - margin_value / lev
+            c = c - comm
+            c = c + (size * (closes[e] - opens[e])) * mult
+
+            end = min(x, n)
+            steps = (size * (closes[e + 1:end] - closes[e:end - 1])) * mult
+            cash_path = np.cumsum(np.concatenate(([c], steps)))
+
+            unrealized = (size * (closes[e:end] - opens[e])) * mult
+            value[e:end] = cash_path + ((0.0 + (margin_value - unrealized) / lev) + unrealized)
+
+            if x >= n:
+                cash = float(cash_path[-1])
+                last = n
+                break
+
+            # Saída: devolve margem, comissão e ajuste até a abertura
+            pnl = (size * (opens[x] - (0.0 + size * opens[e]) / size)) * mult
+            c = float(cash_path[-1]) + (margin_value / lev + pnl * 0.0)
+            c = c - comm
+            c = c + (size * (opens[x] - closes[x - 1])) * mult
+            cash = c
+            last = x
+
+            commission = (0.0 + comm) + comm
+            trade_pnls.append(float(pnl) - commission)
+            trade_exits.append(x)
+            trade_rows.append((int(times[e]), int(times[x]), 1 if size > 0 else -1, abs(size),
+                               float(opens[e]), float(opens[x]), float(pnl), commission,
+                               trade_pnls[-1], x - e))
+
+        value[last:] = cash + 0.0
+
+        # Drawdown (mesmas contas do bt.analyzers.DrawDown)
+        peak = np.maximum.accumulate(value)
+        moneydown = peak - value
+        drawdown = 100.0 * moneydown / peak
+
+        # Parada antecipada: corta tudo depois da barra em que o
+        # KillSwitch teria parado o Cerebro
+        pruned = None
+        if self.kill_rules:
+            stop, pruned = self._prune(value, drawdown, entries)
+            if pruned:
+                value, moneydown, drawdown = value[:stop], moneydown[:stop], drawdown[:stop]
+                closed = int(np.searchsorted(trade_exits, stop))
+                trade_pnls = trade_pnls[:closed]
+                trade_rows = trade_rows[:closed]
+
+        trades = TradeRecorder(capacity=max(len(trade_rows), 1))
+        for row in trade_rows:
+            trades.append(*row)
+
+        return {
+            "equity_start": self.initial_cash,
+            "equity_end": float(value[-1]),
+            "metrics": metrics_from_pnls(trade_pnls),
+            "trades": trades,
+            "max_dd_pct": max(0.0, float(drawdown.max())),
+            "max_dd_cash": max(0.0, float(moneydown.max())),
+            "pruned": pruned,
+        }
+
+    def _prune(self, value, drawdown, entries):
+        """
+        Primeira barra em que uma regra do KillSwitch dispara.
+
+        Returns:
+            (nº de barras processadas, motivo) ou (len(value), None)
+        """
+        rules = self.kill_rules
+        hits = []       # (índice da barra, ordem de checagem, motivo)
+
+        if "max_dd_pct" in rules:
+            idx = np.flatnonzero(drawdown > rules["max_dd_pct"])
+            if len(idx):
+                k = int(idx[0])
+                hits.append((k, 0, dd_reason(float(drawdown[k]), rules["max_dd_pct"], k + 1)))
+
+        if "equity_floor" in rules:
+            idx = np.flatnonzero(value < rules["equity_floor"])
+            if len(idx):
+                k = int(idx[0])
+                hits.append((k, 1, floor_reason(float(value[k]), rules["equity_floor"], k + 1)))
+
+        if "min_trades" in rules:
+            window = rules["trades_window"]
+            bars = np.arange(window, len(value) + 1, window)
+            opened = np.searchsorted(entries, bars - 1, side="right")
+            needed = rules["min_trades"] * (bars // window)
+            idx = np.flatnonzero(opened < needed)
+            if len(idx):
+                j = int(idx[0])
+                hits.append((int(bars[j]) - 1, 2,
+                             trades_reason(int(opened[j]), int(needed[j]), int(bars[j]))))
+
+        if not hits:
+            return len(value), None
+
+        k, _, reason = min(hits)
+        return k + 1, reason
+
+
+# ==========================================================
+# CONFERÊNCIA CONTRA O BACKTRADER
+# ==========================================================
+CROSS_CHECK_FIELDS = ("equity_end", "max_dd_pct", "max_dd_cash")
+
+
+def cross_check(strategy, datafile, param_sets, results, sample=5, seed=0,
+                rel_tol=1e-9, **engine_kwargs):
+    """
+    Roda no BacktestEngine uma amostra das combinações avaliadas pelo
+    VectorEngine e levanta AssertionError se algum resultado divergir.
+
+    A referência é o feed="csv" (GenericCSVData + resampledata do
+    próprio Backtrader), independente do bar_store que o vetorizado usa.
+    Além de equity, drawdown e métricas, confere trade a trade o log
+    (horários, direção, tamanho, preços e PnL).
+
+    Returns:
+        índices conferidos
+    """
+    from engine.backtest_engine import BacktestEngine
+
+    rng = random.Random(seed)
+    indices = list(range(len(param_sets)))
+    checked = sorted(rng.sample(indices, min(sample, len(indices))))
+
+    for k in checked:
+        params = dict(param_sets[k])
+        timeframe = params.pop("timeframe", None)
+
+        expected = BacktestEngine(
+            strategy=strategy,
+            datafile=datafile,
+            timeframe_minutes=timeframe,
+            strategy_params=params,
+            feed="csv",
+            **engine_kwargs,
+        ).run(verbose=False, save_trades=False, trade_log=True)
+
+        got = results[k]
+        diffs = []
+        for field in CROSS_CHECK_FIELDS:
+            if not math.isclose(got[field], expected[field], rel_tol=rel_tol, abs_tol=1e-9):
+                diffs.append(f"{field}: vetorizado={got[field]} backtrader={expected[field]}")
+
+        for key, value in expected["metrics"].items():
+            other = got["metrics"].get(key)
+            if other is None or not math.isclose(other, value, rel_tol=rel_tol, abs_tol=1e-9):
+                diffs.append(f"{key}: vetorizado={other} backtrader={value}")
+
+        if got.get("pruned") != expected.get("pruned"):
+            diffs.append(f"pruned: vetorizado={got.get('pruned')} backtrader={expected.get('pruned')}")
+
+        diffs.extend(_trade_diffs(got["trades"], expected["trades"], rel_tol))
+
+        if diffs:
+            raise AssertionError(
+                f"Vetorizado diverge do Backtrader em {param_sets[k]}:\n  "
+                + "\n  ".join(diffs)
+            )
+
+    return checked
+
+
+def _trade_diffs(got, expected, rel_tol):
+    """Divergências entre dois logs de trades (primeiro trade diferente)"""
+    if len(got) != len(expected):
+        return [f"nº de trades: vetorizado={len(got)} backtrader={len(expected)}"]
+
+    got, expected = got.columns, expected.columns
+    for name, dtype in TRADE_COLUMNS.items():
+        if np.issubdtype(dtype, np.integer):
+            equal = got[name] == expected[name]
+        else:
+            equal = np.isclose(got[name], expected[name], rtol=rel_tol, atol=1e-9)
+        if not equal.all():
+            k = int(np.argmin(equal))
+            return [f"trade {k} {name}: vetorizado={got[name][k]} backtrader={expected[name][k]}"]
+    return []
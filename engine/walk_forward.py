@@ -0,0 +1,292 @@
+# ===================================================
+# walk_forward.py
+# Otimização walk-forward em paralelo (janelas IS/OOS sobre um único
+# conjunto de barras carregado)
+# ===================================================
+import math
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from engine.bar_store import BarStore
+from engine.batch_runner import BatchRunner, _build_row, _combo_engine, _run_chunk_task
+from engine.results_db import lower_is_better
+from engine.search import make_sampler
+
+
+def walk_forward_windows(days, window_days, step_days, oos_fraction):
+    """
+    Janelas walk-forward sobre os dias que têm barras (feriados e fins
+    de semana não contam).
+
+    Args:
+        days: datas (datetime64[D]) com barras, em ordem (BarStore.day_index)
+        window_days: dias por janela (IS + OOS)
+        step_days: deslocamento entre janelas (>= dias de OOS)
+        oos_fraction: fração da janela reservada ao OOS
+
+    Returns:
+        lista de dicts com is_start/is_end/oos_start/oos_end (pd.Timestamp,
+        fim exclusivo: meia-noite do dia seguinte ao último dia)
+    """
+    oos_days = max(1, int(round(window_days * oos_fraction)))
+    is_days = window_days - oos_days
+    if is_days < 1:
+        raise ValueError(f"Janela de {window_days} dias sem dias de IS (oos_fraction={oos_fraction})")
+    if step_days < oos_days:
+        raise ValueError(f"step_days ({step_days}) menor que o OOS ({oos_days} dias): "
+                         "os períodos OOS se sobreporiam")
+
+    def day(i):
+        return pd.Timestamp(days[i])
+
+    windows = []
+    for first in range(0, len(days) - window_days + 1, step_days):
+        split = first + is_days
+        last = first + window_days - 1
+        windows.append({
+            "is_start": day(first),
+            "is_end": day(split - 1) + pd.Timedelta(days=1),
+            "oos_start": day(split),
+            "oos_end": day(last) + pd.Timedelta(days=1),
+        })
+    return windows
+
+
+def stitch_equity(curves, initial_cash):
+    """
+    Junta as curvas OOS (cada uma começa com initial_cash) somando o
+    resultado de cada janela ao acumulado das anteriores (contratos fixos,
+    sem reinvestir).
+
+    Returns:
+        pd.Series com a equity OOS contínua
+    """
+    parts = []
+    offset = 0.0
+    for curve in curves:
+        if curve is None or curve.empty:
+            continue
+        parts.append(curve + offset)
+        offset += curve.iloc[-1] - initial_cash
+    if not parts:
+        return pd.Series(dtype=np.float64, name="equity")
+    return pd.concat(parts).rename("equity")
+
+
+def equity_drawdown(equity):
+    """(Max DD %, Max DD $) de uma curva de equity"""
+    if equity.empty:
+        return 0.0, 0.0
+    peak = equity.cummax()
+    down = peak - equity
+    return float((down / peak).max() * 100), float(down.max())
+
+
+# ==========================================================
+# WALK FORWARD
+# ==========================================================
+class WalkForward:
+    """
+    Walk-forward: para cada janela, otimiza o grid no período IS, escolhe
+    a melhor combinação por `metric` e roda só ela no período OOS.
+
+    - Os dados são carregados/convertidos uma vez (BarStore); cada janela
+      é só um recorte [start, end) dos mesmos arrays memory-mapped
+    - Todas as (janela x chunk de combinações) do IS vão para o mesmo pool
+      de processos; depois os OOS das janelas rodam juntos
+    - Resultado: tabela por janela (params escolhidos, métrica IS e
+      resultado OOS) e a equity OOS costurada
+    """
+
+    def __init__(self, strategy_class, datafile, window_days, step_days=None,
+                 oos_fraction=0.25, metric="Equity Final", base_timeframe=None,
+                 workers=1, feed="store", initial_cash=100000, commission=1.24,
+                 kill_rules=None, profile="lean", chunk_size=1):
+        """
+        Args:
+            window_days: Dias (com barras) por janela, IS + OOS
+            step_days: Deslocamento entre janelas (padrão = dias de OOS,
+                OOS consecutivos sem sobreposição)
+            oos_fraction: Fração da janela usada como OOS (ex: 0.25)
+            metric: Coluna de resultado que escolhe o vencedor do IS
+                (maior é melhor, exceto Max DD e Losses: results_db.LOWER_IS_BETTER)
+            Demais: como no BatchRunner (engine/batch_runner.py)
+        """
+        if not 0 < oos_fraction < 1:
+            raise ValueError(f"oos_fraction deve estar entre 0 e 1: {oos_fraction}")
+
+        self.window_days = int(window_days)
+        self.oos_fraction = float(oos_fraction)
+        oos_days = max(1, int(round(self.window_days * self.oos_fraction)))
+        self.step_days = int(step_days) if step_days else oos_days
+        self.metric = metric
+        self.initial_cash = initial_cash
+
+        # Combinações, chunks e job vêm do BatchRunner (mesmas regras do batch)
+        self.runner = BatchRunner(
+            strategy_class,
+            datafile,
+            base_timeframe=base_timeframe,
+            workers=workers,
+            feed=feed,
+            initial_cash=initial_cash,
+            commission=commission,
+            cache=False,
+            kill_rules=kill_rules,
+            profile=profile,
+            chunk_size=chunk_size,
+        )
+        if len(self.runner.datafiles) > 1:
+            raise ValueError("Walk-forward roda sobre um arquivo de dados só")
+        self.windows = []
+        self.equity = None
+        self.summary = {}
+
+    # ------------------------------------------------------
+    def run(self, fixed_params=None, variable_params=None, verbose=True):
+        """
+        Roda o walk-forward.
+
+        Returns:
+            DataFrame com uma linha por janela. A equity OOS costurada
+            fica em self.equity e o resumo em self.summary
+        """
+        fixed_params = fixed_params or {}
+        variable_params = variable_params or {}
+        runner = self.runner
+
+        store = BarStore(runner.datafile).ensure()
+        if runner.feed == "store":
+            runner._prepare_store(runner._timeframes(fixed_params, variable_params))
+
+        days, _ = store.day_index()
+        self.windows = walk_forward_windows(days, self.window_days, self.step_days,
+                                            self.oos_fraction)
+        if not self.windows:
+            raise ValueError(f"Dados com {len(days)} dias: menos que uma janela "
+                             f"({self.window_days} dias)")
+
+        combinations = make_sampler("grid", variable_params).ask(1)
+        job = runner._make_job(fixed_params, variable_params)
+
+        if verbose:
+            print(f"\n{'='*60}")
+            print(f"  WALK FORWARD")
+            print(f"{'='*60}")
+            print(f"Estratégia: {runner.strategy_class.__name__}")
+            print(f"Arquivo: {runner.datafile}")
+            print(f"Janela: {self.window_days} dias | passo: {self.step_days}"
+                  f" | OOS: {self.oos_fraction:.0%}")
+            print(f"Janelas: {len(self.windows)} | combinações por janela: {len(combinations)}")
+            print(f"Métrica do IS: {self.metric}")
+            print(f"Workers: {runner.workers}")
+            print(f"{'='*60}\n")
+
+        # ----------------------------------------------------------
+        # IS: todas as janelas x chunks num pool só
+        # ----------------------------------------------------------
+        tasks = []
+        order = runner._order_by_data(combinations, fixed_params)
+        for n, window in enumerate(self.windows):
+            window_job = {**job, "start": window["is_start"], "end": window["is_end"]}
+            for chunk in runner._chunks(job, combinations, order):
+                tasks.append((n, (chunk, window_job, [combinations[idx] for idx in chunk], None)))
+
+        is_rows = [[None] * len(combinations) for _ in self.windows]
+        for (n, _), rows in zip(tasks, self._map(_run_chunk_task, [t for _, t in tasks])):
+            for idx, row in rows:
+                is_rows[n][idx] = row
+        if verbose:
+            print(f"✅ IS: {len(tasks)} tarefas ({len(self.windows)} janelas)")
+
+        winners = [self._best(rows) for rows in is_rows]
+
+        # ----------------------------------------------------------
+        # OOS: a combinação vencedora de cada janela
+        # ----------------------------------------------------------
+        oos_tasks = [
+            ({**job, "start": window["oos_start"], "end": window["oos_end"],
+              "equity_curve": True}, combinations[idx])
+            for window, idx in zip(self.windows, winners) if idx is not None
+        ]
+        oos_results = iter(self._map(_run_oos_task, oos_tasks))
+        if verbose:
+            print(f"✅ OOS: {len(oos_tasks)} janelas")
+
+        table, curves = [], []
+        for n, (window, idx) in enumerate(zip(self.windows, winners), 1):
+            row = {
+                "Janela": n,
+                "IS Início": window["is_start"].date(),
+                "IS Fim": (window["is_end"] - pd.Timedelta(days=1)).date(),
+                "OOS Início": window["oos_start"].date(),
+                "OOS Fim": (window["oos_end"] - pd.Timedelta(days=1)).date(),
+            }
+            if idx is None:
+                row["Erro"] = "nenhuma combinação válida no IS"
+                table.append(row)
+                continue
+
+            oos_row, equity_end, curve = next(oos_results)
+            row.update(combinations[idx])
+            row[f"IS {self.metric}"] = is_rows[n - 1][idx][self.metric]
+            row.update({
+                "OOS PnL": equity_end - self.initial_cash,
+                "OOS Trades": oos_row.get("Trades"),
+                "OOS Profit Factor": oos_row.get("Profit Factor"),
+                "OOS Max DD %": oos_row.get("Max DD %"),
+                f"OOS {self.metric}": oos_row.get(self.metric),
+            })
+            if oos_row.get("Pruned") or oos_row.get("Erro"):
+                row["Erro"] = oos_row.get("Erro") or oos_row.get("Pruned")
+            table.append(row)
+            curves.append(curve)
+
+        self.equity = stitch_equity(curves, self.initial_cash)
+        max_dd_pct, max_dd_cash = equity_drawdown(self.equity)
+        self.summary = {
+            "windows": len(self.windows),
+            "oos_pnl": sum(r.get("OOS PnL", 0) or 0 for r in table),
+            "oos_trades": sum(r.get("OOS Trades", 0) or 0 for r in table),
+            "equity_final": float(self.equity.iloc[-1]) if not self.equity.empty else self.initial_cash,
+            "max_dd_pct": max_dd_pct,
+            "max_dd_cash": max_dd_cash,
+        }
+        return pd.DataFrame(table)
+
+    # ------------------------------------------------------
+    def _best(self, rows):
+        """Índice da melhor combinação do IS (None se todas falharam/podadas)"""
+        lower = lower_is_better(self.metric)
+        best, best_value = None, None
+        for idx, row in enumerate(rows):
+            value = row.get(self.metric)
+            if value is None or (isinstance(value, float) and math.isnan(value)):
+                continue
+            if best is None or (value < best_value if lower else value > best_value):
+                best, best_value = idx, value
+        return best
+
+    def _map(self, fn, tasks):
+        """Executa as tarefas no pool (ou em sequência com 1 worker), na ordem"""
+        workers = min(self.runner.workers, len(tasks))
+        if workers <= 1:
+            return [fn(task) for task in tasks]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(fn, tasks))
+
+
+def _run_oos_task(task):
+    """
+    OOS de uma janela no worker: (linha de resultados, equity final,
+    curva de equity). Exceção vira linha de erro sem curva.
+    """
+    job, combo = task
+    try:
+        engine, timeframe = _combo_engine(job, combo)
+        result = engine.run(verbose=False)
+    except Exception as e:
+        return {**combo, "Erro": f"{type(e).__name__}: {e}"}, float("nan"), None
+    return _build_row(combo, timeframe, result), result["equity_end"], result["equity_curve"]
@@ -1,21 +1,22 @@
 # ===================================================
 # run_optimization_json.py
-# Versão simplificada - Import manual
+# Estratégias descobertas em strategies/<nome>/strategy.py
 # ===================================================
 
 import sys
 import os
 import json
 from datetime import datetime
-from engine.batch_runner import BatchRunner
 
-# ===================================================
-# IMPORT MANUAL DAS ESTRATÉGIAS
-# ===================================================
-from strategies.sma_test.strategy import SMATest
+# Só o registro (sem pandas/backtrader): help/list/strategies respondem na
+# hora. O engine e a estratégia são importados quando um batch roda.
+from engine.strategy_registry import StrategyRegistry
 
-STRATEGIES = {
-    "sma_test": SMATest,
+# Extensão do arquivo de resultados por formato de saída
+OUTPUT_FORMATS = {
+    "csv": ".csv",
+    "parquet": ".parquet",
+    "sqlite": ".db",
 }
 
 # ===================================================
@@ -35,8 +36,83 @@ def get_strategy_folder(config_path):
     return os.path.dirname(os.path.abspath(config_path))
 
 
-def run_batch_from_config(config_file, batch_name, save=True):
-    """Roda batch a partir do config JSON"""
+def run_batch_from_config(config_file, batch_name, save=True, workers=None,
+                          engine=None, cross_check=None, cache=None,
+                          output=None, top=None, search=None, budget=None, seed=None,
+                          profile=None, chunk_size=None, profiling=None,
+                          save_trades=None, distributed=None, monte_carlo=None,
+                          results_db=None, timings=None):
+    """
+    Roda batch a partir do config JSON
+
+    workers: processos em paralelo. Prioridade: argumento (CLI --workers)
+    > "workers" do batch > "workers" do global > 1 (sequencial)
+
+    engine / cross_check: mesma prioridade (CLI > batch > global).
+    engine "vector" usa o avaliador NumPy; cross_check = nº de combinações
+    conferidas contra o Backtrader
+
+    cache: reaproveita resultados já calculados (padrão True; "cache" no
+    JSON ou --no-cache na CLI). Um batch interrompido continua de onde parou.
+
+    output: formato do arquivo de resultados ("csv", "parquet", "sqlite"),
+    gravado conforme as combinações terminam. top: quantos líderes imprimir.
+
+    search / budget / seed: busca no grid ("grid", "random", "bayesian",
+    "zoom"), máximo de backtests e semente. Também no JSON do batch, junto
+    com "metric" (métrica maximizada, padrão "Equity Final") e
+    "search_batch" (pontos por rodada nas buscas adaptativas, padrão 8;
+    independente de workers).
+
+    "kill" (global e/ou batch): regras de parada antecipada por combinação
+    (max_dd_pct, equity_floor, min_trades + trades_window, timeout).
+
+    profile: perfil do Cerebro ("lean" padrão, "full" ou "lowmem"),
+    mesma prioridade (CLI --profile > batch > global).
+
+    chunk_size: combinações por Cerebro (CLI --chunk > batch > global,
+    padrão 1). Com >1 os dados são carregados uma vez por chunk e
+    indicadores iguais são compartilhados entre as combinações.
+
+    profiling: cProfile/tracemalloc em combinações escolhidas, ex:
+    {"every": 100, "tracemalloc": true} ("profiling" no JSON; CLI
+    --profile-every N [--tracemalloc] sobrescreve). Arquivos em
+    result_<batch>_<timestamp>_profile/.
+
+    timings: tempo de cada chamada dos analyzers e da carga das barras
+    (colunas T Analyzers / T Feed), com custo por barra. Padrão False: só
+    tempo por fase ("timings" no JSON; CLI --timings).
+
+    save_trades: log de trades de cada combinação ("csv", "parquet",
+    "feather", "npz"), um arquivo por combinação em
+    result_<batch>_<timestamp>_trades/ (CLI --save-trades > batch > global).
+
+    distributed: modo coordenador, ex: {"listen": "0.0.0.0:5555",
+    "authkey": "segredo", "local_workers": 0} ("distributed" no JSON; CLI
+    --listen / --local-workers / --authkey sobrescrevem). Workers entram com
+    `run_optimization_json.py worker --connect host:porta`.
+
+    "robustness" (global e/ou batch): Monte Carlo dos líderes, ex:
+    {"top": 10, "sims": 5000, "method": "bootstrap", "seed": 0,
+    "equity_floor": 95000}. monte_carlo (CLI --monte-carlo N) liga com N
+    simulações. Grava result_<batch>_<timestamp>_robustness.csv.
+
+    results_db: banco SQLite onde cada execução é registrada (padrão
+    results/results.db na raiz do repositório; "results_db" no global,
+    relativo à pasta da estratégia, false desliga; CLI --db).
+    Líderes (e Monte Carlo) pela métrica do batch ("metric"); Max DD e
+    Losses: menor é melhor.
+    Consultas: top / history / compare.
+
+    "datafile" (global): path, glob ("data/MNQ*.txt") ou lista. Com vários
+    arquivos o grid roda em cada um num só batch: coluna "datafile" no
+    resultado e TOP por arquivo.
+
+    "walk_forward" no batch: otimização walk-forward em vez do batch
+    único, ex: {"window_days": 60, "step_days": 15, "oos_fraction": 0.25,
+    "metric": "Equity Final"}. Grava wf_<batch>_<timestamp>.csv (janelas)
+    e wf_<batch>_<timestamp>_equity.csv (equity OOS costurada).
+    """
     config = load_config(config_file)
     
     if batch_name not in config["batches"]:
@@ -47,12 +123,60 @@ def run_batch_from_config(config_file, batch_name, save=True):
     global_cfg = config["global"]
     batch_cfg = config["batches"][batch_name]
     
+    from engine.batch_runner import FILE_PARAM, BatchRunner
+
     strategy_name = global_cfg["strategy"]
-    if strategy_name not in STRATEGIES:
-        raise ValueError(f"Estratégia '{strategy_name}' não encontrada!")
-    
-    strategy_class = STRATEGIES[strategy_name]
+    strategy_class = StrategyRegistry().load(strategy_name)
     strategy_folder = get_strategy_folder(config_file)
+
+    if workers is None:
+        workers = batch_cfg.get("workers", global_cfg.get("workers", 1))
+    if engine is None:
+        engine = batch_cfg.get("engine", global_cfg.get("engine", "backtrader"))
+    if cross_check is None:
+        cross_check = batch_cfg.get("cross_check", global_cfg.get("cross_check", 0))
+    if cache is None:
+        cache = batch_cfg.get("cache", global_cfg.get("cache", True))
+    if output is None:
+        output = batch_cfg.get("output", global_cfg.get("output", "csv"))
+    if top is None:
+        top = batch_cfg.get("top", global_cfg.get("top", 10))
+    top = int(top)
+    if search is None:
+        search = batch_cfg.get("search", global_cfg.get("search", "grid"))
+    if budget is None:
+        budget = batch_cfg.get("budget", global_cfg.get("budget"))
+    if seed is None:
+        seed = batch_cfg.get("seed", global_cfg.get("seed"))
+    if profile is None:
+        profile = batch_cfg.get("profile", global_cfg.get("profile", "lean"))
+    if chunk_size is None:
+        chunk_size = batch_cfg.get("chunk_size", global_cfg.get("chunk_size", 1))
+    if profiling is None:
+        profiling = batch_cfg.get("profiling", global_cfg.get("profiling"))
+    if timings is None:
+        timings = batch_cfg.get("timings", global_cfg.get("timings", False))
+    if save_trades is None:
+        save_trades = batch_cfg.get("save_trades", global_cfg.get("save_trades"))
+    distributed_cfg = batch_cfg.get("distributed", global_cfg.get("distributed"))
+    # --authkey sozinho não liga o modo distribuído (só --listen/--local-workers)
+    if distributed_cfg or {"listen", "local_workers"} & set(distributed or {}):
+        distributed_cfg = {**({} if distributed_cfg in (None, True) else distributed_cfg),
+                           **(distributed or {})}
+    metric = batch_cfg.get("metric", global_cfg.get("metric", "Equity Final"))
+
+    robustness = {**global_cfg.get("robustness", {}), **batch_cfg.get("robustness", {})}
+    if monte_carlo is not None:
+        robustness["sims"] = int(monte_carlo)
+    unknown = set(robustness) - {"top", "sims", "method", "seed", "equity_floor"}
+    if unknown:
+        raise ValueError(f"Opções de robustness desconhecidas: {sorted(unknown)}")
+
+    # Regras de parada antecipada: as do batch sobrescrevem as do global
+    kill_rules = {**global_cfg.get("kill", {}), **batch_cfg.get("kill", {})}
+
+    if output not in OUTPUT_FORMATS:
+        raise ValueError(f"Formato de saída inválido: {output} ({', '.join(OUTPUT_FORMATS)})")
     
     print(f"\n{'='*70}")
     print(f"  🚀 {batch_cfg['name']}")
@@ -61,41 +185,322 @@ def run_batch_from_config(config_file, batch_name, save=True):
     print(f"Config: {os.path.basename(config_file)}")
     print(f"Pasta: {strategy_folder}")
     print(f"Arquivo: {global_cfg['datafile']}")
+    print(f"Engine: {engine}")
+    print(f"Perfil: {profile}")
     print(f"{'='*70}\n")
+
+    if "walk_forward" in batch_cfg:
+        return run_walk_forward(strategy_class, global_cfg, batch_cfg, batch_name,
+                                strategy_folder, save=save, workers=workers,
+                                kill_rules=kill_rules, profile=profile,
+                                chunk_size=chunk_size)
+
+    # Resultados gravados em disco conforme terminam (sem save: em memória)
+    started_at = datetime.now()
+    result_path = None
+    if save:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        result_file = f"result_{batch_name}_{timestamp}{OUTPUT_FORMATS[output]}"
+        result_path = os.path.join(strategy_folder, result_file)
     
     runner = BatchRunner(
         strategy_class=strategy_class,
         datafile=global_cfg["datafile"],
-        base_timeframe=batch_cfg["fixed"].get("timeframe")
+        base_timeframe=batch_cfg["fixed"].get("timeframe"),
+        workers=workers,
+        engine=engine,
+        cross_check=cross_check,
+        initial_cash=global_cfg.get("initial_cash", 100000),
+        commission=global_cfg.get("commission", 1.24),
+        cache=cache,
+        sink=result_path,
+        top_k=max(top, 1),
+        rank_by=(metric,),
+        kill_rules=kill_rules,
+        profile=profile,
+        chunk_size=chunk_size,
+        profiling=profiling,
+        save_trades=save_trades,
+        distributed=distributed_cfg,
+        indicator_bank=batch_cfg.get("indicator_bank", global_cfg.get("indicator_bank", True)),
+        timings=timings,
     )
     
     df = runner.run(
         fixed_params=batch_cfg["fixed"],
         variable_params=batch_cfg["variable"],
-        verbose=True
+        verbose=True,
+        search=search,
+        budget=None if budget is None else int(budget),
+        seed=None if seed is None else int(seed),
+        metric=metric,
+        search_batch=batch_cfg.get("search_batch", global_cfg.get("search_batch")),
     )
     
+    # Tabela completa fica só no arquivo; aqui imprime os líderes
     print("\n" + "="*70)
     print("  📊 RESULTADOS")
     print("="*70)
-    print(df.to_string(index=False))
+    print(f"Combinações: {runner.count}")
+    if cache:
+        print(f"Do cache de resultados: {runner.cached}/{runner.count}")
+    if runner.pruned:
+        print(f"Podadas (kill rules): {runner.pruned}")
     
     if save:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        result_file = f"result_{batch_name}_{timestamp}.csv"
-        result_path = os.path.join(strategy_folder, result_file)
-        
-        df.to_csv(result_path, index=False)
-        print(f"\n✅ Resultado salvo: {result_file}")
+        print(f"\n✅ Resultado salvo: {os.path.basename(result_path)}")
     
     print("\n" + "="*70)
-    print("  🏆 TOP 5 COMBINAÇÕES")
+    print(f"  🏆 TOP {top} COMBINAÇÕES ({_rank_label(metric)})")
     print("="*70)
-    print(runner.get_best(metric="Equity Final", top_n=5).to_string(index=False))
+    leaders = runner.get_best(metric=metric, top_n=top)
+    print(_leaders_table(leaders).to_string(index=False))
+
+    if len(runner.datafiles) > 1:
+        for datafile, leaders in runner.get_best_by_file(metric, top).items():
+            print("\n" + "="*70)
+            print(f"  🏆 TOP {top} - {os.path.basename(datafile)}")
+            print("="*70)
+            print(_leaders_table(leaders.drop(columns=FILE_PARAM)).to_string(index=False))
+
+    if robustness:
+        run_robustness(runner, robustness, top, result_path if save else None, metric=metric)
+
+    if results_db is None:
+        results_db = global_cfg.get("results_db", True)
+        # Path do config: relativo à pasta da estratégia, como os result_*.csv
+        if isinstance(results_db, str) and not os.path.isabs(results_db):
+            results_db = os.path.join(strategy_folder, results_db)
+    if save and results_db:
+        record_run(runner, results_db, global_cfg, batch_cfg, batch_name, config_file,
+                   started_at, result_path, engine=engine, profile=profile, search=search)
     
     return df
 
 
+def record_run(runner, db_path, global_cfg, batch_cfg, batch_name, config_file,
+               started_at, result_path, **info):
+    """Registra a execução no banco de resultados (engine/results_db.py)"""
+    from engine.bar_store import BarStore
+    from engine.results_db import ResultsDB, config_hash
+
+    with ResultsDB(None if db_path is True else db_path) as db:
+        run_id = db.record_run(
+            global_cfg["strategy"],
+            batch_name,
+            runner.iter_rows(),
+            started_at=started_at,
+            fixed_params=batch_cfg["fixed"],
+            config_path=os.path.abspath(config_file),
+            config_hash=config_hash(global_cfg, batch_cfg),
+            data_fingerprint="+".join(BarStore(f).fingerprint()["sha1"]
+                                      for f in runner.datafiles),
+            datafile=", ".join(os.path.basename(f) for f in runner.datafiles),
+            result_path=os.path.abspath(result_path),
+            **info,
+        )
+        print(f"🗄️ Execução #{run_id} registrada em {db.path}")
+    return run_id
+
+
+def run_robustness(runner, cfg, top, result_path=None, metric="Equity Final"):
+    """Monte Carlo dos líderes por `metric` (chave "robustness" do config)"""
+    sims = int(cfg.get("sims", 1000))
+    method = cfg.get("method", "bootstrap")
+
+    print("\n" + "="*70)
+    print(f"  🎲 MONTE CARLO ({method}, {sims:,} simulações)")
+    print("="*70)
+    table = runner.robustness(
+        metric=metric,
+        top_n=int(cfg.get("top", top)),
+        sims=sims,
+        method=method,
+        seed=int(cfg.get("seed", 0)),
+        equity_floor=cfg.get("equity_floor"),
+    )
+
+    # Terminal: parâmetros + resultado real + colunas MC
+    mc_cols = [c for c in table if c.startswith("MC ")]
+    shown = [c for c in runner.param_names if c in table] + ["Equity Final", "Max DD %"]
+    shown += [metric] * (metric not in shown) + mc_cols
+    print(_leaders_table(table[shown]).to_string(index=False))
+
+    if result_path:
+        path = os.path.splitext(result_path)[0] + "_robustness.csv"
+        table.to_csv(path, index=False)
+        print(f"\n✅ Monte Carlo salvo: {os.path.basename(path)}")
+    return table
+
+
+def _rank_label(metric):
+    """Título do ranking: métrica e sentido (results_db.LOWER_IS_BETTER)"""
+    from engine.results_db import lower_is_better
+
+    return f"por {metric}, {'menor' if lower_is_better(metric) else 'maior'} primeiro"
+
+
+def _leaders_table(leaders):
+    """Tabela de líderes para o terminal (sem tempos por fase, arquivo só pelo nome)"""
+    from engine.batch_runner import FILE_PARAM
+    from engine.result_sink import TIMING_COLUMNS
+
+    leaders = leaders.drop(columns=[c for c in TIMING_COLUMNS.values() if c in leaders])
+    if FILE_PARAM in leaders:
+        leaders = leaders.assign(**{FILE_PARAM: leaders[FILE_PARAM].map(os.path.basename)})
+    return leaders
+
+
+def run_walk_forward(strategy_class, global_cfg, batch_cfg, batch_name, strategy_folder,
+                     save=True, workers=1, kill_rules=None, profile="lean", chunk_size=1):
+    """Walk-forward do batch (chave "walk_forward" do config)"""
+    from engine.walk_forward import WalkForward
+
+    wf_cfg = batch_cfg["walk_forward"]
+    unknown = set(wf_cfg) - {"window_days", "step_days", "oos_fraction", "metric"}
+    if unknown:
+        raise ValueError(f"Opções de walk_forward desconhecidas: {sorted(unknown)}")
+
+    wf = WalkForward(
+        strategy_class,
+        global_cfg["datafile"],
+        window_days=wf_cfg["window_days"],
+        step_days=wf_cfg.get("step_days"),
+        oos_fraction=wf_cfg.get("oos_fraction", 0.25),
+        metric=wf_cfg.get("metric", batch_cfg.get("metric", "Equity Final")),
+        base_timeframe=batch_cfg["fixed"].get("timeframe"),
+        workers=workers,
+        initial_cash=global_cfg.get("initial_cash", 100000),
+        commission=global_cfg.get("commission", 1.24),
+        kill_rules=kill_rules,
+        profile=profile,
+        chunk_size=chunk_size,
+    )
+
+    df = wf.run(
+        fixed_params=batch_cfg["fixed"],
+        variable_params=batch_cfg["variable"],
+        verbose=True,
+    )
+
+    print("\n" + "="*70)
+    print("  🚶 WALK FORWARD - JANELAS")
+    print("="*70)
+    print(df.to_string(index=False))
+
+    summary = wf.summary
+    print("\n" + "="*70)
+    print("  📈 EQUITY OOS COSTURADA")
+    print("="*70)
+    print(f"Janelas        : {summary['windows']}")
+    print(f"PnL OOS        : {summary['oos_pnl']:,.2f}")
+    print(f"Trades OOS     : {summary['oos_trades']}")
+    print(f"Equity final   : {summary['equity_final']:,.2f}")
+    print(f"Max Drawdown % : {summary['max_dd_pct']:.2f}%")
+    print(f"Max Drawdown $ : {summary['max_dd_cash']:,.2f}")
+
+    if save:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        base = os.path.join(strategy_folder, f"wf_{batch_name}_{timestamp}")
+        df.to_csv(base + ".csv", index=False)
+        wf.equity.to_csv(base + "_equity.csv", index_label="datetime")
+        print(f"\n✅ Resultado salvo: {os.path.basename(base)}.csv (+ _equity.csv)")
+
+    return df
+
+
+def tail_from_config(config_file, batch_name, params=None, profile=None,
+                     poll=None, idle_timeout=None, save_trades=None):
+    """
+    Modo incremental com a config de produção: segue o datafile do global
+    (engine/tail_follow.py), processando só as barras acrescentadas, com
+    uma linha por barra nova (latência, equity, trades) até Ctrl+C ou
+    `idle_timeout` segundos sem barras.
+
+    Params: "fixed" do batch + os "variable" com um só valor; `params`
+    (CLI --params "sma_period=30,target_rr=2") sobrescreve/completa.
+    Os "poll" e "idle_timeout" também podem vir do batch/global.
+    """
+    import signal
+    import threading
+    from engine.backtest_engine import BacktestEngine
+    from engine.trade_recorder import TRADE_FORMATS, trade_format
+
+    config = load_config(config_file)
+    if batch_name not in config["batches"]:
+        print(f"❌ Batch '{batch_name}' não encontrado!")
+        print(f"Disponíveis: {list(config['batches'].keys())}")
+        return None
+
+    global_cfg = config["global"]
+    batch_cfg = config["batches"][batch_name]
+    if not isinstance(global_cfg["datafile"], str) or any(c in global_cfg["datafile"] for c in "*?["):
+        raise ValueError("tail segue um arquivo só: \"datafile\" do global deve ser um path")
+
+    combo = dict(batch_cfg["fixed"])
+    for name, values in batch_cfg.get("variable", {}).items():
+        if len(values) == 1:
+            combo[name] = values[0]
+    combo.update(params or {})
+    missing = [name for name in batch_cfg.get("variable", {}) if name not in combo]
+    if missing:
+        raise ValueError(f"tail roda uma combinação: informe {missing} em --params")
+
+    if profile is None:
+        profile = batch_cfg.get("profile", global_cfg.get("profile", "lean"))
+    if poll is None:
+        poll = batch_cfg.get("poll", global_cfg.get("poll", 0.25))
+    if idle_timeout is None:
+        idle_timeout = batch_cfg.get("idle_timeout", global_cfg.get("idle_timeout"))
+    fmt = trade_format(save_trades)
+
+    timeframe = combo.pop("timeframe", None)
+    engine = BacktestEngine(
+        strategy=StrategyRegistry().load(global_cfg["strategy"]),
+        datafile=global_cfg["datafile"],
+        timeframe_minutes=timeframe,
+        initial_cash=global_cfg.get("initial_cash", 100000),
+        commission=global_cfg.get("commission", 1.24),
+        strategy_params=combo,
+        profile=profile,
+    )
+
+    print(f"\n{'='*70}")
+    print(f"  📡 TAIL {batch_cfg['name']}")
+    print(f"{'='*70}")
+    print(f"Params: {combo} | timeframe {timeframe or 'auto'}")
+    print("Ctrl+C encerra (métricas finais = run() sobre o arquivo até aqui)")
+
+    # Ctrl+C encerra a leitura; o Cerebro termina a última barra normalmente
+    stop = threading.Event()
+    previous = signal.signal(signal.SIGINT, lambda *_: stop.set())
+    try:
+        result = engine.run_tail(poll=float(poll), stop=stop,
+                                 idle_timeout=None if idle_timeout is None else float(idle_timeout))
+    finally:
+        signal.signal(signal.SIGINT, previous)
+
+    if fmt:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(get_strategy_folder(config_file),
+                            f"tail_{batch_name}_{timestamp}{TRADE_FORMATS[fmt]}")
+        result["trades"].export(path, fmt)
+        print(f"\n✅ Trades salvos: {os.path.basename(path)}")
+    return result
+
+
+def parse_params(text):
+    """'sma_period=30,target_rr=2' -> {"sma_period": 30, "target_rr": 2}"""
+    params = {}
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        name, _, value = item.partition("=")
+        try:
+            params[name.strip()] = json.loads(value)
+        except ValueError:
+            params[name.strip()] = value.strip()
+    return params
+
+
 def list_strategy_configs(strategy_folder):
     """Lista configs de uma estratégia"""
     if not os.path.exists(strategy_folder):
@@ -126,20 +531,106 @@ def list_strategy_configs(strategy_folder):
     print(f"\n{'='*70}")
 
 
+def _print_rows(rows, columns=None):
+    """Tabela simples no terminal (sem pandas)"""
+    if not rows:
+        print("(nenhum resultado)")
+        return
+    rows = [dict(r) for r in rows]
+    columns = columns or list(rows[0].keys())
+
+    def fmt(value):
+        if value is None:
+            return "-"
+        if isinstance(value, float):
+            return f"{value:,.2f}" if abs(value) >= 1000 else f"{value:.4g}"
+        return str(value)
+
+    table = [[fmt(row.get(col)) for col in columns] for row in rows]
+    widths = [max(len(col), *(len(line[i]) for line in table)) for i, col in enumerate(columns)]
+    print("  ".join(col.ljust(w) for col, w in zip(columns, widths)))
+    for line in table:
+        print("  ".join(cell.ljust(w) for cell, w in zip(line, widths)))
+
+
+def query_results(command, args, db_path=None, metric=None, batch=None,
+                  timeframe=None, since=None, limit=None):
+    """Comandos top / history / compare / db-import sobre o banco de resultados"""
+    from engine.results_db import DEFAULT_DB, ResultsDB
+
+    db_path = db_path or DEFAULT_DB
+    if command != "db-import" and not os.path.exists(db_path):
+        print(f"❌ Banco de resultados não encontrado: {db_path}")
+        return
+
+    with ResultsDB(db_path) as db:
+        if command == "top":
+            strategy = args[0] if args else None
+            rows = db.top(strategy, metric=metric or "equity_final", batch=batch,
+                          timeframe=timeframe, since=since, limit=int(limit or 10))
+            print(f"\n🏆 TOP {int(limit or 10)} por {metric or 'equity_final'}"
+                  f"{' - ' + strategy if strategy else ''}\n")
+            _print_rows(rows)
+
+        elif command == "history":
+            strategy = args[0] if args else None
+            rows = db.history(strategy, batch=batch, since=since, limit=int(limit or 20))
+            print(f"\n🕘 EXECUÇÕES{' - ' + strategy if strategy else ''}\n")
+            _print_rows(rows)
+
+        elif command == "compare":
+            if not args:
+                print("❌ Uso: python run_optimization_json.py compare <run_id> <run_id> ...")
+                return
+            rows = db.compare(args, metric=metric or "equity_final")
+            print(f"\n⚖️ COMPARAÇÃO ({metric or 'equity_final'})\n")
+            _print_rows(rows)
+
+        elif command == "db-import":
+            if not args:
+                print("❌ Uso: python run_optimization_json.py db-import <strategy_folder>")
+                return
+            folder = args[0]
+            strategy = os.path.basename(os.path.normpath(folder))
+            imported = 0
+            for name in sorted(os.listdir(folder)):
+                path = os.path.join(folder, name)
+                if (name.startswith("result_") and name.endswith(".csv")
+                        and not name.endswith("_robustness.csv")
+                        and not db.has_result_path(path)):
+                    run_id = db.import_csv(path, strategy)
+                    print(f"🗄️ #{run_id} <- {name}")
+                    imported += 1
+            print(f"\n✅ {imported} arquivos importados em {db.path}")
+
+
 def list_all_strategies():
     """Lista estratégias registradas"""
     print(f"\n{'='*70}")
     print(f"  📁 ESTRATÉGIAS DISPONÍVEIS")
     print(f"{'='*70}\n")
     
-    for strategy_name in sorted(STRATEGIES.keys()):
-        strategy_path = os.path.join("strategies", strategy_name)
+    # Execuções registradas no banco (results_db.py só usa sqlite3: continua rápido)
+    from engine.results_db import DEFAULT_DB, ResultsDB
+    runs = {}
+    if os.path.exists(DEFAULT_DB):
+        with ResultsDB(DEFAULT_DB) as db:
+            runs = db.run_counts()
+
+    registry = StrategyRegistry()
+    for strategy_name in registry.names():
+        strategy_path = os.path.join(registry.root, strategy_name)
         if os.path.exists(strategy_path):
             configs = [f for f in os.listdir(strategy_path) if f.endswith(".json")]
-            results = [f for f in os.listdir(strategy_path) if f.endswith(".csv")]
+            results = [f for f in os.listdir(strategy_path)
+                       if f.startswith("result_") and f.endswith(tuple(OUTPUT_FORMATS.values()))]
             print(f"📂 {strategy_name}/")
+            if registry.describe(strategy_name):
+                print(f"   {registry.describe(strategy_name)}")
             print(f"   Configs: {len(configs)}")
             print(f"   Results: {len(results)}")
+            if runs.get(strategy_name):
+                print(f"   Execuções no banco: {runs[strategy_name]}")
             print()
     
     print(f"{'='*70}")
@@ -150,21 +641,112 @@ def print_help():
     print(f"  BATCH OPTIMIZATION - USO")
     print(f"{'='*70}")
     print("\n🎯 Comandos:")
-    print("  python run_optimization_json.py <batch> <config_path>")
+    print("  python run_optimization_json.py <batch> <config_path> [--workers N]")
+    print("        [--engine backtrader|vector] [--cross-check N] [--no-cache]")
+    print("        [--output csv|parquet|sqlite] [--top N]")
+    print("        [--search grid|random|bayesian|zoom] [--budget N] [--seed N]")
+    print("        [--profile lean|full|lowmem] [--chunk N]")
+    print("        [--profile-every N] [--tracemalloc] [--timings]")
+    print("        [--save-trades csv|parquet|feather|npz]")
+    print("        [--listen HOST:PORTA] [--local-workers N] [--authkey CHAVE]")
+    print("        [--monte-carlo N] [--db PATH]")
+    print("  python run_optimization_json.py top [strategy] [--metric pf] [--batch B]")
+    print("        [--timeframe 10m] [--since 30d] [--top N] [--db PATH]")
+    print("  python run_optimization_json.py history [strategy] [--batch B] [--since 30d]")
+    print("  python run_optimization_json.py compare <run_id> <run_id> ... [--metric pf]")
+    print("  python run_optimization_json.py db-import <strategy_folder>")
+    print("  python run_optimization_json.py worker --connect HOST:PORTA --authkey CHAVE")
+    print("  python run_optimization_json.py tail <batch> <config_path> [--params k=v,...]")
+    print("        [--poll S] [--idle S] [--profile lean|full|lowmem] [--save-trades FMT]")
+    print("        [--verbose]")
     print("  python run_optimization_json.py list <strategy_folder>")
     print("  python run_optimization_json.py strategies")
     print("\n📝 Exemplos:")
     print("  python run_optimization_json.py sma strategies/sma_test/config_v1.json")
+    print("  python run_optimization_json.py sma strategies/sma_test/config_v1.json --workers 8")
+    print("  python run_optimization_json.py sma strategies/sma_test/config_v1.json --engine vector --cross-check 5")
+    print("  python run_optimization_json.py sma strategies/sma_test/config_v1.json --listen 0.0.0.0:5555 --authkey CHAVE")
+    print("  python run_optimization_json.py worker --connect 192.168.0.10:5555 --authkey CHAVE")
+    print("  python run_optimization_json.py tail sma strategies/sma_test/config_prod.json --params sma_period=30")
+    print("  python run_optimization_json.py top sma_test --metric pf --timeframe 10m --since 30d")
     print("  python run_optimization_json.py list strategies/sma_test")
     print("  python run_optimization_json.py strategies")
     print(f"\n{'='*70}\n")
 
 
+def pop_option(argv, name, default=None):
+    """Remove '--name valor' (ou '--name=valor') de argv e retorna o valor"""
+    for i, arg in enumerate(argv):
+        if arg == name and i + 1 < len(argv):
+            value = argv[i + 1]
+            del argv[i:i + 2]
+            return value
+        if arg.startswith(name + "="):
+            del argv[i]
+            return arg.split("=", 1)[1]
+    return default
+
+
 # ===================================================
 # CLI
 # ===================================================
 if __name__ == "__main__":
     os.system("cls" if os.name == "nt" else "clear")
+
+    workers = pop_option(sys.argv, "--workers")
+    engine = pop_option(sys.argv, "--engine")
+    cross_check = pop_option(sys.argv, "--cross-check")
+    output = pop_option(sys.argv, "--output")
+    top = pop_option(sys.argv, "--top")
+    search = pop_option(sys.argv, "--search")
+    budget = pop_option(sys.argv, "--budget")
+    seed = pop_option(sys.argv, "--seed")
+    profile = pop_option(sys.argv, "--profile")
+    chunk_size = pop_option(sys.argv, "--chunk")
+    profile_every = pop_option(sys.argv, "--profile-every")
+    save_trades = pop_option(sys.argv, "--save-trades")
+    listen = pop_option(sys.argv, "--listen")
+    local_workers = pop_option(sys.argv, "--local-workers")
+    authkey = pop_option(sys.argv, "--authkey")
+    connect = pop_option(sys.argv, "--connect")
+    monte_carlo = pop_option(sys.argv, "--monte-carlo")
+    db_path = pop_option(sys.argv, "--db")
+    metric = pop_option(sys.argv, "--metric")
+    batch_filter = pop_option(sys.argv, "--batch")
+    timeframe = pop_option(sys.argv, "--timeframe")
+    since = pop_option(sys.argv, "--since")
+    params = pop_option(sys.argv, "--params")
+    poll = pop_option(sys.argv, "--poll")
+    idle = pop_option(sys.argv, "--idle")
+
+    distributed = {}
+    if listen is not None:
+        distributed["listen"] = listen
+    if local_workers is not None:
+        distributed["local_workers"] = int(local_workers)
+    if authkey is not None:
+        distributed["authkey"] = authkey
+
+    profiling = None
+    if profile_every is not None:
+        profiling = {"every": int(profile_every)}
+    if "--tracemalloc" in sys.argv:
+        sys.argv.remove("--tracemalloc")
+        profiling = {**(profiling or {"every": 1}), "tracemalloc": True}
+
+    verbose = "--verbose" in sys.argv
+    if verbose:
+        sys.argv.remove("--verbose")
+
+    timings = None
+    if "--timings" in sys.argv:
+        sys.argv.remove("--timings")
+        timings = True
+
+    cache = None
+    if "--no-cache" in sys.argv:
+        sys.argv.remove("--no-cache")
+        cache = False
     
     if len(sys.argv) < 2:
         print_help()
@@ -178,6 +760,35 @@ if __name__ == "__main__":
     elif command == "strategies":
         list_all_strategies()
     
+    elif command == "worker":
+        if connect is None or not authkey:
+            print("❌ Uso: python run_optimization_json.py worker --connect HOST:PORTA --authkey CHAVE")
+            print("   (a mesma chave do coordenador; impressa por ele quando gerada)")
+            sys.exit(1)
+        from engine.distributed import run_worker
+        run_worker(connect, authkey=authkey)
+
+    elif command == "tail":
+        if len(sys.argv) < 4:
+            print("❌ Uso: python run_optimization_json.py tail <batch> <config_path>")
+            sys.exit(1)
+        try:
+            tail_from_config(sys.argv[3], sys.argv[2], params=parse_params(params or ""),
+                             profile=profile, poll=poll, idle_timeout=idle,
+                             save_trades=save_trades)
+        except Exception as e:
+            print(f"\n❌ Erro: {e}")
+            if verbose:
+                import traceback
+                traceback.print_exc()
+            else:
+                print("   (--verbose mostra o traceback)")
+            sys.exit(1)
+
+    elif command in ("top", "history", "compare", "db-import"):
+        query_results(command, sys.argv[2:], db_path=db_path, metric=metric,
+                      batch=batch_filter, timeframe=timeframe, since=since, limit=top)
+
     elif command == "list":
         if len(sys.argv) < 3:
             print("❌ Uso: python run_optimization_json.py list <strategy_folder>")
@@ -193,7 +804,14 @@ if __name__ == "__main__":
         config_path = sys.argv[2]
         
         try:
-            run_batch_from_config(config_path, batch_name, save=True)
+            run_batch_from_config(config_path, batch_name, save=True, workers=workers,
+                                  engine=engine, cross_check=cross_check, cache=cache,
+                                  output=output, top=top,
+                                  search=search, budget=budget, seed=seed,
+                                  profile=profile, chunk_size=chunk_size,
+                                  profiling=profiling, save_trades=save_trades,
+                                  distributed=distributed, monte_carlo=monte_carlo,
+                                  results_db=db_path, timings=timings)
         except Exception as e:
             print(f"\n❌ Erro: {e}")
             import traceback
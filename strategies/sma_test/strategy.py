@@ -12,6 +12,13 @@ class SMATest(bt.Strategy):
         ("target_rr", 2.0),      # múltiplo do stop (R)
     )
 
+    # Mesma lógica declarada para o avaliador vetorizado (engine/vector_engine.py)
+    vector = dict(
+        entry=("close", ">", ("sma", "sma_period")),
+        exit=dict(kind="stop_target", stop="stop_points", rr="target_rr"),
+        size=1,
+    )
+
     def __init__(self):
         self.sma = bt.indicators.SMA(
             self.data.close,
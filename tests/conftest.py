@@ -0,0 +1,26 @@
+# ===================================================
+# conftest.py
+# Fixtures comuns dos testes: dados sintéticos pequenos com semente fixa
+# ===================================================
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.generate_data import generate  # noqa: E402
+
+
+# Parâmetros da SMATest usados nas comparações (gera trades nos 2 dias)
+SMA_PARAMS = {"sma_period": 10, "stop_points": 20, "target_rr": 1.0}
+
+
+@pytest.fixture(scope="session")
+def datafile(tmp_path_factory):
+    """2 dias de barras 1m (semente 7); termina às 17:00, fora da borda de 7m"""
+    path = tmp_path_factory.mktemp("data") / "mnq_2d_s7.txt"
+    generate(str(path), size="2d", seed=7)
+    return str(path)
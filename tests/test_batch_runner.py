@@ -0,0 +1,71 @@
+# ===================================================
+# test_batch_runner.py
+# Pool de processos: worker que morre, reenvio e retomada pelo cache
+# ===================================================
+import math
+import multiprocessing
+import os
+
+import pytest
+
+from engine.batch_runner import BatchRunner
+from strategies.sma_test.strategy import SMATest
+
+
+# Período que derruba o processo do worker (os._exit, sem exceção)
+CRASH_PERIOD = 13
+
+FIXED = {"timeframe": 7, "stop_points": 20, "target_rr": 1.0}
+VARIABLE = {"sma_period": [8, 10, CRASH_PERIOD, 20]}
+
+
+class CrashingSMA(SMATest):
+    """SMATest que mata o worker no período CRASH_PERIOD (só fora do processo principal)"""
+
+    def __init__(self):
+        if self.p.sma_period == CRASH_PERIOD and multiprocessing.parent_process() is not None:
+            os._exit(1)
+        super().__init__()
+
+
+def _by_period(runner):
+    return {row["sma_period"]: row for row in runner.results}
+
+
+@pytest.fixture(scope="module")
+def sequential(datafile):
+    runner = BatchRunner(CrashingSMA, datafile, cache=False)
+    runner.run(FIXED, VARIABLE, verbose=False)
+    return _by_period(runner)
+
+
+def test_dead_worker_only_fails_its_combination(datafile, sequential):
+    runner = BatchRunner(CrashingSMA, datafile, workers=2, cache=False)
+    runner.run(FIXED, VARIABLE, verbose=False)
+    rows = _by_period(runner)
+
+    assert "BrokenProcessPool" in rows[CRASH_PERIOD]["Erro"]
+    assert math.isnan(rows[CRASH_PERIOD]["Equity Final"])
+    for period in VARIABLE["sma_period"]:
+        if period == CRASH_PERIOD:
+            continue
+        assert "Erro" not in rows[period]
+        assert rows[period]["Equity Final"] == sequential[period]["Equity Final"]
+        assert rows[period]["Trades"] == sequential[period]["Trades"]
+
+
+def test_resume_reruns_only_failed_combinations(datafile, sequential, tmp_path):
+    path = str(tmp_path / "cache.jsonl")
+    crashed = BatchRunner(CrashingSMA, datafile, workers=2, cache=path)
+    crashed.run(FIXED, VARIABLE, verbose=False)
+    assert crashed.cached == 0
+
+    # Retomada sequencial: as que terminaram vêm do cache, a que falhou roda de novo
+    resumed = BatchRunner(CrashingSMA, datafile, cache=path)
+    resumed.run(FIXED, VARIABLE, verbose=False)
+    rows = _by_period(resumed)
+
+    assert resumed.cached == len(VARIABLE["sma_period"]) - 1
+    assert "Erro" not in rows[CRASH_PERIOD]
+    for period, row in sequential.items():
+        assert rows[period]["Equity Final"] == row["Equity Final"]
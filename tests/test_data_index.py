@@ -0,0 +1,57 @@
+# ===================================================
+# test_data_index.py
+# Índice de metadados: preguiçoso e sem exigir pasta gravável
+# ===================================================
+import os
+import shutil
+
+import pytest
+
+from engine import data_index
+from engine.batch_runner import BatchRunner
+from engine.data_index import DataIndex
+from strategies.sma_test.strategy import SMATest
+
+
+@pytest.fixture
+def copy(tmp_path, datafile):
+    """Cópia dos dados numa pasta própria (sem .bar_cache)"""
+    path = tmp_path / "dados" / "mnq.txt"
+    path.parent.mkdir()
+    shutil.copyfile(datafile, path)
+    return str(path)
+
+
+def test_index_matches_file(copy):
+    with open(copy) as f:
+        lines = f.read().splitlines()
+    index = DataIndex(copy)
+
+    assert not os.path.exists(index.index_file)
+    assert index.rows == len(lines)
+    assert os.path.exists(index.index_file)
+    assert index.start.strftime("%Y%m%d %H%M%S") == lines[0][:15]
+    assert index.end.strftime("%Y%m%d %H%M%S") == lines[-1][:15]
+    assert index.timeframe_minutes() == 1
+
+
+def test_unwritable_folder_keeps_index_in_memory(copy, monkeypatch):
+    def fail(*args, **kwargs):
+        raise PermissionError("somente leitura")
+
+    monkeypatch.setattr(data_index.os, "makedirs", fail)
+    index = DataIndex(copy).ensure()
+
+    assert index.rows > 0
+    assert not os.path.exists(os.path.dirname(index.index_file))
+
+
+def test_vector_batch_with_timeframe_skips_index(copy):
+    fixed = {"timeframe": 7, "stop_points": 20, "target_rr": 1.0}
+    runner = BatchRunner(SMATest, copy, engine="vector", cache=False)
+    runner.run(fixed, {"sma_period": [10, 20]}, verbose=False)
+    assert not os.path.exists(DataIndex(copy).index_file)
+
+    runner = BatchRunner(SMATest, copy, cache=False)
+    runner.run(fixed, {"sma_period": [10, 20]}, verbose=False)
+    assert os.path.exists(DataIndex(copy).index_file)
@@ -0,0 +1,134 @@
+# ===================================================
+# test_distributed.py
+# Modo distribuído: configuração, autenticação e fila com lease
+# ===================================================
+import queue
+
+import pytest
+
+from engine import distributed
+from engine.distributed import WorkQueue, is_loopback, normalize_distributed
+
+
+def test_remote_listen_requires_authkey():
+    with pytest.raises(ValueError, match="authkey"):
+        normalize_distributed({"listen": "0.0.0.0:5555"})
+    cfg = normalize_distributed({"listen": "0.0.0.0:5555", "authkey": "segredo"})
+    assert cfg["authkey"] == b"segredo"
+    assert not cfg["authkey_generated"]
+
+
+def test_loopback_without_authkey_gets_random_key():
+    first = normalize_distributed({"listen": "127.0.0.1:5555"})
+    second = normalize_distributed(True)
+    assert first["authkey_generated"] and second["authkey_generated"]
+    assert len(first["authkey"]) >= 32
+    assert first["authkey"] != second["authkey"]
+
+
+def test_is_loopback():
+    assert is_loopback("127.0.0.1") and is_loopback("localhost") and is_loopback("::1")
+    assert not is_loopback("0.0.0.0")
+    assert not is_loopback("192.168.0.10")
+    assert not is_loopback("example.org")
+
+
+# ----------------------------------------------------------
+# WorkQueue: lease, expiração e reenvio
+# ----------------------------------------------------------
+class Clock:
+    """time.monotonic controlado pelo teste"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(distributed.time, "monotonic", clock)
+    return clock
+
+
+def _events(work):
+    events = []
+    while True:
+        try:
+            events.append(work.events.get_nowait())
+        except queue.Empty:
+            return events
+
+
+def test_lease_and_complete(clock):
+    work = WorkQueue(lease_timeout=10)
+    work.put([0, 1], ["a", "b"])
+
+    lease_id, task = work.lease("w1")
+    assert task["indices"] == [0, 1]
+    assert work.lease("w2") is None
+    assert work.complete(lease_id, [(0, "ra"), (1, "rb")])
+    assert _events(work) == [("rows", [(0, "ra"), (1, "rb")])]
+
+
+def test_expired_lease_is_split_and_requeued(clock):
+    work = WorkQueue(lease_timeout=10, max_attempts=3)
+    work.put([0, 1, 2], ["a", "b", "c"])
+    lease_id, _ = work.lease("lento")
+
+    clock.now += 5
+    assert work.expire() == 0
+    clock.now += 6
+    assert work.expire() == 1
+
+    # Volta uma combinação por tarefa, na ordem, com a tentativa contada
+    retried = [work.lease("w2")[1] for _ in range(3)]
+    assert [t["indices"] for t in retried] == [[0], [1], [2]]
+    assert all(t["attempts"] == 1 for t in retried)
+
+    # Resultado atrasado do lease vencido é descartado
+    assert not work.complete(lease_id, [(0, "tarde")])
+    assert _events(work) == []
+
+
+def test_renew_keeps_lease_alive(clock):
+    work = WorkQueue(lease_timeout=10)
+    work.put([0], ["a"])
+    lease_id, _ = work.lease("w1")
+
+    for _ in range(3):
+        clock.now += 8
+        work.renew(lease_id)
+        assert work.expire() == 0
+    assert work.complete(lease_id, [(0, "ok")])
+
+
+def test_released_worker_chunks_go_back_first(clock):
+    work = WorkQueue(lease_timeout=10)
+    work.put([0], ["a"])
+    work.put([1], ["b"])
+    work.lease("caiu")
+
+    assert work.release("caiu", "conexão perdida") == 1
+    assert work.release("outro", "conexão perdida") == 0
+    assert work.lease("w2")[1]["indices"] == [0]
+    assert work.lease("w2")[1]["indices"] == [1]
+
+
+def test_task_fails_after_max_attempts(clock):
+    work = WorkQueue(lease_timeout=10, max_attempts=2)
+    work.put([7], ["x"])
+
+    work.lease("w1")
+    clock.now += 11
+    work.expire()
+    work.lease("w2")
+    clock.now += 11
+    work.expire()
+
+    assert work.lease("w3") is None
+    (kind, task, reason), = _events(work)
+    assert (kind, task["indices"], task["attempts"]) == ("failed", [7], 2)
+    assert "lease expirou (w2)" in reason
@@ -0,0 +1,64 @@
+# ===================================================
+# test_indicator_bank.py
+# Banco de indicadores: mesmos valores do bt.ind.SMA em cada barra
+# ===================================================
+import math
+
+import backtrader as bt
+import pytest
+
+from engine.backtest_engine import BacktestEngine
+from engine.indicator_bank import bank_requests
+from strategies.sma_test.strategy import SMATest
+
+
+class RecordSMA(bt.Strategy):
+    """Grava, barra a barra (aquecimento incluso), SMAs de várias formas"""
+
+    params = (("periods", (3, 10, 21)),)
+
+    def __init__(self):
+        self.smas = [bt.ind.SMA(self.data.close, period=p) for p in self.p.periods]
+        self.smas.append(bt.ind.SMA(self.data, period=5))           # linha 0 via stub
+        self.smas.append(bt.ind.SMA(self.data.high, period=7))
+        # Sobre uma linha derivada: fora do banco, cálculo normal
+        self.smas.append(bt.ind.SMA((self.data.high + self.data.low) / 2.0, period=4))
+        self.values = []
+
+    def prenext(self):
+        self.next()
+
+    def next(self):
+        self.values.append(tuple(sma[0] for sma in self.smas))
+
+
+def _values(datafile, timeframe, bank):
+    engine = BacktestEngine(RecordSMA, datafile, timeframe_minutes=timeframe, feed="store",
+                            profile="lean", indicator_bank=bank)
+    engine.run(verbose=False)
+    strategy = engine.cerebro.runstrats[0][0]
+    banked = strategy.analyzers.bank.get_analysis()["banked"] if bank else 0
+    return strategy.values, banked
+
+
+def _same(a, b):
+    return a == b or (math.isnan(a) and math.isnan(b))
+
+
+@pytest.mark.parametrize("timeframe", [1, 7])
+@pytest.mark.parametrize("bank", [True, {"sma": [3, 10, 21, 50]}])
+def test_bank_matches_backtrader_sma_every_bar(datafile, timeframe, bank):
+    expected, _ = _values(datafile, timeframe, None)
+    values, banked = _values(datafile, timeframe, bank)
+
+    assert banked == 5
+    assert len(values) == len(expected)
+    for bar, (got, want) in enumerate(zip(values, expected)):
+        assert all(_same(g, w) for g, w in zip(got, want)), (bar, got, want)
+
+
+def test_bank_requests_from_vector_spec():
+    variable = {"sma_period": [20, 10, 20, 30]}
+    assert bank_requests(SMATest, {}, variable) == {"sma": [10, 20, 30]}
+    assert bank_requests(SMATest, {"sma_period": 15}) == {"sma": [15]}
+    assert bank_requests(RecordSMA) == {}
@@ -0,0 +1,63 @@
+# ===================================================
+# test_kill_rules.py
+# Parada antecipada: validação, motivo e paridade Backtrader x vetorizado
+# ===================================================
+import math
+
+import pytest
+
+from conftest import SMA_PARAMS
+from engine.backtest_engine import BacktestEngine
+from engine.batch_runner import BatchRunner
+from engine.kill_rules import normalize_kill_rules
+from strategies.sma_test.strategy import SMATest
+
+
+VARIABLE = {"sma_period": [5, 10, 20], "stop_points": [10, 20], "target_rr": [1.0]}
+
+
+def test_normalize_validates_rules():
+    assert normalize_kill_rules(None) is None
+    assert normalize_kill_rules({"max_dd_pct": None}) is None
+    assert normalize_kill_rules({"max_dd_pct": 5, "timeout": None}) == {"max_dd_pct": 5}
+    with pytest.raises(ValueError):
+        normalize_kill_rules({"max_drawdown": 5})
+    with pytest.raises(ValueError):
+        normalize_kill_rules({"min_trades": 2})
+
+
+def test_pruned_run_stops_early(datafile):
+    def run(kill_rules):
+        return BacktestEngine(SMATest, datafile, timeframe_minutes=7, strategy_params=SMA_PARAMS,
+                              feed="store", profile="lean", kill_rules=kill_rules).run(verbose=False)
+
+    full = run(None)
+    pruned = run({"equity_floor": 100001})
+
+    assert full["pruned"] is None
+    assert pruned["pruned"] == "equity_floor: 100,000.00 < 100,001 (barra 1)"
+    assert pruned["bars"] < full["bars"]
+
+
+@pytest.mark.parametrize("rules", [
+    {"max_dd_pct": 0.05},
+    {"equity_floor": 99990},
+    {"min_trades": 3, "trades_window": 50},
+])
+def test_same_pruning_in_backtrader_and_vector(datafile, rules):
+    rows = {}
+    for engine in ("backtrader", "vector"):
+        runner = BatchRunner(SMATest, datafile, engine=engine, cache=False, kill_rules=rules)
+        runner.run({"timeframe": 7}, VARIABLE, verbose=False)
+        rows[engine] = [(r["sma_period"], r["stop_points"], r.get("Pruned")) for r in runner.results]
+
+    assert rows["backtrader"] == rows["vector"]
+    assert any(pruned for *_, pruned in rows["backtrader"])
+    rule = next(iter(rules))
+    assert all(pruned.startswith(rule) for *_, pruned in rows["backtrader"] if pruned)
+
+
+def test_pruned_rows_have_no_equity(datafile):
+    runner = BatchRunner(SMATest, datafile, cache=False, kill_rules={"equity_floor": 99990})
+    runner.run({"timeframe": 7}, VARIABLE, verbose=False)
+    assert all(math.isnan(r["Equity Final"]) for r in runner.results if r.get("Pruned"))
@@ -0,0 +1,85 @@
+# ===================================================
+# test_lowmem_orders.py
+# Perfil lowmem (descarte do histórico de ordens) com bracket e OCO
+# ===================================================
+import backtrader as bt
+import pytest
+
+from engine import custom_analyzer
+from engine.backtest_engine import BacktestEngine
+
+
+class BracketOCO(bt.Strategy):
+    """
+    Alterna entradas com bracket (buy_bracket) e entradas a mercado com
+    saídas em par OCO (limit + stop); stop e alvo em pontos
+    """
+
+    params = (
+        ("every", 15),
+        ("points", 8),
+    )
+
+    def __init__(self):
+        self.live = []
+        self.entries = 0
+
+    def notify_order(self, order):
+        if not order.alive() and order in self.live:
+            self.live.remove(order)
+
+    def next(self):
+        if self.live or self.position or len(self) % self.p.every:
+            return
+
+        close = self.data.close[0]
+        points = self.p.points
+        self.entries += 1
+        if self.entries % 2:
+            self.live.extend(self.buy_bracket(size=1, exectype=bt.Order.Market,
+                                              limitprice=close + points,
+                                              stopprice=close - points))
+        else:
+            entry = self.sell(size=1)
+            target = self.buy(size=1, exectype=bt.Order.Limit, price=close - points)
+            stop = self.buy(size=1, exectype=bt.Order.Stop, price=close + points, oco=target)
+            self.live.extend([entry, target, stop])
+
+
+def _run(datafile, profile, timeframe):
+    result = BacktestEngine(BracketOCO, datafile, timeframe_minutes=timeframe,
+                            feed="store", profile=profile).run(verbose=False)
+    return (round(result["equity_end"], 6), round(result["max_dd_cash"], 6),
+            result["metrics"]["trades"])
+
+
+@pytest.fixture
+def trims(monkeypatch):
+    """Conta as chamadas de ResultAnalyzer._trim_history"""
+    calls = []
+    trim = custom_analyzer.ResultAnalyzer._trim_history
+
+    def counted(self):
+        calls.append(1)
+        trim(self)
+
+    monkeypatch.setattr(custom_analyzer.ResultAnalyzer, "_trim_history", counted)
+    return calls
+
+
+@pytest.mark.parametrize("timeframe", [1, 7])
+def test_lowmem_matches_full_with_bracket_and_oco(datafile, trims, timeframe):
+    full = _run(datafile, "full", timeframe)
+    assert full[2] > 10
+    assert not trims
+    assert _run(datafile, "lowmem", timeframe) == full
+    assert len(trims) == full[2]
+
+
+def test_lowmem_without_trim_on_unknown_backtrader(datafile, trims, monkeypatch):
+    """Versão fora de TRIM_VERSIONS: não descarta nada e o resultado não muda"""
+    trimmed = _run(datafile, "lowmem", 1)
+    del trims[:]
+    monkeypatch.setattr(custom_analyzer, "TRIM_VERSIONS", ((0,), (0,)))
+    assert _run(datafile, "lowmem", 1) == trimmed
+    assert not trims
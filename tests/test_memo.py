@@ -0,0 +1,30 @@
+# ===================================================
+# test_memo.py
+# Memos por processo limitados (LRU)
+# ===================================================
+from engine import bar_store, indicator_bank
+from engine.memo import LRUMemo
+
+
+def test_lru_evicts_least_recently_used():
+    memo = LRUMemo(2)
+    memo["a"] = 1
+    memo["b"] = 2
+    assert memo["a"] == 1          # "a" passa a ser o mais recente
+    memo["c"] = 3
+    assert list(memo) == ["a", "c"]
+    assert memo.setdefault("d", {}) == {}
+    assert list(memo) == ["c", "d"]
+
+
+def test_process_memos_are_bounded():
+    assert isinstance(bar_store._LOADED, LRUMemo)
+    assert isinstance(indicator_bank._BANKS, LRUMemo)
+    assert bar_store._LOADED.maxsize == bar_store.LOADED_MAX
+    assert indicator_bank._BANKS.maxsize == indicator_bank.BANKS_MAX
+
+
+def test_read_resampled_stays_within_cap(datafile):
+    for start in range(bar_store.LOADED_MAX * 2):
+        bar_store.read_resampled(datafile, 5, start, None)
+    assert len(bar_store._LOADED) <= bar_store.LOADED_MAX
@@ -0,0 +1,38 @@
+# ===================================================
+# test_profiling.py
+# Tempo por fase: AnalyzerTimer só quando timings é pedido
+# ===================================================
+import pytest
+
+from conftest import SMA_PARAMS
+from engine.backtest_engine import BacktestEngine
+from strategies.sma_test.strategy import SMATest
+
+
+def _run(datafile, timings):
+    engine = BacktestEngine(SMATest, datafile, timeframe_minutes=7,
+                            strategy_params=SMA_PARAMS, feed="store",
+                            profile="lean", timings=timings)
+    result = engine.run(verbose=False)
+    return engine, result
+
+
+def test_default_has_no_analyzer_timer(datafile):
+    engine, result = _run(datafile, timings=False)
+
+    analyzers = engine.cerebro.runstrats[0][0].analyzers
+    assert "timer" not in analyzers.getnames()
+    assert result["timings"]["analyzers"] == 0.0
+    assert result["timings"]["strategy"] > 0
+
+
+def test_timings_flag_times_analyzers(datafile):
+    engine, result = _run(datafile, timings=True)
+    plain = _run(datafile, timings=False)[1]
+
+    analyzers = engine.cerebro.runstrats[0][0].analyzers
+    assert "timer" in analyzers.getnames()
+    assert result["timings"]["analyzers"] > 0
+    # Cronometrar não muda o resultado
+    assert result["equity_end"] == pytest.approx(plain["equity_end"])
+    assert result["metrics"] == plain["metrics"]
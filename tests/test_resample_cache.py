@@ -0,0 +1,90 @@
+# ===================================================
+# test_resample_cache.py
+# Resample vetorizado barra a barra contra o resampledata do Backtrader,
+# com dados que exercitam viradas de sessão e buracos
+# ===================================================
+from datetime import datetime, timedelta
+
+import backtrader as bt
+import pytest
+
+from engine.bar_store import read_bars
+from engine.resample_cache import resample_bars
+
+
+COMPRESSIONS = (1, 5, 7, 60)
+
+
+def _write_bars(path, times):
+    """Arquivo no formato dos dados (YYYYMMDD HHMMSS;O;H;L;C;V) com preços variados"""
+    with open(path, "w") as f:
+        for k, dt in enumerate(times):
+            price = 20000 + (k * 7919) % 97 * 0.25
+            f.write(f"{dt:%Y%m%d %H%M%S};{price};{price + 1.5};{price - 1.25};"
+                    f"{price + 0.5};{k % 13 + 1}\n")
+    return str(path)
+
+
+def _minutes(day, start, end, step=1, second=0):
+    """Barras de `start` a `end` (HH:MM inclusivo) no dia `day`"""
+    t = datetime.strptime(f"{day} {start}", "%Y-%m-%d %H:%M").replace(second=second)
+    stop = datetime.strptime(f"{day} {end}", "%Y-%m-%d %H:%M").replace(second=second)
+    times = []
+    while t <= stop:
+        times.append(t)
+        t += timedelta(minutes=step)
+    return times
+
+
+SCENARIOS = {
+    # Só pregão (sem 00:00): toda troca de dia é virada de sessão
+    "rth": (_minutes("2024-03-04", "09:30", "16:00")
+            + _minutes("2024-03-05", "09:30", "16:00")
+            + _minutes("2024-03-06", "09:31", "15:58")),
+    # Buraco sobre a meia-noite e dia com uma barra só
+    "midnight_gap": (_minutes("2024-03-04", "18:01", "23:50")
+                     + _minutes("2024-03-05", "00:05", "02:00")
+                     + _minutes("2024-03-06", "03:03", "03:03")
+                     + _minutes("2024-03-07", "01:00", "01:40", step=3)),
+    # Barras fora do minuto cheio (nunca na borda exata)
+    "seconds": (_minutes("2024-03-04", "20:00", "23:59", second=30)
+                + _minutes("2024-03-05", "00:00", "01:00", second=30)),
+}
+
+
+def _backtrader_bars(datafile, compression):
+    """Barras resampleadas pelo próprio Backtrader (datetime e OHLCV por next)"""
+    rows = []
+
+    class Recorder(bt.Strategy):
+        def next(self):
+            d = self.data
+            rows.append((d.datetime[0], d.open[0], d.high[0], d.low[0],
+                         d.close[0], d.volume[0]))
+
+    cerebro = bt.Cerebro(stdstats=False)
+    data = bt.feeds.GenericCSVData(
+        dataname=datafile, dtformat="%Y%m%d %H%M%S", separator=";",
+        datetime=0, open=1, high=2, low=3, close=4, volume=5, openinterest=-1,
+        timeframe=bt.TimeFrame.Minutes, compression=1, headers=False,
+    )
+    cerebro.resampledata(data, timeframe=bt.TimeFrame.Minutes, compression=compression)
+    cerebro.addstrategy(Recorder)
+    cerebro.run()
+    return rows
+
+
+@pytest.mark.parametrize("compression", COMPRESSIONS)
+@pytest.mark.parametrize("scenario", sorted(SCENARIOS))
+def test_resample_matches_backtrader(tmp_path, scenario, compression):
+    datafile = _write_bars(tmp_path / f"{scenario}.txt", SCENARIOS[scenario])
+    bars = resample_bars(read_bars(datafile), compression)
+    ours = list(zip(*(bars[col].tolist() for col in
+                      ("datetime", "open", "high", "low", "close", "volume"))))
+    assert ours == _backtrader_bars(datafile, compression)
+
+
+def test_resample_empty():
+    empty = resample_bars({"timestamp": [], "datetime": [], "open": [], "high": [],
+                           "low": [], "close": [], "volume": []}, 5)
+    assert all(len(values) == 0 for values in empty.values())
@@ -0,0 +1,51 @@
+# ===================================================
+# test_result_cache.py
+# Chave do cache de resultados
+# ===================================================
+import shutil
+
+from engine.bar_store import BarStore
+from engine.result_cache import ResultCache
+from strategies.sma_test.strategy import SMATest
+
+from conftest import SMA_PARAMS
+
+
+def _key(datafile, **kwargs):
+    cache = ResultCache(SMATest, datafile, 100000, 1.24, path="unused.jsonl", **kwargs)
+    return cache.key({**SMA_PARAMS, "timeframe": 5})
+
+
+def test_key_depends_on_engine_feed_and_profile(datafile):
+    base = _key(datafile)
+    assert _key(datafile, engine="backtrader", feed="store", profile="lean") == base
+    assert _key(datafile, engine="vector") != base
+    assert _key(datafile, feed="array") != base
+    assert _key(datafile, profile="lowmem") != base
+
+
+def test_csv_feed_does_not_build_bar_store(tmp_path, datafile):
+    path = tmp_path / "copy.txt"
+    shutil.copyfile(datafile, path)
+    _key(str(path), feed="csv")
+    assert not BarStore(str(path)).is_valid()
+
+
+def test_key_depends_on_engine_code(datafile, monkeypatch):
+    from engine import result_cache
+
+    base = _key(datafile)
+    monkeypatch.setattr(result_cache, "engine_hash", lambda: "outro engine")
+    assert _key(datafile) != base
+
+
+def test_batch_counts_cache_hits(datafile, tmp_path):
+    from engine.batch_runner import BatchRunner
+
+    path = str(tmp_path / "cache.jsonl")
+    variable = {"sma_period": [10, 20], "stop_points": [20], "target_rr": [1.0]}
+    first = BatchRunner(SMATest, datafile, cache=path)
+    first.run({"timeframe": 5}, variable, verbose=False)
+    again = BatchRunner(SMATest, datafile, cache=path)
+    again.run({"timeframe": 5}, {**variable, "sma_period": [10, 20, 30]}, verbose=False)
+    assert (first.cached, again.cached, again.count) == (0, 2, 3)
@@ -0,0 +1,77 @@
+# ===================================================
+# test_result_sink.py
+# Modo sink determinístico: ordem das linhas e empates no ranking
+# ===================================================
+import itertools
+
+import pandas as pd
+import pytest
+
+from engine.batch_runner import BatchRunner
+from engine.result_sink import ResultSink, TopK
+from strategies.sma_test.strategy import SMATest
+
+
+def test_topk_ties_broken_by_index():
+    rows = [({"id": i, "v": v}, i) for i, v in enumerate([1.0, 2.0, 2.0, 2.0, 0.5])]
+    leaders = set()
+    for perm in itertools.permutations(rows):
+        tracker = TopK("v", 2)
+        for row, index in perm:
+            tracker.push(row, index)
+        leaders.add(tuple(row["id"] for row in tracker.rows()))
+    assert leaders == {(1, 2)}
+
+
+def _sink_run(datafile, path, workers):
+    runner = BatchRunner(SMATest, datafile, workers=workers, cache=False, sink=str(path),
+                         top_k=3, chunk_size=2)
+    # target_rr repetido: combinações diferentes com o mesmo resultado (empates)
+    runner.run({"timeframe": 5}, {"sma_period": [10, 20, 30], "stop_points": [10, 20],
+                                  "target_rr": [1.0, 1.0]}, verbose=False)
+    df = pd.read_csv(path)
+    df = df.drop(columns=[c for c in df.columns if c.startswith("T ") or c == "Bars/s"])
+    return df, runner.get_best(top_n=3)
+
+
+def test_sink_order_and_leaders_independent_of_workers(datafile, tmp_path):
+    sequential, best_sequential = _sink_run(datafile, tmp_path / "w1.csv", 1)
+    parallel, best_parallel = _sink_run(datafile, tmp_path / "w2.csv", 2)
+    pd.testing.assert_frame_equal(sequential, parallel)
+    columns = ["sma_period", "stop_points", "target_rr", "Equity Final"]
+    pd.testing.assert_frame_equal(best_sequential[columns], best_parallel[columns])
+
+
+def test_lower_is_better_leaders_skip_pruned(datafile, tmp_path):
+    fixed = {"timeframe": 7, "target_rr": 1.0}
+    variable = {"sma_period": [5, 8, 10, 15, 20], "stop_points": [10, 20, 30]}
+    # Poda cedo as que operam pouco: DD parcial, menor que o das que terminam
+    kill = {"min_trades": 3, "trades_window": 50}
+
+    memory = BatchRunner(SMATest, datafile, cache=False, kill_rules=kill)
+    memory.run(fixed, variable, verbose=False)
+    sink = BatchRunner(SMATest, datafile, cache=False, kill_rules=kill,
+                       sink=str(tmp_path / "r.csv"), rank_by=("Max DD %",), top_k=3)
+    sink.run(fixed, variable, verbose=False)
+
+    finished = sorted((r for r in memory.results if not r.get("Pruned")),
+                      key=lambda r: r["Max DD %"])
+    assert memory.pruned and finished
+    expected = [r["sma_period"] for r in finished[:3]]
+    assert memory.get_best("Max DD %", 3)["sma_period"].tolist() == expected
+    # Heap do sink e releitura do arquivo (top maior que o heap)
+    assert sink.get_best("Max DD %", 3)["sma_period"].tolist() == expected
+    assert sink.get_best("Max DD %", 5)["Max DD %"].tolist() == \
+        pytest.approx([r["Max DD %"] for r in finished[:5]])
+
+
+def test_sink_base_is_abstract(tmp_path):
+    with pytest.raises(TypeError):
+        ResultSink(str(tmp_path / "r.csv"))
+
+    class HalfSink(ResultSink):
+        def _write(self, rows):
+            pass
+
+    with pytest.raises(TypeError, match="read_chunks"):
+        HalfSink(str(tmp_path / "r.csv"))
@@ -0,0 +1,89 @@
+# ===================================================
+# test_results_db.py
+# Banco de resultados: ordenação de top/compare e filtros
+# ===================================================
+import csv
+import json
+from datetime import datetime
+
+import pytest
+
+from engine.results_db import LOWER_IS_BETTER, ResultsDB, metric_column
+
+
+def _row(period, equity, dd, timeframe="7m", **extra):
+    return {"sma_period": period, "Timeframe": timeframe, "Equity Final": equity,
+            "Profit Factor": equity / 100000, "Trades": 10, "Max DD %": dd,
+            "Max DD $": dd * 1000, "Bars/s": 1e5, "T Total": 0.1, **extra}
+
+
+ROWS_A = [_row(5, 100500.0, 0.9), _row(10, 101200.0, 1.5), _row(20, 99800.0, 0.4),
+          _row(30, float("nan"), 0.1, Pruned="max_dd_pct: ...")]
+ROWS_B = [_row(5, 100100.0, 0.7, timeframe="5m"), _row(10, 102000.0, 2.5, timeframe="5m")]
+
+
+@pytest.fixture
+def db(tmp_path):
+    with ResultsDB(str(tmp_path / "results.db")) as db:
+        db.record_run("sma_test", "sma", ROWS_A, started_at=datetime(2024, 1, 1),
+                      fixed_params={"timeframe": 7, "stop_points": 20})
+        db.record_run("sma_test", "sma", ROWS_B, started_at=datetime(2024, 2, 1))
+        yield db
+
+
+def test_metric_column_aliases():
+    assert metric_column("Profit Factor") == metric_column("pf") == "profit_factor"
+    assert metric_column("dd") == "max_dd_pct" and "max_dd_pct" in LOWER_IS_BETTER
+    with pytest.raises(ValueError):
+        metric_column("sharpe")
+
+
+def test_top_orders_higher_is_better(db):
+    rows = db.top("sma_test", metric="Equity Final", limit=10)
+    assert [r["equity_final"] for r in rows] == [102000.0, 101200.0, 100500.0, 100100.0, 99800.0]
+    # Params completos: fixos + variáveis, sem o timeframe
+    assert json.loads(rows[1]["params"]) == {"sma_period": 10, "stop_points": 20}
+
+
+def test_top_orders_lower_is_better(db):
+    rows = db.top("sma_test", metric="dd", limit=3)
+    # Menor DD primeiro; a podada (DD parcial de 0.1) fica fora
+    assert [r["max_dd_pct"] for r in rows] == [0.4, 0.7, 0.9]
+    rows = db.top(metric="max_dd_cash", limit=2)
+    assert [r["max_dd_cash"] for r in rows] == [400.0, 700.0]
+
+
+def test_top_filters(db):
+    assert [r["equity_final"] for r in db.top(timeframe="5m")] == [102000.0, 100100.0]
+    assert [r["run_id"] for r in db.top(runs=[1], limit=1)] == [1]
+    assert db.top(batch="outro") == []
+    assert len(db.top(since="2024-01-15")) == 2
+
+
+def test_compare_best_and_median(db):
+    first, second = db.compare([1, 2], metric="Equity Final")
+    # NaN (podada) fica fora: 3 válidas na execução 1
+    assert (first["combos"], first["best equity_final"], first["median equity_final"]) == \
+        (4, 101200.0, 100500.0)
+    assert json.loads(first["best params"])["sma_period"] == 10
+    assert second["best equity_final"] == 102000.0
+
+    first, second = db.compare([1, 2], metric="dd")
+    assert first["best max_dd_pct"] == 0.4
+    assert second["best max_dd_pct"] == 0.7
+    with pytest.raises(ValueError):
+        db.compare([99])
+
+
+def test_import_csv_reads_batch_and_date(db, tmp_path):
+    path = tmp_path / "result_sma_fast_20240301_101500.csv"
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(ROWS_B[0]))
+        writer.writeheader()
+        writer.writerows(ROWS_B)
+
+    run_id = db.import_csv(str(path), "sma_test")
+    run = db.history(limit=1)[0]
+    assert (run["id"], run["batch"], run["started_at"]) == (run_id, "sma_fast", "2024-03-01T10:15:00")
+    assert db.has_result_path(str(path))
+    assert db.top(runs=[run_id], limit=1)[0]["equity_final"] == 102000.0
@@ -0,0 +1,87 @@
+# ===================================================
+# test_robustness.py
+# Monte Carlo / bootstrap: contas, determinismo e blocos
+# ===================================================
+import numpy as np
+import pytest
+
+from engine import robustness
+from engine.batch_runner import BatchRunner
+from engine.robustness import combo_seeds, monte_carlo
+from strategies.sma_test.strategy import SMATest
+
+
+PNLS = np.array([120.0, -80.0, 45.5, -200.0, 310.0, -15.25, 60.0, -90.0])
+
+
+def test_constant_trades_have_exact_stats():
+    stats = monte_carlo([-100.0] * 5, initial_cash=1000, sims=50, equity_floor=600)
+    assert stats["equity_final"] == dict.fromkeys((5, 50, 95), 500.0)
+    assert stats["max_dd_cash"][50] == 500.0
+    assert stats["max_dd_pct"][50] == pytest.approx(50.0)
+    assert stats["ruin_pct"] == 100.0
+
+
+def test_permutation_keeps_final_equity():
+    stats = monte_carlo(PNLS, initial_cash=10000, sims=500, method="permutation", seed=1)
+    for value in stats["equity_final"].values():
+        assert value == pytest.approx(10000 + PNLS.sum())
+    # Nenhuma ordem perde mais que a soma de todas as perdas
+    assert stats["max_dd_cash"][95] <= -PNLS[PNLS < 0].sum() + 1e-9
+
+
+def test_matches_brute_force_bootstrap():
+    sims, seed = 200, 9
+    stats = monte_carlo(PNLS, initial_cash=10000, sims=sims, seed=seed)
+
+    # Mesmo sorteio, uma simulação por vez
+    rng = np.random.default_rng(seed)
+    draws = PNLS[rng.integers(0, len(PNLS), size=(sims, len(PNLS)))]
+    dd, final = [], []
+    for seq in draws:
+        equity = 10000 + np.cumsum(seq)
+        peak = np.maximum(np.maximum.accumulate(equity), 10000)
+        dd.append(((peak - equity) / peak).max() * 100)
+        final.append(equity[-1])
+
+    assert stats["max_dd_pct"][95] == pytest.approx(np.percentile(dd, 95))
+    assert stats["equity_final"][5] == pytest.approx(np.percentile(final, 5))
+
+
+@pytest.mark.parametrize("method", ["bootstrap", "permutation"])
+def test_same_seed_same_stats(method):
+    a = monte_carlo(PNLS, sims=300, method=method, seed=4)
+    assert monte_carlo(PNLS, sims=300, method=method, seed=4) == a
+    assert monte_carlo(PNLS, sims=300, method=method, seed=5) != a
+
+
+def test_blocks_do_not_change_bootstrap(monkeypatch):
+    whole = monte_carlo(PNLS, sims=300, seed=2)
+    monkeypatch.setattr(robustness, "MC_BLOCK", len(PNLS) * 7)
+    assert monte_carlo(PNLS, sims=300, seed=2) == whole
+
+
+def test_empty_and_invalid():
+    stats = monte_carlo([], initial_cash=1000, sims=10)
+    assert stats["trades"] == 0 and stats["ruin_pct"] == 0.0
+    assert stats["equity_final"][50] == 1000.0
+    with pytest.raises(ValueError):
+        monte_carlo(PNLS, method="jackknife")
+
+
+def test_combo_seeds_are_independent_of_count():
+    first = [s.generate_state(1)[0] for s in combo_seeds(0, 3)]
+    more = [s.generate_state(1)[0] for s in combo_seeds(0, 5)]
+    assert more[:3] == first
+    assert len(set(more)) == 5
+
+
+def test_leaders_robustness_independent_of_workers(datafile):
+    runner = BatchRunner(SMATest, datafile, cache=False)
+    runner.run({"timeframe": 7, "stop_points": 20, "target_rr": 1.0},
+               {"sma_period": [5, 10, 20]}, verbose=False)
+
+    sequential = runner.robustness(top_n=3, sims=200, seed=1, workers=1)
+    parallel = runner.robustness(top_n=3, sims=200, seed=1, workers=2)
+    assert sequential.filter(like="MC ").equals(parallel.filter(like="MC "))
+    assert (sequential["MC Equity p5"] <= sequential["MC Equity p95"]).all()
@@ -0,0 +1,88 @@
+# ===================================================
+# test_search.py
+# Buscas adaptativas: determinismo e robustez do modelo
+# ===================================================
+import numpy as np
+import pytest
+
+from engine.batch_runner import BatchRunner
+from engine.search import BayesianSampler, ParamSpace, make_sampler
+from strategies.sma_test.strategy import SMATest
+
+
+VARIABLE = {"sma_period": [5, 10, 15, 20, 30], "stop_points": [10, 20, 30],
+            "target_rr": [1.0, 2.0]}
+
+
+def _asked(datafile, search, workers, engine="backtrader"):
+    runner = BatchRunner(SMATest, datafile, workers=workers, cache=False, engine=engine)
+    runner.run({"timeframe": 5}, VARIABLE, verbose=False, search=search, budget=12, seed=3)
+    return [(r["sma_period"], r["stop_points"], r["target_rr"]) for r in runner.results]
+
+
+@pytest.mark.parametrize("search", ["random", "bayesian", "zoom"])
+def test_same_seed_same_points_with_any_worker_count(datafile, search):
+    sequential = _asked(datafile, search, 1)
+    assert len(sequential) == 12
+    assert _asked(datafile, search, 2) == sequential
+
+
+@pytest.mark.parametrize("search", ["bayesian", "zoom"])
+def test_round_size_independent_of_many_workers(datafile, search):
+    # Vetorizado: workers não abre processos, só entraria no tamanho da rodada
+    few = _asked(datafile, search, 1, engine="vector")
+    assert _asked(datafile, search, 16, engine="vector") == few
+
+
+def test_initial_design_does_not_depend_on_ask():
+    a = make_sampler("bayesian", VARIABLE, budget=20, seed=1)
+    b = make_sampler("bayesian", VARIABLE, budget=20, seed=1)
+    assert a.n_init == b.n_init
+    assert a.ask(1) == b.ask(16)
+
+
+def test_bayesian_falls_back_to_random_when_cholesky_fails(monkeypatch):
+    sampler = BayesianSampler(ParamSpace(VARIABLE), budget=20, seed=1, batch_size=4)
+    initial = sampler.ask(4)
+    sampler.tell(initial, [float(k) for k in range(len(initial))])
+
+    def fail(_):
+        raise np.linalg.LinAlgError("not positive definite")
+
+    monkeypatch.setattr(np.linalg, "cholesky", fail)
+    points = sampler.ask(4)
+    assert len(points) == 4
+    assert not {tuple(p.values()) for p in points} & {tuple(p.values()) for p in initial}
+
+
+def _drive(search, seed, budget=15, batch=4):
+    """Laço ask/tell completo com score sintético (sem backtest)"""
+    sampler = make_sampler(search, VARIABLE, budget=budget, seed=seed, batch_size=batch)
+    asked = []
+    while sampler.remaining:
+        combos = sampler.ask(batch)
+        if not combos:
+            break
+        asked.extend(tuple(c.values()) for c in combos)
+        sampler.tell(combos, [c["sma_period"] * c["target_rr"] - c["stop_points"] for c in combos])
+    return asked
+
+
+@pytest.mark.parametrize("search", ["random", "bayesian", "zoom"])
+def test_sampler_is_deterministic_and_respects_budget(search):
+    asked = _drive(search, seed=5)
+    assert asked == _drive(search, seed=5)
+    assert len(asked) == 15
+    assert len(set(asked)) == len(asked)
+
+
+@pytest.mark.parametrize("search", ["random", "bayesian"])
+def test_sampler_seed_changes_points(search):
+    assert _drive(search, seed=5) != _drive(search, seed=6)
+
+
+def test_sampler_base_is_abstract():
+    from engine.search import Sampler
+
+    with pytest.raises(TypeError, match="ask"):
+        Sampler(ParamSpace(VARIABLE))
@@ -0,0 +1,47 @@
+# ===================================================
+# test_strategy_registry.py
+# Índice das estratégias: gravação atômica e releitura
+# ===================================================
+import json
+import os
+
+from engine import strategy_registry
+from engine.strategy_registry import StrategyRegistry
+
+
+STRATEGY = '''
+import backtrader as bt
+
+
+class Demo(bt.Strategy):
+    """Estratégia de teste"""
+'''
+
+
+def _root(tmp_path, names):
+    for name in names:
+        folder = tmp_path / name
+        folder.mkdir()
+        (folder / "strategy.py").write_text(STRATEGY, encoding="utf-8")
+    return str(tmp_path)
+
+
+def test_index_written_atomically(tmp_path):
+    registry = StrategyRegistry(_root(tmp_path, ["alfa", "beta"]))
+    assert registry.names() == ["alfa", "beta"]
+
+    folder = os.path.dirname(registry.index_file)
+    assert os.listdir(folder) == [os.path.basename(registry.index_file)]
+    with open(registry.index_file, encoding="utf-8") as f:
+        assert sorted(json.load(f)["strategies"]) == ["alfa", "beta"]
+    assert StrategyRegistry(str(tmp_path)).describe("alfa") == "Estratégia de teste"
+
+
+def test_failed_write_leaves_no_temp_file(tmp_path, monkeypatch):
+    def fail(src, dst):
+        raise OSError("disco cheio")
+
+    monkeypatch.setattr(strategy_registry.os, "replace", fail)
+    registry = StrategyRegistry(_root(tmp_path, ["alfa"]))
+    assert registry.names() == ["alfa"]
+    assert os.listdir(os.path.dirname(registry.index_file)) == []
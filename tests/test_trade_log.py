@@ -0,0 +1,84 @@
+# ===================================================
+# test_trade_log.py
+# Log de trades do ResultAnalyzer: preço de saída e tamanho por trade
+# ===================================================
+import backtrader as bt
+import pytest
+
+from benchmarks.generate_data import generate
+from engine.array_feed import ArrayData
+from engine.bar_store import read_bars
+from engine.custom_analyzer import ResultAnalyzer
+
+
+class ScriptedOrders(bt.Strategy):
+    """Ordens a mercado em barras fixas: script = {barra: [(data, ação, tamanho)]}"""
+
+    params = (("script", None),)
+
+    def next(self):
+        for d, action, size in self.p.script.get(len(self), []):
+            data = self.datas[d]
+            if action == "close":
+                self.close(data=data)
+            else:
+                getattr(self, action)(data=data, size=size)
+
+
+@pytest.fixture(scope="module")
+def bars(datafile, tmp_path_factory):
+    """Barras 1m de dois arquivos diferentes (preços distintos)"""
+    other = tmp_path_factory.mktemp("data") / "mnq_2d_s11.txt"
+    generate(str(other), size="2d", seed=11)
+    return [read_bars(datafile), read_bars(str(other))]
+
+
+def _trade_log(bars, script, bounded=False):
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.broker.setcash(10_000_000)
+    for data in bars:
+        cerebro.adddata(ArrayData(bars=data, timeframe=bt.TimeFrame.Minutes, compression=1))
+    cerebro.addstrategy(ScriptedOrders, script=script)
+    cerebro.addanalyzer(ResultAnalyzer, _name="result", trade_log=True, bounded=bounded)
+    strategy = cerebro.run()[0]
+    return strategy.analyzers.result.get_analysis()["trades"].rows()
+
+
+# Ordem enviada no next() da barra k executa na abertura da barra k (0-based)
+def _open(bars, d, k):
+    return float(bars[d]["open"][k])
+
+
+@pytest.mark.parametrize("bounded", [False, True])
+def test_scaled_in_trade(bars, bounded):
+    trades = _trade_log(bars, {5: [(0, "buy", 1)], 6: [(0, "buy", 2)], 10: [(0, "close", None)]},
+                        bounded)
+    assert len(trades) == 1
+    assert trades["size"][0] == 3
+    assert trades["entry_price"][0] == pytest.approx((_open(bars, 0, 5) + 2 * _open(bars, 0, 6)) / 3)
+    assert trades["exit_price"][0] == _open(bars, 0, 10)
+
+
+def test_close_and_open_on_same_bar_in_two_datas(bars):
+    # Na barra 10 a data 0 fecha e a data 1 abre: a última ordem executada
+    # não é a que fechou o trade da data 0
+    trades = _trade_log(bars, {
+        5: [(0, "buy", 1)],
+        10: [(0, "close", None), (1, "buy", 2)],
+        15: [(1, "close", None)],
+    })
+    assert len(trades) == 2
+    assert list(trades["size"]) == [1, 2]
+    assert trades["exit_price"][0] == _open(bars, 0, 10)
+    assert trades["entry_price"][1] == _open(bars, 1, 10)
+    assert trades["exit_price"][1] == _open(bars, 1, 15)
+
+
+def test_reversal_closes_and_opens(bars):
+    trades = _trade_log(bars, {5: [(0, "buy", 1)], 8: [(0, "sell", 2)], 12: [(0, "close", None)]})
+    assert len(trades) == 2
+    assert list(trades["direction"]) == [1, -1]
+    assert list(trades["size"]) == [1, 1]
+    assert trades["exit_price"][0] == _open(bars, 0, 8)
+    assert trades["entry_price"][1] == _open(bars, 0, 8)
+    assert trades["exit_price"][1] == _open(bars, 0, 12)
@@ -0,0 +1,93 @@
+# ===================================================
+# test_walk_forward.py
+# Janelas walk-forward e recorte [start, end) dos dados carregados
+# ===================================================
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import SMA_PARAMS
+from engine.backtest_engine import BacktestEngine
+from engine.batch_runner import BatchRunner
+from engine.walk_forward import WalkForward, stitch_equity, walk_forward_windows
+from strategies.sma_test.strategy import SMATest
+
+
+FIXED = {"timeframe": 7, "stop_points": 20, "target_rr": 1.0}
+VARIABLE = {"sma_period": [5, 10, 20]}
+
+
+def test_windows_split_is_and_oos():
+    days = np.arange("2024-01-01", "2024-01-11", dtype="datetime64[D]")
+    windows = walk_forward_windows(days, window_days=4, step_days=1, oos_fraction=0.25)
+
+    assert len(windows) == 7
+    first = windows[0]
+    assert first["is_start"] == pd.Timestamp("2024-01-01")
+    assert first["is_end"] == first["oos_start"] == pd.Timestamp("2024-01-04")
+    assert first["oos_end"] == pd.Timestamp("2024-01-05")
+    # OOS consecutivos, sem sobreposição
+    for a, b in zip(windows, windows[1:]):
+        assert a["oos_end"] == b["oos_start"]
+
+
+def test_windows_reject_overlapping_oos_and_empty_is():
+    days = np.arange("2024-01-01", "2024-01-11", dtype="datetime64[D]")
+    with pytest.raises(ValueError):
+        walk_forward_windows(days, window_days=4, step_days=1, oos_fraction=0.5)
+    with pytest.raises(ValueError):
+        walk_forward_windows(days, window_days=1, step_days=1, oos_fraction=0.5)
+
+
+@pytest.mark.parametrize("timeframe", [1, 7])
+def test_slice_is_the_same_in_every_feed(datafile, timeframe):
+    start, end = "2024-01-08 09:00", "2024-01-09 00:00"
+    results = {}
+    for feed in ("csv", "store", "array"):
+        engine = BacktestEngine(SMATest, datafile, timeframe_minutes=timeframe,
+                                strategy_params=SMA_PARAMS, feed=feed, profile="lean",
+                                start=start, end=end)
+        results[feed] = engine.run(verbose=False)
+
+    for feed in ("store", "array"):
+        assert results[feed]["bars"] == results["csv"]["bars"]
+        assert results[feed]["equity_end"] == pytest.approx(results["csv"]["equity_end"])
+        assert results[feed]["metrics"] == results["csv"]["metrics"]
+    if timeframe == 1:
+        # Em 1m: exatamente as linhas do arquivo com start <= data < end
+        stamps = pd.to_datetime([line.split(";")[0] for line in open(datafile)],
+                                format="%Y%m%d %H%M%S")
+        inside = (stamps >= pd.Timestamp(start)) & (stamps < pd.Timestamp(end))
+        assert results["csv"]["bars"] == inside.sum()
+
+
+def test_stitch_equity_chains_windows():
+    a = pd.Series([100.0, 110.0])
+    b = pd.Series([100.0, 90.0, 95.0])
+    assert stitch_equity([a, None, b], initial_cash=100.0).tolist() == [100, 110, 110, 100, 105]
+
+
+def test_walk_forward_matches_direct_runs(datafile):
+    wf = WalkForward(SMATest, datafile, window_days=2, oos_fraction=0.5)
+    table = wf.run(FIXED, VARIABLE, verbose=False)
+    assert len(table) == len(wf.windows) == 2
+
+    for window, row in zip(wf.windows, table.to_dict("records")):
+        # Vencedor do IS = melhor do batch no mesmo recorte
+        runner = BatchRunner(SMATest, datafile, cache=False,
+                             start=window["is_start"], end=window["is_end"])
+        runner.run(FIXED, VARIABLE, verbose=False)
+        best = max(runner.results, key=lambda r: r["Equity Final"])
+        assert row["sma_period"] == best["sma_period"]
+        assert row["IS Equity Final"] == pytest.approx(best["Equity Final"])
+
+        # OOS = backtest do vencedor só no período OOS
+        params = {k: v for k, v in {**FIXED, "sma_period": row["sma_period"]}.items()
+                  if k != "timeframe"}
+        oos = BacktestEngine(SMATest, datafile, timeframe_minutes=7, strategy_params=params,
+                             feed="store", profile="lean",
+                             start=window["oos_start"], end=window["oos_end"]).run(verbose=False)
+        assert row["OOS PnL"] == pytest.approx(oos["equity_end"] - 100000)
+
+    assert wf.summary["oos_pnl"] == pytest.approx(table["OOS PnL"].sum())
+    assert wf.summary["equity_final"] == pytest.approx(100000 + wf.summary["oos_pnl"])